@@ -1,25 +1,178 @@
 from abc import ABC, abstractmethod
-from typing import Optional
-from pydantic import BaseModel
+from typing import Callable, Optional, Protocol
+from pydantic import BaseModel, ConfigDict, Field
+import numpy as np
+import soundfile as sf
+import logging
+
+from app.utils.audio_processing import level_chunks, process_audio, to_mono_float32
+from app.utils.text_utils import split_text_around_chunks, split_text_into_chunks
+from app.utils.timeline import TaskTimeline, span
+
+logger = logging.getLogger(__name__)
+
+CancelCheck = Callable[[], bool]
+# Receives each rendered chunk in order as (index, samples, sample_rate)
+ChunkCallback = Callable[[int, np.ndarray, int], None]
+
+
+class SynthesisCancelled(Exception):
+    """Raised at a chunk boundary when the task has been asked to stop."""
+
+
+class ChunkSynthesisError(Exception):
+    """A single chunk failed; chunks rendered before it are already checkpointed."""
+
+    def __init__(self, index: int, total: int, cause: Exception):
+        super().__init__(f"Chunk {index+1}/{total} failed: {type(cause).__name__}: {cause}")
+        self.index = index
+
+
+class ChunkCheckpoint(Protocol):
+    def load(self, index: int, text: str) -> Optional[tuple[np.ndarray, int]]: ...
+
+    def save(self, index: int, text: str, samples: np.ndarray, sample_rate: int) -> None: ...
+
+    def flush(self) -> None: ...
 
 
 class AudioResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     file_path: str
     length: float  # in seconds
+    sample_rate: Optional[int] = None
+    # The samples as written, so later stages (captioning) don't have to read the file back
+    samples: Optional[np.ndarray] = Field(default=None, exclude=True, repr=False)
 
 
 class AudioModule(ABC):
     client = None
+    # soundfile subtype used when post-processing doesn't ask for a specific bit depth
+    default_subtype: str = "PCM_16"
+    # Engines that render text chunk by chunk can be checkpointed and fanned out across workers
+    supports_chunking: bool = True
+    # Whether generate_audio saves and resumes from the checkpoint it is given; without it tasks
+    # open no checkpoint store and revisions render every chunk again
+    supports_checkpoints: bool = True
+    # Whether chunk_synthesizer functions may run from several threads at once on one instance
+    concurrent_synthesis: bool = False
     
     def __init__(self, max_chars: int = 2500):
         self.max_chars = max_chars
 
-    @abstractmethod
+    def chunk_synthesizer(self, voice_settings: Optional[dict]) -> Callable[[str], tuple[np.ndarray, int]]:
+        """Returns a function rendering one text chunk with these voice settings to (samples, sample_rate)."""
+        raise NotImplementedError(f"{type(self).__name__} does not synthesize chunk by chunk")
+
+    def split_text(self, text: str) -> list[str]:
+        return split_text_into_chunks(text, self.max_chars)
+
+    def split_text_around(self, text: str, previous_chunks: list[str]) -> list[str]:
+        """Like `split_text`, keeping the chunks of an earlier render that are still in `text` intact."""
+        return split_text_around_chunks(text, previous_chunks, self.max_chars)
+
     def generate_audio(
-        self, text: str, file_path: str, voice_settings: Optional[dict]
+        self,
+        text: str,
+        file_path: str,
+        voice_settings: Optional[dict],
+        post_processing: Optional[dict] = None,
+        cancel_check: Optional[CancelCheck] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None,
+        chunk_callback: Optional[ChunkCallback] = None,
+        timeline: Optional[TaskTimeline] = None,
+        chunks: Optional[list[str]] = None,
     ) -> AudioResult:
-        pass
+        """Renders `text`, split with `split_text` unless the caller already split it into `chunks`."""
+        synthesize = self.chunk_synthesizer(voice_settings or {})
+        with span(timeline, "chunking"):
+            split_text = chunks or self.split_text(text)
+        logger.info(f"Splitted text into {len(split_text)} chunks")
+
+        chunks, sample_rate = self.render_chunks(split_text, synthesize, cancel_check, checkpoint, chunk_callback, timeline)
+        with span(timeline, "assembly"):
+            samples = np.concatenate(level_chunks(chunks, sample_rate, post_processing))
+        with span(timeline, "encoding"):
+            return self.write_audio(samples, sample_rate, file_path, post_processing)
 
     @abstractmethod
     def get_voices(self) -> list[str]:
         pass
+
+    def render_chunks(
+        self,
+        texts: list[str],
+        synthesize: Callable[[str], tuple[np.ndarray, int]],
+        cancel_check: Optional[CancelCheck] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None,
+        chunk_callback: Optional[ChunkCallback] = None,
+        timeline: Optional[TaskTimeline] = None,
+    ) -> tuple[list[np.ndarray], int]:
+        """
+        Synthesizes text chunks in order, checking for cancellation before each one so a stop
+        request takes effect within a chunk and the loaded model stays usable.
+
+        For multi-chunk jobs with a `checkpoint`, chunks it already holds are reused and each new
+        chunk is saved as soon as it is rendered, so a retried task only redoes what is missing.
+
+        `chunk_callback` sees every chunk, reused or new, as soon as it is available, which lets
+        later stages (captioning) start before the whole text is rendered. Each chunk's synthesis
+        and checkpoint reads and writes are recorded on `timeline`.
+        """
+        if len(texts) < 2:
+            checkpoint = None
+
+        chunks = []
+        sample_rate = None
+        reused = 0
+        for i, chunk_text in enumerate(texts):
+            if cancel_check and cancel_check():
+                raise SynthesisCancelled(f"Cancelled before chunk {i+1}/{len(texts)}")
+
+            stored = None
+            if checkpoint:
+                with span(timeline, "checkpoint_load", chunk=i):
+                    stored = checkpoint.load(i, chunk_text)
+            if stored is not None:
+                samples, sample_rate = stored
+                samples = to_mono_float32(samples)
+                chunks.append(samples)
+                reused += 1
+                if chunk_callback:
+                    chunk_callback(i, samples, sample_rate)
+                continue
+
+            logger.info(f"Generating audio for chunk {i+1}/{len(texts)} ({len(chunk_text)} chars)")
+            try:
+                with span(timeline, "synthesis", chunk=i, chars=len(chunk_text)):
+                    samples, sample_rate = synthesize(chunk_text)
+            except Exception as e:
+                if checkpoint is None:
+                    raise
+                raise ChunkSynthesisError(i, len(texts), e) from e
+            samples = to_mono_float32(samples)
+            if checkpoint:
+                with span(timeline, "checkpoint_save", chunk=i):
+                    checkpoint.save(i, chunk_text, samples, sample_rate)
+            chunks.append(samples)
+            if chunk_callback:
+                chunk_callback(i, samples, sample_rate)
+
+        if checkpoint:
+            # Chunks are found by their object metadata until then; one manifest write per job
+            with span(timeline, "checkpoint_save"):
+                checkpoint.flush()
+        if reused:
+            logger.info(f"Reused {reused}/{len(texts)} checkpointed chunks")
+        return chunks, sample_rate
+
+    def write_audio(self, samples, sample_rate: int, file_path: str, post_processing: Optional[dict] = None) -> AudioResult:
+        return save_audio(samples, sample_rate, file_path, post_processing, self.default_subtype)
+
+
+def save_audio(samples, sample_rate: int, file_path: str, post_processing: Optional[dict] = None, default_subtype: str = "PCM_16") -> AudioResult:
+    """Runs the post-processing stage on in-memory samples and writes the result to `file_path`."""
+    samples, sample_rate, subtype = process_audio(samples, sample_rate, post_processing)
+    sf.write(file_path, samples, sample_rate, subtype=subtype or default_subtype)
+    return AudioResult(file_path=file_path, length=len(samples) / sample_rate, sample_rate=sample_rate, samples=samples)
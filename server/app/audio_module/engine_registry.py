@@ -0,0 +1,97 @@
+import logging
+from typing import Callable
+
+from app.audio_module.audio_module import AudioModule
+from app.config import settings
+from app.utils.memory import resident_models
+
+logger = logging.getLogger(__name__)
+
+
+def _pyttsx_class() -> type[AudioModule]:
+    from app.audio_module.pyttsx_module import PyttsxModule
+    return PyttsxModule
+
+
+def _kokoro_class() -> type[AudioModule]:
+    from app.audio_module.kokoro_module import KokoroAudio
+    return KokoroAudio
+
+
+def _chatterbox_class() -> type[AudioModule]:
+    from app.audio_module.chatterbox_module import ChatterboxModule
+    return ChatterboxModule
+
+
+def _stub_class() -> type[AudioModule]:
+    from app.audio_module.stub_module import StubAudio
+    return StubAudio
+
+
+# Engine classes are imported lazily so a worker only pays for the libraries it uses
+ENGINE_CLASSES: dict[str, Callable[[], type[AudioModule]]] = {
+    "pyttsx3": _pyttsx_class,
+    "kokoro": _kokoro_class,
+    "chatterbox": _chatterbox_class,
+}
+
+if settings.enable_stub_engine:
+    ENGINE_CLASSES["stub"] = _stub_class
+
+def is_supported_engine(engine: str) -> bool:
+    return engine in ENGINE_CLASSES
+
+
+def engine_class(engine: str) -> type[AudioModule]:
+    """Returns the module class for `engine` without loading its model."""
+    if engine not in ENGINE_CLASSES:
+        raise ValueError(f"Unsupported engine: {engine}")
+    return ENGINE_CLASSES[engine]()
+
+
+def served_remotely(name: str) -> bool:
+    """Whether `name` (an engine or "whisper") runs in the host's inference server instead of this process."""
+    return bool(settings.inference_server_socket) and name in {
+        n.strip() for n in settings.inference_server_models.split(",")
+    }
+
+
+def engine_default_subtype(engine: str) -> str:
+    """The engine's default soundfile subtype, without loading its model or libraries here."""
+    if served_remotely(engine):
+        return get_audio_engine(engine).default_subtype
+    return engine_class(engine).default_subtype
+
+
+def get_audio_engine(engine: str) -> AudioModule:
+    """
+    Returns the process-wide instance of `engine`, loading it on first use. Engines stay resident
+    so consecutive tasks skip the model cold start, until the memory watchdog evicts them.
+
+    With an inference server configured for this engine, returns a thin client of it instead.
+    """
+    if served_remotely(engine):
+        from app.services.inference.client import RemoteAudioEngine, get_inference_client
+        if not is_supported_engine(engine):
+            raise ValueError(f"Unsupported engine: {engine}")
+        return resident_models.get(f"remote:{engine}", lambda: RemoteAudioEngine(engine, get_inference_client()))
+    return load_audio_engine(engine)
+
+
+def load_audio_engine(engine: str) -> AudioModule:
+    """Like `get_audio_engine`, but always loads the model into this process."""
+    return resident_models.get(f"engine:{engine}", engine_class(engine))
+
+
+def get_subtitle_generator():
+    """Returns the process-wide Whisper subtitle generator, loading it on first use."""
+    if served_remotely("whisper"):
+        from app.services.inference.client import RemoteSubtitleGenerator, get_inference_client
+        return resident_models.get("remote:whisper", lambda: RemoteSubtitleGenerator(get_inference_client()))
+    return load_subtitle_generator()
+
+
+def load_subtitle_generator():
+    """Like `get_subtitle_generator`, but always loads Whisper into this process."""
+    from app.services.subtitles.subtitle_generator import SubtitleGenerator
+    return resident_models.get("whisper", SubtitleGenerator)
@@ -1,38 +1,34 @@
+import logging
 from typing import Dict, Optional
-from app.audio_module.audio_module import AudioModule, AudioResult
+from app.audio_module.audio_module import AudioModule
 from app.services.kokoro.kokoro import KokoroGenerationConfig, KokoroService
-from app.utils.audio_utils import get_audio_duration
+
+logger = logging.getLogger(__name__)
 
 
 class KokoroAudio(AudioModule):
-    def __init__(self, max_chars: int = 5000):
+    # ONNX Runtime sessions and the phoneme cache are thread-safe
+    concurrent_synthesis = True
+
+    def __init__(self, max_chars: int = 1000):
         super().__init__(max_chars=max_chars)
         self.client = KokoroService()
 
-    def generate_audio(
-        self,
-        text: str,
-        file_path: str,
-        voice_settings: Optional[Dict] = None,
-    ) -> AudioResult:
-        if voice_settings is None:
-            voice_settings = {}
+    def chunk_synthesizer(self, voice_settings: Optional[Dict]):
+        voice_settings = voice_settings or {}
 
         voice = voice_settings.get("voice", "am_michael")
         speed = voice_settings.get("speed", 1)
         lang = voice_settings.get("lang", "en-us")
 
-        print(f"KokoroAudio Settings")
-        print(f"voice: {voice}")
-        print(f"speed: {speed}")
-        print(f"lang: {lang}")
+        logger.debug(f"Kokoro chunk synthesizer: voice={voice}, speed={speed}, lang={lang}")
+
+        config = KokoroGenerationConfig(text="", voice=voice, speed=speed, lang=lang)
+
+        def synthesize(chunk_text: str):
+            return self.client.synthesize(config.model_copy(update={"text": chunk_text}))
 
-        config = KokoroGenerationConfig(text=text, voice=voice, speed=speed, lang=lang)
-        self.client.generate_audio(output_path=file_path, config=config)
-        return AudioResult(
-            file_path=file_path,
-            length=get_audio_duration(file_path),
-        )
+        return synthesize
 
     def get_voices(self) -> list[str]:
-        return KokoroService.get_voices()
+        return self.client.kokoro.get_voices()
@@ -1,16 +1,40 @@
 import platform
-import pyttsx3
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import soundfile as sf
 from typing import Optional, Dict
-from app.audio_module.audio_module import AudioModule, AudioResult
+from app.audio_module.audio_module import AudioModule, AudioResult, CancelCheck, ChunkCallback, ChunkCheckpoint, SynthesisCancelled
+from app.config import settings
+from app.services.espeak.espeak import EspeakGenerationConfig, EspeakService
+from app.utils.audio_processing import level_chunks
+from app.utils.timeline import TaskTimeline, span
 import logging
 
 logger = logging.getLogger(__name__)
 
 class PyttsxModule(AudioModule):
-    def __init__(self):
-        driver_name = None
+    """
+    The "pyttsx3" engine. On Linux it drives espeak-ng directly: chunks are rendered by parallel
+    espeak-ng processes into memory, which is much faster than pyttsx3's espeak driver and gives
+    real sample counts. Other platforms keep the pyttsx3 driver (nsss / sapi5), initialised once
+    per worker process.
+    """
+    # espeak-ng renders chunks faster than they could be checkpointed and read back
+    supports_checkpoints = False
+
+    def __init__(self, max_chars: int = 2000):
+        super().__init__(max_chars=max_chars)
+        self.engine = None
         system = platform.system().lower()
 
+        if system == 'linux' and shutil.which(settings.espeak_binary):
+            self.client = EspeakService()
+            self.executor = ThreadPoolExecutor(max_workers=settings.espeak_max_processes, thread_name_prefix="espeak")
+            return
+
+        import pyttsx3
+
         if system == 'darwin':
             driver_name = 'nsss'
         elif system == 'linux':
@@ -19,15 +43,63 @@ class PyttsxModule(AudioModule):
             driver_name = 'sapi5'
         else:
             raise ValueError(f"Unsupported platform: {system}")
-        
-        if driver_name is not None:
-            self.engine = pyttsx3.init(driverName=driver_name)
-        else:
-            logger.warning(f"No driver found for platform: {system}")
-            raise ValueError(f"No driver found for platform: {system}")
 
-    def generate_audio(self, text: str, output_path: str, engine_options: Optional[Dict] = None) -> AudioResult:
-        engine_options = engine_options or {}
+        self.engine = pyttsx3.init(driverName=driver_name)
+        self.voice_ids = [v.id for v in self.engine.getProperty('voices')]
+        self.supports_chunking = False
+
+    def chunk_synthesizer(self, voice_settings: Optional[Dict]):
+        if self.engine is not None:
+            return super().chunk_synthesizer(voice_settings)
+        voice_settings = voice_settings or {}
+        config = EspeakGenerationConfig(
+            text="",
+            voice=voice_settings.get("voice_id"),
+            rate=voice_settings.get("rate"),
+            volume=voice_settings.get("volume"),
+        )
+
+        def synthesize(chunk_text: str):
+            return self.client.synthesize(config.model_copy(update={"text": chunk_text}))
+
+        return synthesize
+
+    def generate_audio(self, text: str, output_path: str, engine_options: Optional[Dict] = None, post_processing: Optional[Dict] = None, cancel_check: Optional[CancelCheck] = None, checkpoint: Optional[ChunkCheckpoint] = None, chunk_callback: Optional[ChunkCallback] = None, timeline: Optional[TaskTimeline] = None, chunks: Optional[list[str]] = None) -> AudioResult:
+        if cancel_check and cancel_check():
+            raise SynthesisCancelled("Cancelled before synthesis started")
+        if self.engine is not None:
+            with span(timeline, "synthesis", chars=len(text)):
+                return self._generate_with_driver(text, output_path, engine_options or {}, post_processing)
+
+        synthesize = self.chunk_synthesizer(engine_options)
+        with span(timeline, "chunking"):
+            split_text = chunks or self.split_text(text)
+
+        def timed_synthesize(index: int, chunk_text: str):
+            with span(timeline, "synthesis", chunk=index, chars=len(chunk_text)):
+                return synthesize(chunk_text)
+
+        futures = [self.executor.submit(timed_synthesize, i, chunk_text) for i, chunk_text in enumerate(split_text)]
+        chunks = []
+        sample_rate = None
+        for i, future in enumerate(futures):
+            if cancel_check and cancel_check():
+                for pending in futures[i:]:
+                    pending.cancel()
+                raise SynthesisCancelled(f"Cancelled before chunk {i+1}/{len(split_text)}")
+            samples, sample_rate = future.result()
+            chunks.append(samples)
+            if chunk_callback:
+                chunk_callback(i, samples, sample_rate)
+
+        with span(timeline, "assembly"):
+            samples = np.concatenate(level_chunks(chunks, sample_rate, post_processing))
+        with span(timeline, "encoding"):
+            return self.write_audio(samples, sample_rate, output_path, post_processing)
+
+    def _generate_with_driver(self, text: str, output_path: str, engine_options: Dict, post_processing: Optional[Dict]) -> AudioResult:
+        # The driver renders the whole text in one blocking call, so the only cancellation
+        # boundary is the start
         rate = engine_options.get("rate")
         if rate:
             self.engine.setProperty('rate', int(rate))
@@ -36,29 +108,22 @@ class PyttsxModule(AudioModule):
             self.engine.setProperty('volume', float(volume))
 
         voice_id = engine_options.get("voice_id")
-        if voice_id:
-            logger.info(f"Setting voice to {voice_id}")
-            voices = self.engine.getProperty('voices')
-            found_voice = next((v for v in voices if v.id == voice_id), None)
-            if found_voice:
-                self.engine.setProperty('voice', found_voice.id)
-            else:
+        if voice_id not in self.voice_ids:
+            if voice_id:
                 logger.error(f"Voice ID '{voice_id}' not found. Using default.")
-                voices = self.engine.getProperty('voices')
-                self.engine.setProperty('voice', voices[0].id)
-        else:
-            logger.info("No voice ID provided. Using default.")
-            voices = self.engine.getProperty('voices')
-            self.engine.setProperty('voice', voices[0].id)
+            voice_id = self.voice_ids[0]
+        self.engine.setProperty('voice', voice_id)
 
         logger.info(f"Generating audio with pyttsx3. Output path: {output_path}")
-        logger.info(f"Engine options: {engine_options}")
-        logger.info(f"Text: {text}")
         self.engine.save_to_file(text, output_path)
         self.engine.runAndWait()
-        logger.info(f"Audio generated successfully. Output path: {output_path}")
-        return AudioResult(file_path=output_path, length=0)
+        if post_processing:
+            samples, sample_rate = sf.read(output_path, dtype="float32")
+            return self.write_audio(samples, sample_rate, output_path, post_processing)
+        info = sf.info(output_path)
+        return AudioResult(file_path=output_path, length=info.frames / info.samplerate, sample_rate=info.samplerate)
 
     def get_voices(self) -> list[str]:
-        voices = self.engine.getProperty('voices')
-        return [v.id for v in voices]
\ No newline at end of file
+        if self.engine is not None:
+            return list(self.voice_ids)
+        return list(self.client.voices)
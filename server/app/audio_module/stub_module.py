@@ -0,0 +1,40 @@
+import hashlib
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.audio_module.audio_module import AudioModule
+from app.config import settings
+
+
+class StubAudio(AudioModule):
+    """
+    Deterministic stand-in engine for load tests and pipeline checks. Each chunk becomes a tone
+    whose pitch is derived from the chunk text and whose length follows a normal speaking rate,
+    so the same text always yields the same samples. No model is loaded.
+    """
+
+    SAMPLE_RATE = 24000
+    SECONDS_PER_CHAR = 0.06
+    concurrent_synthesis = True
+
+    def __init__(self, max_chars: int = 200):
+        super().__init__(max_chars=max_chars)
+        self.latency_per_char = settings.stub_engine_seconds_per_char
+
+    def chunk_synthesizer(self, voice_settings: Optional[Dict]):
+        def synthesize(chunk_text: str):
+            digest = hashlib.sha256(chunk_text.encode("utf-8")).digest()
+            frequency = 110 + 2 * digest[0]
+            duration = max(len(chunk_text) * self.SECONDS_PER_CHAR, 0.1)
+            t = np.arange(int(duration * self.SAMPLE_RATE), dtype=np.float32) / self.SAMPLE_RATE
+            samples = (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+            if self.latency_per_char:
+                time.sleep(len(chunk_text) * self.latency_per_char)
+            return samples, self.SAMPLE_RATE
+
+        return synthesize
+
+    def get_voices(self) -> list[str]:
+        return ["stub"]
@@ -1,7 +1,15 @@
 # app/celery_worker.py
 import os
+import threading
 from celery import Celery
+from billiard.process import current_process
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init, worker_ready
 from app.config import settings
+from app.services.minio.text_store import ensure_text_expiry
+from app.services.redis.queue_aging import start_aging_sweeper
+from app.utils.cpu_affinity import log_cpu_layout, pin_pool_process
+from app.utils.memory import enforce_memory_budget, resident_models
+from app.utils.scheduling import task_queues, tier_queue
 
 celery_broker_url_str = str(settings.celery_broker_url) if settings.celery_broker_url else None
 celery_result_backend_str: str = "redis://localhost:6379/1"
@@ -26,4 +34,62 @@ celery_app.conf.update(
     task_serializer='json',
     result_serializer='json',
     accept_content=['json'],
-)
\ No newline at end of file
+    # Compresses message bodies only; the aging sweeper reads just the headers
+    task_compression=settings.task_compression,
+    # With acks_late, hand the task back to the queue if its worker process dies mid-job so
+    # the redelivered copy can resume from its chunk checkpoints.
+    task_reject_on_worker_lost=True,
+    broker_transport_options={
+        'visibility_timeout': settings.broker_visibility_timeout_seconds,
+        'queue_order_strategy': settings.scheduling_queue_order,
+    },
+    # Cost tiers (see app.utils.scheduling); anything sent without a queue counts as standard
+    task_queues=task_queues(),
+    task_default_queue=tier_queue("standard"),
+    # Don't let a process hold tasks it hasn't started: a short job reserved behind a long one waits for it
+    worker_prefetch_multiplier=settings.worker_prefetch_multiplier,
+    # Last resort behind the memory watchdog: replace a child that stays over this after a task (KiB)
+    worker_max_memory_per_child=settings.worker_max_memory_per_child_mb * 1024 if settings.worker_max_memory_per_child_mb else None,
+)
+
+
+@worker_init.connect
+def _report_cpu_layout(sender=None, **kwargs):
+    log_cpu_layout(getattr(sender, "concurrency", None))
+
+
+@worker_process_init.connect
+def _pin_pool_process(**kwargs):
+    # Before any task runs, so models load with thread pools sized to the process's cores
+    pin_pool_process(getattr(current_process(), "index", 0))
+
+
+@worker_ready.connect
+def _start_queue_aging(**kwargs):
+    start_aging_sweeper()
+
+
+@worker_ready.connect
+def _expire_stored_texts(**kwargs):
+    ensure_text_expiry()
+
+
+# Models a running task has fetched are leased to it, so the watchdog doesn't evict them mid-job.
+# A stack per thread: eagerly run subtasks nest inside their parent (and can share its id).
+_task_leases = threading.local()
+
+
+@task_prerun.connect
+def _lease_models_for_task(**kwargs):
+    leases = resident_models.leases()
+    leases.__enter__()
+    _task_leases.__dict__.setdefault("stack", []).append(leases)
+
+
+@task_postrun.connect
+def _enforce_memory_budget_after_task(**kwargs):
+    stack = getattr(_task_leases, "stack", None)
+    if stack:
+        stack.pop().__exit__(None, None, None)
+    # Between tasks is the cheapest moment to evict: nothing is mid-inference
+    enforce_memory_budget()
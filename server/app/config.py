@@ -1,6 +1,6 @@
 # app/config.py
 import os
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import DirectoryPath, AnyUrl, SecretStr
 import pathlib
@@ -21,10 +21,174 @@ class Settings(BaseSettings):
 
     celery_broker_url: AnyUrl = "redis://localhost:6379/0"
     celery_result_backend: str = "db+sqlite:///./celery_results.db"
+    redis_url: str = "redis://localhost:6379/2"
     
     output_audio_dir: DirectoryPath = pathlib.Path("./output_audio")
     elevenlabs_api_key: Optional[SecretStr] = None
 
+    # Lifetime of the presigned MinIO URLs handed out by /audio/{task_id}
+    audio_url_expiry_seconds: int = 900
+
+    # Submission coalescing: how long a payload hash / Idempotency-Key can point at a task that
+    # never reports completion, and how long an Idempotency-Key keeps answering after it does.
+    # A claimed task not handed to the broker within the grace period (the API died while
+    # submitting it) stops absorbing duplicates.
+    idempotency_inflight_ttl_seconds: int = 6 * 3600
+    idempotency_key_ttl_seconds: int = 3600
+    idempotency_enqueue_grace_seconds: int = 30
+
+    # Admission control: workers record per-engine throughput (chars/sec, exponentially smoothed)
+    # and the API tracks queued characters per engine. A submission is refused with 429 when the
+    # engine's backlog exceeds its limit in seconds of work (per-engine dict, JSON in the env).
+    admission_worker_slots: int = 1
+    admission_max_backlog_seconds: dict[str, float] = {}
+    admission_default_max_backlog_seconds: Optional[float] = None
+    admission_default_chars_per_second: dict[str, float] = {"kokoro": 150.0, "chatterbox": 15.0, "pyttsx3": 300.0}
+    admission_fallback_chars_per_second: float = 50.0
+    admission_throughput_smoothing: float = 0.2
+
+    # How long a cancellation request waits for a task that hasn't reached a chunk boundary yet
+    cancellation_ttl_seconds: int = 6 * 3600
+
+    # Multi-chunk jobs checkpoint every chunk to MinIO; a failing chunk is retried this many
+    # times, resuming from the checkpoints. Redis redelivers unacked tasks after the visibility
+    # timeout, so it has to exceed the longest job. A task delivered more than
+    # task_max_deliveries times (its worker process died on every attempt, e.g. an input that
+    # runs it out of memory) fails instead of going back to the queue.
+    chunk_max_retries: int = 3
+    chunk_retry_delay_seconds: int = 10
+    keep_chunk_checkpoints: bool = False
+    broker_visibility_timeout_seconds: int = 12 * 3600
+    task_max_deliveries: int = 3
+
+    # Captioned multi-chunk jobs transcribe each chunk on a background thread while the next
+    # one is synthesized; at most this many rendered chunks wait for the captioner.
+    pipelined_captions: bool = True
+    caption_pipeline_max_pending: int = 2
+
+    # Dialogue scripts: segments with the same engine and voice options are rendered by one
+    # task (keeping the voice warm), split into batches of at most this many characters so a
+    # long monologue still spreads across workers.
+    script_batch_max_chars: int = 3000
+
+    # Large texts: a submitted text longer than task_text_inline_max_chars is stored once in
+    # MinIO (texts/<task_id>.txt) and its task message carries only the object key and hash;
+    # chunks of a distributed job reference byte ranges of it. The task deletes it when the job
+    # finishes, and a bucket lifecycle rule expires any left behind (jobs revoked before they
+    # started) after task_text_expiry_days (0 = no rule). Texts longer than task_text_max_chars
+    # are refused. Task messages are compressed with task_compression (None = off).
+    task_text_inline_max_chars: int = 16 * 1024
+    task_text_max_chars: Optional[int] = 5_000_000
+    task_text_expiry_days: int = 7
+    task_compression: Optional[Literal["gzip", "zlib", "bzip2", "lzma"]] = "gzip"
+
+    # Task timelines: every result carries where the job spent its time. With an OTLP/HTTP traces
+    # endpoint set (a local collector, e.g. http://localhost:4318/v1/traces), each finished job
+    # is also exported there as a trace.
+    trace_export_url: Optional[str] = None
+    trace_service_name: str = "tts-worker"
+    trace_export_timeout_seconds: float = 2.0
+
+    # Length-aware scheduling: each job is costed at submission (synthesis time from the admission
+    # estimate, plus captioning) and routed to the interactive, standard or bulk queue, which its
+    # fan-out subtasks inherit. Workers take one task at a time per process and drain the queues
+    # in that order ("priority"), so short jobs never wait behind queued long ones. To keep long
+    # jobs from starving, the sweeper on each worker moves any job queued longer than
+    # scheduling_aging_seconds to the front of the next tier up (None disables it).
+    # "round_robin" serves the queues in turn instead, which is fair by count rather than by
+    # worker time. Run a worker with -Q <prefix>.interactive to reserve capacity for short jobs.
+    scheduling_queue_prefix: str = "tts"
+    scheduling_interactive_max_seconds: float = 15.0
+    scheduling_standard_max_seconds: float = 180.0
+    scheduling_caption_seconds_per_char: float = 0.005
+    scheduling_queue_order: Literal["priority", "round_robin"] = "priority"
+    scheduling_aging_seconds: Optional[float] = 300.0
+    scheduling_aging_interval_seconds: float = 10.0
+    scheduling_aging_batch: int = 100
+    worker_prefetch_multiplier: int = 1
+
+    # Kokoro model files and ONNX Runtime session tuning. Providers are comma-separated in
+    # priority order (empty = ONNX_PROVIDER or everything the runtime offers); thread counts of
+    # 0 leave the choice to ONNX Runtime.
+    kokoro_model_path: str = "app/services/kokoro/kokoro-v1.0.onnx"
+    kokoro_int8_model_path: str = "app/services/kokoro/kokoro-v1.0.int8.onnx"
+    kokoro_voices_path: str = "app/services/kokoro/voices-v1.0.bin"
+    kokoro_quantized: bool = False
+    onnx_providers: str = ""
+    onnx_intra_op_threads: int = 0
+    onnx_inter_op_threads: int = 0
+    onnx_graph_optimization_level: Literal["disable", "basic", "extended", "all"] = "all"
+    onnx_enable_cpu_mem_arena: bool = True
+    onnx_enable_mem_pattern: bool = True
+
+    # Kokoro phoneme cache: sentence-level G2P results kept in a per-process LRU (0 = off) and,
+    # optionally, shared between workers through Redis.
+    kokoro_phoneme_cache_size: int = 10000
+    kokoro_phoneme_cache_redis: bool = False
+    kokoro_phoneme_cache_ttl_seconds: int = 30 * 24 * 3600
+    kokoro_phoneme_cache_report_interval_seconds: Optional[float] = 300.0
+
+    # Kokoro micro-batching: with several synthesis threads per process (a threads pool or the
+    # inference server), chunks of at most batch_max_chars wait up to batch_window_ms for others
+    # (at most batch_max_size per batch) and each batch is rendered back to back on one thread
+    # instead of as competing inferences. 0 turns it off.
+    kokoro_batch_window_ms: float = 0.0
+    kokoro_batch_max_size: int = 8
+    kokoro_batch_max_chars: int = 300
+
+    # Chatterbox device (empty = cuda when available) and the CPU profile used on overflow nodes:
+    # torch thread count (0 = torch default), precision (bf16 autocast or dynamic int8 on the
+    # T3 transformer's Linear layers) and an optional warm-up generation at load time.
+    chatterbox_device: Optional[str] = None
+    chatterbox_cpu_threads: int = 0
+    chatterbox_cpu_precision: Literal["fp32", "bf16", "int8"] = "fp32"
+    chatterbox_warmup: bool = False
+    # Reference voices whose speaker conditioning stays prepared in each worker process
+    chatterbox_voice_cache_size: int = 8
+
+    # pyttsx3 engine on Linux: espeak-ng processes render chunks in parallel straight to memory
+    espeak_binary: str = "espeak-ng"
+    espeak_default_voice: str = "en-us"
+    espeak_max_processes: int = 4
+
+    # Worker memory: above the budget the watchdog evicts resident models no running task is using
+    # (least recently used first, and no further while evictions free nothing); above
+    # max_memory_per_child Celery replaces the process after its current task.
+    worker_memory_budget_mb: Optional[int] = None
+    worker_accelerator_memory_budget_mb: Optional[int] = None
+    worker_max_memory_per_child_mb: Optional[int] = None
+    memory_watchdog_interval_seconds: float = 5.0
+    memory_report_interval_seconds: float = 60.0
+
+    # CPU partitioning for several worker processes on one CPU host: the host's physical cores
+    # are split into worker_cpu_slots disjoint sets (0 = off) and each prefork pool process is
+    # pinned to one, with torch, ONNX Runtime, OpenMP and MKL sized to it (worker_cpu_threads,
+    # 0 = one thread per core in the set), instead of every process starting a thread per core.
+    # Slots count all processes on the host; a worker's processes take slots from
+    # worker_cpu_slot_offset, so give each worker sharing a host its own offset.
+    # Find a good layout with benchmarks/bench_cpu_layout.py.
+    worker_cpu_slots: int = 0
+    worker_cpu_slot_offset: int = 0
+    worker_cpu_threads: int = 0
+
+    # Shared inference server (python -m app.services.inference.server): with a socket path set,
+    # the listed models (engines and/or "whisper") run once per host in the server and workers
+    # call it, so worker concurrency doesn't multiply model memory. Engines that don't render
+    # chunk by chunk (pyttsx3) always run in the worker. The server preloads the models in
+    # inference_server_preload and runs up to max_concurrency requests at once on models that
+    # are thread-safe (one at a time on the others).
+    inference_server_socket: Optional[str] = None
+    inference_server_models: str = "kokoro,chatterbox,whisper"
+    inference_server_timeout_seconds: Optional[float] = 600.0
+    inference_server_preload: str = ""
+    inference_server_max_concurrency: int = 4
+    # Sample segments no worker mapped within this long are removed by the server
+    inference_server_orphan_timeout_seconds: float = 300.0
+
+    # Deterministic tone engine ("stub") for load tests and pipeline checks; never enable in production
+    enable_stub_engine: bool = False
+    stub_engine_seconds_per_char: float = 0.0
+
 
 
 settings = Settings()
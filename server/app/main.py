@@ -1,19 +1,36 @@
 # app/main.py
-import pathlib
-from fastapi import FastAPI, HTTPException, Request, status as http_status, Query
-from fastapi.responses import FileResponse
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from fastapi import FastAPI, File, Form, Header, HTTPException, Request, Response, UploadFile, status as http_status, Query
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.schemas import AudioGenerationRequest, TaskSubmissionResponse, TaskStatusResponse
+from minio.error import S3Error
+from pydantic import BaseModel, ValidationError
+from redis.exceptions import RedisError
+from app.schemas import AudioGenerationRequest, CaptionRenderRequest, ScriptGenerationRequest, TaskSubmissionResponse, TaskStatusResponse
 from app.celery_worker import celery_app
+from app.config import settings
+from app.services.minio.minio_client import minio_client, minio_presign_client, bucket_name
+from app.services.minio.text_store import delete_text, store_text
+from app.services.redis.idempotency import ClaimContended, IdempotencyKeyConflict, abandon_task, claim_task, coalescing_keys, mark_enqueued, never_enqueued, payload_fingerprint
+from app.services.redis.admission import Admission, AdmissionRejected, admit, release_admission
+from app.services.redis.cancellation import request_cancellation
+from app.services.subtitles.caption_renderer import CAPTION_MEDIA_TYPES, loads_word_timings, render_captions
+from app.utils.http_range import parse_range_header, etag_matches
+from app.utils.scheduling import enqueue_headers, queue_for_job
 from celery.result import AsyncResult
-from typing import Literal
+from typing import Literal, Optional
 from celery import states
 import uvicorn
+import json
 import logging
+import uuid
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+AUDIO_STREAM_CHUNK_SIZE = 64 * 1024
+
 app = FastAPI(
     title="Asynchronous AI Audio Generation API",
     description="Submit and manage AI audio generation tasks.",
@@ -32,7 +49,8 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["Accept-Ranges", "Content-Range", "Content-Length", "ETag", "Retry-After"]
 )
 
 
@@ -46,7 +64,8 @@ async def health_check():
     return {"status": "ok"}
 
 @app.get("/voices", tags=["Audio Generation"])
-async def get_voices(engine: Literal["kokoro", "chatterbox", "other"] = Query(..., description="The name of the engine to use for audio generation.")) -> list[str]:
+async def get_voices(engine: Literal["kokoro", "chatterbox", "stub", "other"] = Query(..., description="The name of the engine to use for audio generation.")) -> list[str]:
+    _reject_disabled_engine(engine)
     try:
         if engine == "chatterbox":
             from app.services.chatterbox.chatterbox import ChatterboxService
@@ -56,11 +75,16 @@ async def get_voices(engine: Literal["kokoro", "chatterbox", "other"] = Query(..
             from app.services.kokoro.kokoro import KokoroService
             voices = KokoroService.get_voices()
             return voices
+        if engine == "stub":
+            from app.audio_module.stub_module import StubAudio
+            return StubAudio().get_voices()
         else:
             raise HTTPException(
                 status_code=http_status.HTTP_400_BAD_REQUEST,
                 detail=f"Unsupported engine: {engine}"
             )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get voices: {e}", exc_info=True)
         raise HTTPException(
@@ -75,37 +99,170 @@ async def get_voices(engine: Literal["kokoro", "chatterbox", "other"] = Query(..
     status_code=http_status.HTTP_202_ACCEPTED,
     tags=["Audio Generation"]
 )
-async def submit_audio_generation(
+# Deliberately not async (like the script endpoint): FastAPI runs plain handlers in its threadpool,
+# so the Redis calls and broker publish in _submit_task don't stall this worker's event loop
+def submit_audio_generation(
     request: Request,
-    payload: AudioGenerationRequest
+    payload: AudioGenerationRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255, description="Client key that makes retries of this submission return the original task.")
 ):
+    return _submit_audio(request, payload, idempotency_key)
+
+
+@app.post(
+    "/generate/audio/upload",
+    response_model=TaskSubmissionResponse,
+    status_code=http_status.HTTP_202_ACCEPTED,
+    tags=["Audio Generation"]
+)
+def submit_audio_upload(
+    request: Request,
+    file: UploadFile = File(..., description="UTF-8 text to synthesize"),
+    options: str = Form(default="{}", description="The other AudioGenerationRequest fields, as JSON"),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255, description="Client key that makes retries of this submission return the original task.")
+):
+    """
+    Same as /generate/audio, with the text uploaded as a file part (multipart/form-data) instead
+    of a JSON string, for manuscripts too large to embed comfortably in a JSON body. The upload
+    is spooled to disk by the server as it streams in rather than held in memory.
+    """
+    # Never more than the longest accepted text could take (UTF-8 needs at most 4 bytes per character)
+    max_bytes = settings.task_text_max_chars * 4 if settings.task_text_max_chars else -1
+    raw = file.file.read(max_bytes + 1 if max_bytes > 0 else -1)
+    if 0 < max_bytes < len(raw):
+        raise HTTPException(
+            status_code=http_status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Text is longer than the {settings.task_text_max_chars} characters this server accepts"
+        )
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=f"The uploaded text is not valid UTF-8: {e}")
     try:
-        actual_backend_url = celery_app.conf.get('result_backend')
-        logger.info(f"Celery app result backend: {actual_backend_url}")
-        logger.info(f"Type of configured backend: {type(actual_backend_url)}")
-
-        actual_broker_url = celery_app.conf.get('broker_url')
-        logger.info(f"Celery app broker URL: {actual_broker_url}")
-        logger.info(f"Type of configured broker URL: {type(actual_broker_url)}")
-
-        caption_settings_args = payload.caption_settings.model_dump(mode='json') if payload.caption_settings else None
-        engine_options_args = payload.engine_options.model_dump(mode='json') if payload.engine_options else None
-
-        print(engine_options_args)
-
-        task = celery_app.send_task(
-            'app.tasks.generate_audio_task',
-            args=[
-                payload.engine,
-                payload.text,
-                engine_options_args,
-                payload.output_format,
-                caption_settings_args,
-                payload.webhook_url
-            ],
+        payload = AudioGenerationRequest.model_validate({**json.loads(options), "text": text})
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False, include_input=False)
         )
-        task_id = task.id
-        logger.info(f"Submitted task {task_id} for engine '{payload.engine}'.")
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"options must be a JSON object: {e}")
+    return _submit_audio(request, payload, idempotency_key)
+
+
+def _submit_audio(request: Request, payload: AudioGenerationRequest, idempotency_key: Optional[str]) -> TaskSubmissionResponse:
+    _reject_disabled_engine(payload.engine)
+    _reject_text_length(len(payload.text))
+    caption_settings_args = payload.caption_settings.model_dump(mode='json') if payload.caption_settings else None
+    engine_options_args = payload.engine_options.model_dump(mode='json') if payload.engine_options else None
+    post_processing_args = payload.post_processing.model_dump(mode='json') if payload.post_processing else None
+
+    return _submit_task(
+        request,
+        payload,
+        idempotency_key,
+        engine=payload.engine,
+        chars=len(payload.text),
+        captioned=payload.caption_settings is not None,
+        task_name='app.tasks.generate_audio_task',
+        args=[
+            payload.engine,
+            payload.text,
+            engine_options_args,
+            payload.output_format,
+            caption_settings_args,
+            payload.webhook_url
+        ],
+        kwargs={
+            "post_processing": post_processing_args,
+            "distributed": payload.distributed,
+            "base_task_id": payload.base_task_id,
+            "editable": payload.editable,
+        },
+        text_arg=1,
+    )
+
+
+@app.post(
+    "/generate/script",
+    response_model=TaskSubmissionResponse,
+    status_code=http_status.HTTP_202_ACCEPTED,
+    tags=["Audio Generation"]
+)
+def submit_script_generation(
+    request: Request,
+    payload: ScriptGenerationRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255, description="Client key that makes retries of this submission return the original task.")
+):
+    """
+    Renders a multi-voice script (dialogue, podcast, game scene) into one audio file. Segments
+    are synthesized in parallel across workers, grouped by voice, and joined in order with gaps.
+    """
+    chars_by_engine = {}
+    for segment in payload.segments:
+        _reject_disabled_engine(segment.engine)
+        chars_by_engine[segment.engine] = chars_by_engine.get(segment.engine, 0) + len(segment.text)
+
+    # Admission tracks one engine per task: charge the whole script to the engine doing most of it
+    return _submit_task(
+        request,
+        payload,
+        idempotency_key,
+        engine=max(chars_by_engine, key=chars_by_engine.get),
+        chars=sum(chars_by_engine.values()),
+        captioned=payload.caption_settings is not None,
+        task_name='app.tasks.generate_script_task',
+        args=[
+            [segment.model_dump(mode='json') for segment in payload.segments],
+            payload.gap_ms,
+            payload.output_format,
+            payload.caption_settings.model_dump(mode='json') if payload.caption_settings else None,
+            payload.webhook_url
+        ],
+        kwargs={"post_processing": payload.post_processing.model_dump(mode='json') if payload.post_processing else None},
+    )
+
+
+def _submit_task(request: Request, payload: BaseModel, idempotency_key: Optional[str], engine: str, chars: int, captioned: bool, task_name: str, args: list, kwargs: dict, text_arg: Optional[int] = None) -> TaskSubmissionResponse:
+    """
+    Coalesces, admits and enqueues a submission on the queue for its cost tier; shared by the
+    generation endpoints. A text at position `text_arg` of `args` longer than
+    task_text_inline_max_chars is stored in MinIO and replaced by a `text_ref` kwarg.
+    """
+    base_url = str(request.base_url)
+
+    try:
+        task_id = str(uuid.uuid4())
+        existing_task_id = _claim_submission(payload, idempotency_key, task_id)
+        if existing_task_id:
+            logger.info(f"Attached duplicate submission to in-flight task {existing_task_id}.")
+            return TaskSubmissionResponse(
+                task_id=existing_task_id,
+                status_url=f"{base_url}tasks/{existing_task_id}",
+                deduplicated=True
+            )
+
+        admission = _admit_submission(engine, chars, task_id)
+
+        text_ref = None
+        try:
+            # Stored only once the submission is admitted, so duplicates and rejections upload nothing
+            if text_arg is not None and len(args[text_arg]) > settings.task_text_inline_max_chars:
+                text_ref = store_text(task_id, args[text_arg])
+                args = [None if i == text_arg else arg for i, arg in enumerate(args)]
+                kwargs = {**kwargs, "text_ref": text_ref}
+            queue = queue_for_job(engine, chars, captioned, admission)
+            celery_app.send_task(task_name, args=args, kwargs=kwargs, task_id=task_id, queue=queue, headers=enqueue_headers())
+            _mark_enqueued(task_id)
+        except Exception:
+            _release_submission(task_id)
+            if text_ref:
+                _delete_stored_text(text_ref)
+            raise
+        logger.info(f"Submitted task {task_id} for engine '{engine}'.")
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.error(f"Failed to submit task to Celery: {e}", exc_info=True)
@@ -114,10 +271,96 @@ async def submit_audio_generation(
             detail=f"Failed to submit task to queue: {e}"
         )
 
-    base_url = str(request.base_url)
     status_url = f"{base_url}tasks/{task_id}"
 
-    return TaskSubmissionResponse(task_id=task_id, status_url=status_url)
+    return TaskSubmissionResponse(
+        task_id=task_id,
+        status_url=status_url,
+        estimated_start_at=datetime.fromtimestamp(admission.estimated_start_at, timezone.utc) if admission else None,
+        estimated_completion_at=datetime.fromtimestamp(admission.estimated_completion_at, timezone.utc) if admission else None
+    )
+
+
+def _reject_disabled_engine(engine: str) -> None:
+    if engine == "stub" and not settings.enable_stub_engine:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="The stub engine is disabled on this server"
+        )
+
+
+def _reject_text_length(chars: int) -> None:
+    if settings.task_text_max_chars and chars > settings.task_text_max_chars:
+        raise HTTPException(
+            status_code=http_status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Text is longer than the {settings.task_text_max_chars} characters this server accepts"
+        )
+
+
+def _delete_stored_text(text_ref: dict) -> None:
+    try:
+        delete_text(text_ref)
+    except Exception as e:
+        logger.warning(f"Failed to delete stored text {text_ref['object']}: {e}")
+
+
+def _admit_submission(engine: str, chars: int, task_id: str) -> Optional[Admission]:
+    """Reserves backlog for the task, or raises 429 with Retry-After when the engine is saturated."""
+    try:
+        return admit(engine, task_id, chars)
+    except AdmissionRejected as e:
+        logger.info(f"Rejected submission for engine '{engine}': {e}")
+        _release_submission(task_id)
+        raise HTTPException(
+            status_code=http_status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{e}; retry in {e.retry_after}s",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RedisError as e:
+        logger.warning(f"Admission control unavailable, enqueueing without an estimate: {e}")
+        return None
+
+
+def _claim_submission(payload: BaseModel, idempotency_key: Optional[str], task_id: str) -> Optional[str]:
+    """Returns the in-flight task this submission duplicates, or None after claiming it for `task_id`."""
+    fingerprint = payload_fingerprint(payload.model_dump(mode='json'))
+    try:
+        return claim_task(coalescing_keys(fingerprint, idempotency_key), task_id, fingerprint, is_stale=_is_unusable_task)
+    except IdempotencyKeyConflict as e:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ClaimContended as e:
+        logger.info(f"Refusing submission while its key is contended: {e}")
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail="An identical submission is being made concurrently; retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except RedisError as e:
+        # Coalescing is an optimisation; never refuse work because it is unavailable
+        logger.warning(f"Submission coalescing unavailable, enqueueing without it: {e}")
+        return None
+
+
+def _release_submission(task_id: str) -> None:
+    """Undoes the claim and admission of a submission that was rejected or could not be enqueued."""
+    try:
+        abandon_task(task_id)
+        release_admission(task_id)
+    except RedisError as e:
+        logger.warning(f"Failed to release submission keys for task {task_id}: {e}")
+
+
+def _mark_enqueued(task_id: str) -> None:
+    try:
+        mark_enqueued(task_id)
+    except RedisError as e:
+        logger.warning(f"Failed to mark task {task_id} as enqueued: {e}")
+
+
+def _is_unusable_task(task_id: str) -> bool:
+    state = AsyncResult(task_id, app=celery_app).state
+    # PENDING is also what a task ID that was claimed but never sent reports, forever
+    return state in (states.FAILURE, states.REVOKED) or (state == states.PENDING and never_enqueued(task_id))
 
 
 @app.get(
@@ -132,10 +375,13 @@ async def get_task_status(task_id: str):
     current_status = task_result.status
     result_data = None
     error_info = None
+    timeline = None
 
     if task_result.successful():
         current_status = states.SUCCESS
         result_data = task_result.get()
+        if isinstance(result_data, dict):
+            timeline = result_data.pop("timeline", None)
         logger.debug(f"Task {task_id} succeeded. Result: {result_data}")
     elif task_result.failed():
         current_status = states.FAILURE
@@ -159,12 +405,105 @@ async def get_task_status(task_id: str):
         task_id=task_id,
         status=current_status,
         result=result_data,
-        error=error_info
+        error=error_info,
+        timeline=timeline
     )
 
 @app.get("/audio/{task_id}", tags=["Audio Generation"])
-async def download_audio_file(task_id: str):
-    logger.info(f"Download request for task_id: {task_id}")
+def download_audio_file(
+    task_id: str,
+    request: Request,
+    stream: bool = Query(False, description="Stream the audio through the API (supports Range and If-None-Match) instead of redirecting to a presigned MinIO URL.")
+):
+    """
+    Serves the generated audio for a finished task.
+
+    - By default, replies with a 307 redirect to a short-lived presigned MinIO URL, so players
+      range-request the object store directly and the API never holds the file.
+    - With `stream=true`, proxies the object from MinIO, honouring `Range`, `If-Range` and
+      `If-None-Match` so clients can seek and resume without re-downloading.
+    """
+    logger.info(f"Download request for task_id: {task_id} (stream={stream})")
+    result_data = _successful_result(task_id)
+    object_name = _audio_object_name(result_data)
+    if object_name is None:
+        logger.error(f"Task {task_id} succeeded but result format is unexpected: {result_data}")
+        raise HTTPException(
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Task completed but result data is missing the audio object."
+        )
+
+    if not stream:
+        presigned_url = minio_presign_client.presigned_get_object(
+            bucket_name,
+            object_name,
+            expires=timedelta(seconds=settings.audio_url_expiry_seconds),
+        )
+        return RedirectResponse(presigned_url, status_code=http_status.HTTP_307_TEMPORARY_REDIRECT)
+
+    try:
+        stat = minio_client.stat_object(bucket_name, object_name)
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchObject"):
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Audio for task {task_id} no longer exists in storage."
+            )
+        raise
+
+    etag = f'"{stat.etag}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.audio_url_expiry_seconds}",
+    }
+    if stat.last_modified:
+        headers["Last-Modified"] = format_datetime(stat.last_modified, usegmt=True)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=http_status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # A stale If-Range means the client's partial copy is outdated: send the whole object.
+    if_range = request.headers.get("if-range")
+    range_header = request.headers.get("range") if not if_range or if_range == etag else None
+
+    try:
+        byte_range = parse_range_header(range_header, stat.size)
+    except ValueError:
+        raise HTTPException(
+            status_code=http_status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=f"Requested range not satisfiable: {range_header}",
+            headers={"Content-Range": f"bytes */{stat.size}"},
+        )
+
+    if byte_range is None:
+        start, end = 0, stat.size - 1
+        status_code = http_status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = http_status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    object_response = minio_client.get_object(bucket_name, object_name, offset=start, length=end - start + 1)
+
+    def iter_object():
+        try:
+            yield from object_response.stream(AUDIO_STREAM_CHUNK_SIZE)
+        finally:
+            object_response.close()
+            object_response.release_conn()
+
+    return StreamingResponse(
+        iter_object(),
+        status_code=status_code,
+        media_type=stat.content_type or "audio/wav",
+        headers=headers,
+    )
+
+
+def _successful_result(task_id: str):
+    """Returns the result of a finished task, or raises 409 while it runs and 404 if it failed."""
     task_result = AsyncResult(task_id, app=celery_app)
 
     if not task_result.ready():
@@ -177,25 +516,63 @@ async def download_audio_file(task_id: str):
     if task_result.status != states.SUCCESS:
         logger.error(f"Task {task_id} did not complete successfully. Status: {task_result.status}")
         error_detail = f"Task failed (Status: {task_result.status})."
-        error_detail += f" Error: {task_result.info.get('exc_type', '')} - {task_result.info.get('exc_message', '')}"
+        if isinstance(task_result.info, dict):
+            error_detail += f" Error: {task_result.info.get('exc_type', '')} - {task_result.info.get('exc_message', '')}"
+        elif task_result.info is not None:
+            error_detail += f" Error: {type(task_result.info).__name__} - {task_result.info}"
 
         raise HTTPException(
             status_code=http_status.HTTP_404_NOT_FOUND, # Or 500 depending on how you want to report failures
             detail=error_detail
         )
     
-    result_data = task_result.get()
-    if not isinstance(result_data, dict) or "output_path" not in result_data:
-        logger.error(f"Task {task_id} succeeded but result format is unexpected: {result_data}")
+    return task_result.get()
+
+
+@app.post("/tasks/{task_id}/captions", tags=["Audio Generation"])
+def render_task_captions(task_id: str, payload: CaptionRenderRequest):
+    """
+    Re-renders a finished task's captions as ASS, SRT or WebVTT with new caption settings.
+    Uses the word timings stored with the task, so neither the audio nor the Whisper model
+    is touched.
+    """
+    result_data = _successful_result(task_id)
+    timings_object = result_data.get("word_timings_object") if isinstance(result_data, dict) else None
+    if not timings_object:
         raise HTTPException(
-            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Task completed but result data is missing the file path."
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Task has no word timings; submit it with caption_settings to enable captions."
         )
-    
-    file_path_str = result_data["output_path"]
-    file_path = pathlib.Path(file_path_str)
 
-    return FileResponse(path=file_path, media_type="audio", filename=file_path.name)
+    response = None
+    try:
+        response = minio_client.get_object(bucket_name, timings_object)
+        timings = loads_word_timings(response.read())
+    except S3Error as e:
+        logger.error(f"Failed to read word timings {timings_object} for task {task_id}: {e}")
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Word timings not found in storage.")
+    finally:
+        if response is not None:
+            response.close()
+            response.release_conn()
+
+    captions = render_captions(timings, payload.caption_settings.model_dump(), payload.format)
+    return Response(
+        content=captions,
+        media_type=CAPTION_MEDIA_TYPES[payload.format],
+        headers={"Content-Disposition": f'inline; filename="{task_id}.{payload.format}"'}
+    )
+
+
+def _audio_object_name(result_data) -> Optional[str]:
+    if not isinstance(result_data, dict):
+        return None
+    if result_data.get("output_object"):
+        return result_data["output_object"]
+    # Results produced before output_object was recorded only carry the public URL
+    if result_data.get("output_url"):
+        return result_data["output_url"].rsplit("/", 1)[-1]
+    return None
 
 
 @app.delete("/tasks/{task_id}", response_model=TaskStatusResponse, status_code=http_status.HTTP_200_OK, tags=["Task Management"])
@@ -205,9 +582,11 @@ async def stop_task(
     signal: str = Query("TERM", description="Signal to send if terminate=true (e.g., TERM, KILL). Use KILL with extreme caution.")
 ):
     """
-    Revokes or terminates a Celery task.
+    Revokes, cancels or terminates a Celery task.
 
-    - By default (`terminate=false`), prevents the task from running if pending.
+    - By default (`terminate=false`), prevents the task from running if pending and asks a *running*
+      task to stop cooperatively: the worker aborts at the next chunk boundary, cleans up its
+      partial output and keeps its models loaded for the next job.
     - If `terminate=true`, attempts to stop a *currently running* task by sending a signal (default SIGTERM).
       This works best with the 'prefork' pool and is not guaranteed to succeed immediately or cleanly.
     - Using `terminate=true` with `signal=KILL` forcefully terminates the task process, risking data loss.
@@ -221,12 +600,13 @@ async def stop_task(
          )
 
     try:
+        request_cancellation(task_id)
         celery_app.control.revoke(task_id, terminate=terminate, signal=signal.upper())
         message = f"Revoke command sent for task {task_id}."
         if terminate:
             message += f" Termination requested with signal {signal.upper()}."
         else:
-            message += " Task will not be executed if still pending."
+            message += " Task will not be executed if still pending, or will stop at the next chunk if running."
 
         logger.info(message)
 
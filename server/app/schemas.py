@@ -1,4 +1,5 @@
 # app/schemas.py
+from datetime import datetime
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Literal, Dict, Any, Optional, Union
 
@@ -30,22 +31,64 @@ class CaptionSettings(BaseModel):
     playres_y: int
     timer: int
 
+class CaptionRenderRequest(BaseModel):
+    caption_settings: CaptionSettings = Field(..., description="Caption layout and style to render with")
+    format: Literal["ass", "srt", "vtt"] = Field(default="ass", description="Caption file format")
+
+class AudioPostProcessing(BaseModel):
+    normalize: Optional[Literal["peak", "loudness"]] = Field(default=None, description="Peak normalization, or gated-RMS loudness levelling applied per chunk and to the whole output")
+    target_peak_db: float = Field(default=-1.0, le=0, description="Peak level in dBFS for peak normalization; also the ceiling for loudness normalization")
+    target_loudness_db: float = Field(default=-20.0, le=0, description="Target loudness in dBFS (gated RMS) for loudness normalization")
+    trim_silence: bool = Field(default=False, description="Trim leading and trailing silence")
+    silence_threshold_db: float = Field(default=-50.0, le=0, description="Level in dBFS below which audio counts as silence")
+    silence_padding_ms: int = Field(default=100, ge=0, description="Silence to keep around speech when trimming")
+    sample_rate: Optional[int] = Field(default=None, ge=8000, le=192000, description="Resample the output to this rate")
+    bit_depth: Optional[Literal[16, 24, 32]] = Field(default=None, description="Output bit depth (32 = float); defaults to the engine's native format")
+    dither: bool = Field(default=False, description="Apply TPDF dither when quantizing to 16 or 24 bit")
+
+EngineName = Literal["kokoro", "chatterbox", "pyttsx3", "stub"]
+
 class AudioGenerationRequest(BaseModel):
-    engine: Literal["kokoro", "chatterbox", "pyttsx3"]
+    engine: EngineName = Field(..., description='TTS engine; "stub" is only accepted when the server runs with ENABLE_STUB_ENGINE')
     text: str = Field(..., min_length=1, description="Text to synthesize")
     engine_options: Union[KokoroOptions, EngineOptions] = Field(default=None, description="Engine-specific options (e.g., voice_id, rate)")
     output_format: Literal["wav"] = Field(default="wav", description="Desired output audio format") # TODO: Add more formats
     caption_settings: Optional[CaptionSettings] = Field(default=None, description="Caption settings for the audio")
     webhook_url: Optional[str] = Field(default=None, description="Webhook URL to call upon task completion")
+    post_processing: Optional[AudioPostProcessing] = Field(default=None, description="Post-processing applied to the samples before the audio is stored")
+    distributed: bool = Field(default=False, description="Synthesize the chunks of long texts in parallel across workers and merge them")
+    editable: bool = Field(default=False, description="Keep this job's chunk audio in MinIO so a later revision of the text can be rendered incrementally with base_task_id")
+    base_task_id: Optional[str] = Field(default=None, max_length=64, description="Editable (or revision) task this text is a revision of: chunks it rendered with the same engine and options are reused, and only changed chunks are synthesized. The revision's chunks are kept too")
+
+class ScriptSegment(BaseModel):
+    engine: EngineName = Field(..., description="TTS engine for this segment")
+    text: str = Field(..., min_length=1, description="Text to synthesize")
+    engine_options: Union[KokoroOptions, EngineOptions] = Field(default=None, description="Engine-specific options, including the voice")
+    gap_after_ms: Optional[int] = Field(default=None, ge=0, le=60000, description="Silence after this segment; defaults to the script's gap_ms")
+
+class ScriptGenerationRequest(BaseModel):
+    segments: list[ScriptSegment] = Field(..., min_length=1, max_length=2000, description="Segments in playback order")
+    gap_ms: int = Field(default=300, ge=0, le=60000, description="Silence between consecutive segments")
+    output_format: Literal["wav"] = Field(default="wav", description="Desired output audio format")
+    caption_settings: Optional[CaptionSettings] = Field(default=None, description="Caption settings for the combined captions")
+    webhook_url: Optional[str] = Field(default=None, description="Webhook URL to call upon task completion")
+    post_processing: Optional[AudioPostProcessing] = Field(default=None, description="Post-processing applied to the assembled audio (loudness levelling is per segment)")
 
 
 class TaskSubmissionResponse(BaseModel):
     task_id: str = Field(..., description="Unique ID of the submitted Celery task")
     status_url: HttpUrl = Field(..., description="URL to check the status of the task")
+    deduplicated: bool = Field(default=False, description="True if this submission was attached to an identical in-flight task instead of being enqueued again")
+    estimated_start_at: Optional[datetime] = Field(default=None, description="Estimated time a worker picks the task up, from the engine's queued work and measured throughput")
+    estimated_completion_at: Optional[datetime] = Field(default=None, description="Estimated time the audio is ready")
 
 
 class TaskStatusResponse(BaseModel):
     task_id: str
     status: str = Field(..., description="Current status of the task (e.g., PENDING, STARTED, SUCCESS, FAILURE)")
     result: Union[Dict[str, Any], str, None] = Field(default=None, description="Result of the task if successful (e.g., {'output_path': ...}) or error details")
-    error: Optional[str] = Field(default=None, description="Error message if the task failed")
\ No newline at end of file
+    error: Optional[str] = Field(default=None, description="Error message if the task failed")
+    timeline: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Where a finished task spent its time: text and audio length, wall and worker seconds, real-time factor of synthesis, seconds per stage and the individual spans"
+    )
@@ -1,12 +1,17 @@
 import os
+import numpy as np
 import torch
 import time
 import torchaudio as ta
+from collections import OrderedDict
+from contextlib import nullcontext
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from chatterbox.tts import ChatterboxTTS
 import logging
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,44 +22,107 @@ class ChatterboxGenerationConfig(BaseModel):
     cfg_weight: Optional[float] = Field(0.3, ge=0.2, le=1.0)
     temperature: Optional[float] = Field(0.8, ge=0.05, le=5.0)
 
+class ChatterboxRuntimeConfig(BaseModel):
+    """Device and CPU performance profile for the Chatterbox model."""
+    device: Optional[str] = None  # None picks cuda when available, else cpu
+    cpu_threads: int = 0  # 0 keeps torch's default (one per physical core)
+    cpu_precision: Literal["fp32", "bf16", "int8"] = "fp32"
+    warmup: bool = False
+
+    @classmethod
+    def from_settings(cls) -> "ChatterboxRuntimeConfig":
+        return cls(
+            device=settings.chatterbox_device,
+            cpu_threads=settings.chatterbox_cpu_threads,
+            cpu_precision=settings.chatterbox_cpu_precision,
+            warmup=settings.chatterbox_warmup,
+        )
+
+
 class ChatterboxService:
     VOICES_DIR = os.path.join(os.path.dirname(__file__), "voices")
+    WARMUP_TEXT = "Warming up the speech model."
 
-    def __init__(self) -> None:
+    def __init__(self, runtime: Optional[ChatterboxRuntimeConfig] = None) -> None:
         logger.info("Loading Chatterbox model...")
         start_time = time.time()
+        self.runtime = runtime or ChatterboxRuntimeConfig.from_settings()
 
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = self.runtime.device or ("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Using device: {self.device}")
+        if self.device == "cpu" and self.runtime.cpu_threads:
+            torch.set_num_threads(self.runtime.cpu_threads)
         self.model = ChatterboxTTS.from_pretrained(device=self.device)
+        # Speaker conditioning of the built-in voice, and of reference clips already prepared
+        self._default_conds = self.model.conds
+        self._voice_conds: OrderedDict[str, object] = OrderedDict()
+        if self.device == "cpu" and self.runtime.cpu_precision == "int8":
+            self._quantize_dynamic()
 
         end_time = time.time()
         load_time = end_time - start_time
-        logger.info(f"Loaded Chatterbox model in {load_time:.2f} seconds")
+        logger.info(f"Loaded Chatterbox model in {load_time:.2f} seconds ({self._profile_name()})")
 
         self.voices_dir = os.path.join(os.path.dirname(__file__), "voices")
 
-    def generate(self, output_path: str, generation_config: ChatterboxGenerationConfig):
-        with torch.no_grad():
+        if self.runtime.warmup:
+            start_time = time.time()
+            self.synthesize(ChatterboxGenerationConfig(text=self.WARMUP_TEXT))
+            logger.info(f"Chatterbox warm-up generation took {time.time() - start_time:.2f} seconds")
+
+    def _profile_name(self) -> str:
+        if self.device != "cpu":
+            return self.device
+        return f"cpu, {torch.get_num_threads()} threads, {self.runtime.cpu_precision}"
+
+    def _quantize_dynamic(self):
+        # The autoregressive T3 transformer dominates CPU time and is almost entirely Linear
+        # layers; the S3Gen vocoder is convolutional and stays in fp32.
+        torch.ao.quantization.quantize_dynamic(self.model.t3, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    def _precision_context(self):
+        if self.device == "cpu" and self.runtime.cpu_precision == "bf16":
+            return torch.autocast("cpu", dtype=torch.bfloat16)
+        return nullcontext()
+
+    def synthesize(self, generation_config: ChatterboxGenerationConfig) -> tuple[np.ndarray, int]:
+        """Generates one chunk and returns it as mono float32 samples with the model's sample rate."""
+        with torch.inference_mode(), self._precision_context():
+            self._use_voice(generation_config.audio_prompt_path, generation_config.exaggeration)
             wav = self.model.generate(
                 generation_config.text, 
-                audio_prompt_path=generation_config.audio_prompt_path, 
                 exaggeration=generation_config.exaggeration, 
                 cfg_weight=generation_config.cfg_weight, 
                 temperature=generation_config.temperature
             )
 
-        ta.save(output_path, wav, self.model.sr)
-        logger.info(f"Saved generated audio to {output_path}")
+        # The CUDA cache is kept warm between chunks; the worker's memory watchdog releases it
+        # when the process goes over budget.
+        samples = wav.squeeze(0).detach().float().cpu().numpy()
+        return samples, self.model.sr
 
-        if (self.device == "cuda"):
-            if hasattr(self.model, 'clear_cache'):
-                self.model.clear_cache()
-                logger.info(f"Cleared cache after generation using {self.model.clear_cache.__name__}")
+    def _use_voice(self, audio_prompt_path: Optional[str], exaggeration: float):
+        """
+        Points the model at the conditioning for a reference clip. ChatterboxTTS.generate would
+        re-encode the clip on every call; here each clip is prepared once and kept (LRU) so
+        consecutive chunks and segments in the same voice skip it.
+        """
+        if audio_prompt_path is None:
+            self.model.conds = self._default_conds
+            return
+        conds = self._voice_conds.get(audio_prompt_path)
+        if conds is None:
+            self.model.prepare_conditionals(audio_prompt_path, exaggeration=exaggeration)
+            conds = self._voice_conds[audio_prompt_path] = self.model.conds
+            while len(self._voice_conds) > max(settings.chatterbox_voice_cache_size, 1):
+                self._voice_conds.popitem(last=False)
+        self._voice_conds.move_to_end(audio_prompt_path)
+        self.model.conds = conds
 
-            del wav
-            torch.cuda.empty_cache()
-            logger.info(f"Cleaned up GPU VRAM after generation")
+    def generate(self, output_path: str, generation_config: ChatterboxGenerationConfig):
+        samples, sample_rate = self.synthesize(generation_config)
+        ta.save(output_path, torch.from_numpy(samples).unsqueeze(0), sample_rate)
+        logger.info(f"Saved generated audio to {output_path}")
 
     @staticmethod
     def get_voices() -> list[str]:
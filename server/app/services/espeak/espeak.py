@@ -0,0 +1,99 @@
+import logging
+import shutil
+import subprocess
+import time
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EspeakVoice(BaseModel):
+    id: str  # voice file identifier, e.g. "gmw/en-US" (what pyttsx3's espeak driver reports as the ID)
+    language: str
+    name: str
+
+
+class EspeakGenerationConfig(BaseModel):
+    text: str
+    voice: Optional[str] = None
+    rate: Optional[int] = None  # words per minute
+    volume: Optional[float] = None  # 0.0 - 1.0, as in pyttsx3
+
+
+class EspeakService:
+    """
+    Renders text with the espeak-ng command line tool, reading the WAV it writes to stdout
+    straight into memory. Each call is a short-lived process, so calls are independent and
+    can run in parallel from a thread pool without sharing driver state.
+    """
+
+    def __init__(self, binary: Optional[str] = None) -> None:
+        self.binary = shutil.which(binary or settings.espeak_binary)
+        if self.binary is None:
+            raise FileNotFoundError(f"espeak-ng binary not found: {binary or settings.espeak_binary}")
+        self.voices = self._list_voices()
+        logger.info(f"Using {self.binary} with {len(self.voices)} voices")
+
+    def _list_voices(self) -> dict[str, EspeakVoice]:
+        output = subprocess.run([self.binary, "--voices"], capture_output=True, check=True, text=True).stdout
+        voices = {}
+        # Columns: Pty Language Age/Gender VoiceName File Other Languages
+        for line in output.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) >= 5:
+                voices[fields[4]] = EspeakVoice(id=fields[4], language=fields[1], name=fields[3])
+        return voices
+
+    def resolve_voice(self, voice: Optional[str]) -> str:
+        """Maps a voice ID, language code or name to an argument for `-v`, falling back to the default."""
+        if not voice:
+            return settings.espeak_default_voice
+        if voice in self.voices:
+            return self.voices[voice].language
+        if any(voice in (v.language, v.name) for v in self.voices.values()):
+            return voice
+        logger.error(f"Voice '{voice}' not found. Using default.")
+        return settings.espeak_default_voice
+
+    def synthesize(self, config: EspeakGenerationConfig) -> tuple[np.ndarray, int]:
+        command = [self.binary, "--stdout", "--stdin", "-v", self.resolve_voice(config.voice)]
+        if config.rate:
+            command += ["-s", str(int(config.rate))]
+        if config.volume is not None:
+            command += ["-a", str(int(config.volume * 100))]
+
+        start_time = time.time()
+        completed = subprocess.run(command, input=config.text.encode("utf-8"), capture_output=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"espeak-ng exited with {completed.returncode}: {completed.stderr.decode(errors='replace').strip()}")
+        samples, sample_rate = decode_wav(completed.stdout)
+        logger.debug(f"espeak-ng rendered {len(config.text)} chars in {time.time() - start_time:.3f}s")
+        return samples, sample_rate
+
+
+def decode_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """
+    Decodes the 16-bit mono WAV espeak-ng writes to stdout. When streaming it can't seek back to
+    fill in the RIFF and data sizes, so the data chunk is taken to run to the end of the output.
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("espeak-ng did not produce WAV output")
+    position, sample_rate = 12, None
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        chunk_size = int.from_bytes(data[position + 4:position + 8], "little")
+        if chunk_id == b"fmt ":
+            sample_rate = int.from_bytes(data[position + 12:position + 16], "little")
+        elif chunk_id == b"data":
+            pcm = data[position + 8:]
+            pcm = pcm[:len(pcm) // 2 * 2]
+            if sample_rate is None:
+                raise ValueError("WAV data chunk precedes its format chunk")
+            return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0, sample_rate
+        position += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV output has no data chunk")
@@ -0,0 +1,137 @@
+import logging
+import socket
+import threading
+from typing import Optional, Union
+
+import numpy as np
+
+from app.audio_module.audio_module import AudioModule
+from app.config import settings
+from app.services.inference.protocol import (
+    map_shared_samples,
+    recv_message,
+    send_message,
+    unlink_shared_samples,
+    write_shared_samples,
+)
+from app.utils.audio_processing import to_mono_float32
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServerError(Exception):
+    """The inference server couldn't be reached or failed the request."""
+
+
+class InferenceClient:
+    """
+    Talks to the local inference server (see server.py). Each thread keeps its own connection,
+    opened on first use and reopened once if the server restarted in between.
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise InferenceServerError(f"Cannot reach inference server at {self.socket_path}: {e}") from e
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def call(self, message: dict, retry: bool = True) -> dict:
+        sock = getattr(self._local, "sock", None)
+        fresh = sock is None
+        if fresh:
+            sock = self._local.sock = self._connect()
+        try:
+            send_message(sock, message)
+            reply = recv_message(sock)
+        except (OSError, ValueError) as e:
+            self._close()
+            # A kept-alive connection may predate a server restart; a fresh one failing is real
+            if retry and not fresh and not isinstance(e, socket.timeout):
+                return self.call(message, retry=False)
+            raise InferenceServerError(f"Inference request '{message['op']}' failed: {e}") from e
+        if reply is None:
+            self._close()
+            if retry and not fresh:
+                return self.call(message, retry=False)
+            raise InferenceServerError(f"Inference server closed the connection during '{message['op']}'")
+        if "error" in reply:
+            raise InferenceServerError(reply["error"])
+        return reply
+
+    def synthesize(self, engine: str, engine_options: Optional[dict], text: str) -> tuple[np.ndarray, int]:
+        reply = self.call({"op": "synthesize", "engine": engine, "engine_options": engine_options or {}, "text": text})
+        return map_shared_samples(reply["samples"]), reply["sample_rate"]
+
+    def transcribe_word_timings(self, audio: Union[str, np.ndarray], sample_rate: Optional[int] = None) -> dict:
+        if isinstance(audio, str):
+            return self.call({"op": "transcribe", "path": audio})["timings"]
+        if sample_rate is None:
+            raise ValueError("sample_rate is required when transcribing samples")
+        descriptor = write_shared_samples(to_mono_float32(audio))
+        try:
+            return self.call({"op": "transcribe", "samples": descriptor, "sample_rate": sample_rate}, retry=False)["timings"]
+        finally:
+            # Normally the server already took it over; this covers failures before that
+            unlink_shared_samples(descriptor["shm"])
+
+
+class RemoteAudioEngine(AudioModule):
+    """
+    Stands in for an engine whose model lives in the inference server. Chunking, checkpoints,
+    leveling and post-processing still run in the worker; only chunk synthesis is remote.
+    """
+
+    def __init__(self, engine: str, client: InferenceClient):
+        description = client.call({"op": "describe", "engine": engine})
+        if not description["supports_chunking"]:
+            raise InferenceServerError(f"Engine '{engine}' doesn't synthesize chunk by chunk and can't be served remotely")
+        super().__init__(max_chars=description["max_chars"])
+        self.engine = engine
+        self.client = client
+        self.default_subtype = description["default_subtype"]
+
+    def chunk_synthesizer(self, voice_settings: Optional[dict]):
+        def synthesize(chunk_text: str):
+            return self.client.synthesize(self.engine, voice_settings, chunk_text)
+
+        return synthesize
+
+    def get_voices(self) -> list[str]:
+        return self.client.call({"op": "voices", "engine": self.engine})["voices"]
+
+
+class RemoteSubtitleGenerator:
+    """Stands in for SubtitleGenerator when Whisper lives in the inference server."""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def transcribe_word_timings(self, audio: Union[str, np.ndarray], sample_rate: Optional[int] = None) -> dict:
+        return self.client.transcribe_word_timings(audio, sample_rate)
+
+
+_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_inference_client() -> InferenceClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient(settings.inference_server_socket, settings.inference_server_timeout_seconds)
+        return _client
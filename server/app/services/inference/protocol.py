@@ -0,0 +1,106 @@
+"""
+Wire format between Celery workers and the local inference server.
+
+Requests and replies are JSON objects framed by a 4-byte big-endian length on a Unix stream
+socket. Audio never goes through the socket: the sender writes float32 samples into a POSIX
+shared-memory segment and passes its name, and the receiver maps the segment and unlinks it.
+The mapped array is backed by the segment itself (no copy), and the memory is released when
+the last array referencing it is garbage collected.
+"""
+import json
+import mmap
+import os
+import socket
+import struct
+import uuid
+from typing import Optional
+
+import numpy as np
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+# Where Linux exposes POSIX shared memory (shm_open names) as files
+SHM_DIR = "/dev/shm"
+SHM_PREFIX = "tts-samples-"
+
+
+class InferenceProtocolError(Exception):
+    """The peer sent something that isn't a valid message."""
+
+
+def send_message(sock: socket.socket, message: dict) -> None:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_message(sock: socket.socket) -> Optional[dict]:
+    """Reads one message, or returns None when the peer closed the connection between messages."""
+    header = _recv_exactly(sock, HEADER.size, allow_eof=True)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE_BYTES:
+        raise InferenceProtocolError(f"Message of {length} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit")
+    return json.loads(_recv_exactly(sock, length))
+
+
+def _recv_exactly(sock: socket.socket, size: int, allow_eof: bool = False) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = sock.recv(size - len(buffer))
+        if not data:
+            if allow_eof and not buffer:
+                return None
+            raise InferenceProtocolError("Connection closed mid-message")
+        buffer += data
+    return bytes(buffer)
+
+
+def shared_samples_path(name: str) -> str:
+    if not name.startswith(SHM_PREFIX) or "/" in name:
+        raise InferenceProtocolError(f"Not a sample segment: {name!r}")
+    return os.path.join(SHM_DIR, name)
+
+
+def write_shared_samples(samples: np.ndarray) -> dict:
+    """
+    Copies mono float32 `samples` into a new shared-memory segment and returns its descriptor.
+    The segment stays until the receiver maps it (see `map_shared_samples`) or someone calls
+    `unlink_shared_samples`.
+    """
+    samples = np.ascontiguousarray(samples, dtype=np.float32)
+    name = f"{SHM_PREFIX}{os.getpid()}-{uuid.uuid4().hex}"
+    fd = os.open(shared_samples_path(name), os.O_CREAT | os.O_EXCL | os.O_RDWR, 0o600)
+    try:
+        # Zero-length mappings aren't allowed, so empty audio still gets one sample's worth of space
+        os.ftruncate(fd, max(samples.nbytes, samples.itemsize))
+        with mmap.mmap(fd, max(samples.nbytes, samples.itemsize)) as segment:
+            segment.write(samples.tobytes())
+    except BaseException:
+        os.close(fd)
+        unlink_shared_samples(name)
+        raise
+    os.close(fd)
+    return {"shm": name, "length": int(samples.size)}
+
+
+def map_shared_samples(descriptor: dict) -> np.ndarray:
+    """
+    Maps the segment described by `descriptor` and unlinks its name, taking ownership. The
+    returned read-only array reads the shared pages directly; they are freed with the array.
+    """
+    path = shared_samples_path(descriptor["shm"])
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        segment = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+    return np.frombuffer(segment, dtype=np.float32, count=descriptor["length"])
+
+
+def unlink_shared_samples(name: str) -> None:
+    try:
+        os.unlink(shared_samples_path(name))
+    except FileNotFoundError:
+        pass
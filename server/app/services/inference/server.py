@@ -0,0 +1,172 @@
+"""
+Local inference server: one process per host owns the model weights (Chatterbox, Kokoro,
+Whisper) and serves synthesis and transcription to Celery worker processes over a Unix socket,
+so worker concurrency no longer multiplies model memory. Samples travel through shared memory
+(see protocol.py).
+
+Run it next to the workers, sharing the socket's directory and /dev/shm with them (in Docker,
+a shared volume plus `ipc: "service:<this service>"` on the workers):
+    python -m app.services.inference.server
+
+and start workers with INFERENCE_SERVER_SOCKET pointing at the same path.
+"""
+import logging
+import os
+import socketserver
+import threading
+import time
+from typing import Callable
+
+from app.audio_module.audio_module import AudioModule
+from app.audio_module.engine_registry import is_supported_engine, load_audio_engine, load_subtitle_generator
+from app.config import settings
+from app.services.inference.protocol import (
+    SHM_DIR,
+    SHM_PREFIX,
+    map_shared_samples,
+    recv_message,
+    send_message,
+    unlink_shared_samples,
+    write_shared_samples,
+)
+from app.utils.audio_processing import to_mono_float32
+from app.utils.memory import resident_models
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """Serves one worker connection: requests are answered in order until the worker hangs up."""
+
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping inference connection: {e}")
+                return
+            if message is None:
+                return
+            try:
+                with resident_models.leases():
+                    reply = self.server.dispatch(message)
+            except Exception as e:
+                logger.error(f"Inference request '{message.get('op')}' failed: {e}", exc_info=True)
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            try:
+                send_message(self.request, reply)
+            except OSError as e:
+                # The worker went away; nobody will map the samples we just wrote
+                if "samples" in reply:
+                    unlink_shared_samples(reply["samples"]["shm"])
+                logger.warning(f"Could not reply to inference request: {e}")
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._limits: dict[str, threading.Semaphore] = {}
+        self._limits_lock = threading.Lock()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, InferenceRequestHandler)
+        os.chmod(socket_path, 0o660)
+        threading.Thread(target=self._sweep_orphans, name="inference-shm-sweeper", daemon=True).start()
+
+    def dispatch(self, message: dict) -> dict:
+        op = message.get("op")
+        if op == "ping":
+            return {"pid": os.getpid()}
+        if op == "describe":
+            engine = self._engine(message["engine"])
+            return {
+                "max_chars": engine.max_chars,
+                "default_subtype": engine.default_subtype,
+                "supports_chunking": engine.supports_chunking,
+            }
+        if op == "voices":
+            return {"voices": self._engine(message["engine"]).get_voices()}
+        if op == "synthesize":
+            return self._synthesize(message)
+        if op == "transcribe":
+            return self._transcribe(message)
+        raise ValueError(f"Unknown inference op: {op!r}")
+
+    def _engine(self, name: str) -> AudioModule:
+        if not is_supported_engine(name):
+            raise ValueError(f"Unsupported engine: {name}")
+        return load_audio_engine(name)
+
+    def _limit(self, name: str, concurrent: bool) -> threading.Semaphore:
+        """
+        Caps in-flight inference per model. Models that aren't safe to call from several threads
+        run one request at a time; the others up to `inference_server_max_concurrency`.
+        """
+        with self._limits_lock:
+            if name not in self._limits:
+                slots = max(settings.inference_server_max_concurrency, 1) if concurrent else 1
+                self._limits[name] = threading.Semaphore(slots)
+            return self._limits[name]
+
+    def _synthesize(self, message: dict) -> dict:
+        engine = self._engine(message["engine"])
+        synthesize: Callable = engine.chunk_synthesizer(message.get("engine_options") or {})
+        with self._limit(message["engine"], engine.concurrent_synthesis):
+            samples, sample_rate = synthesize(message["text"])
+        return {"samples": write_shared_samples(to_mono_float32(samples)), "sample_rate": int(sample_rate)}
+
+    def _transcribe(self, message: dict) -> dict:
+        if "path" in message:
+            audio, sample_rate = message["path"], None
+        else:
+            audio, sample_rate = map_shared_samples(message["samples"]), message["sample_rate"]
+        generator = load_subtitle_generator()
+        with self._limit("whisper", False):
+            return {"timings": generator.transcribe_word_timings(audio, sample_rate)}
+
+    def _sweep_orphans(self):
+        """
+        Unlinks sample segments this process wrote that no worker mapped in time, e.g. because
+        the worker was killed between request and reply.
+        """
+        prefix = f"{SHM_PREFIX}{os.getpid()}-"
+        timeout = settings.inference_server_orphan_timeout_seconds
+        while True:
+            time.sleep(timeout)
+            now = time.time()
+            try:
+                names = [n for n in os.listdir(SHM_DIR) if n.startswith(prefix)]
+            except OSError:
+                continue
+            for name in names:
+                try:
+                    if now - os.stat(os.path.join(SHM_DIR, name)).st_mtime > timeout:
+                        unlink_shared_samples(name)
+                        logger.warning(f"Removed unclaimed sample segment {name}")
+                except FileNotFoundError:
+                    pass
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    socket_path = settings.inference_server_socket or "/tmp/tts-inference.sock"
+    server = InferenceServer(socket_path)
+    for name in filter(None, (n.strip() for n in settings.inference_server_preload.split(","))):
+        # Load up front so the first tasks after a deploy don't pay the cold start
+        if name == "whisper":
+            load_subtitle_generator()
+        else:
+            load_audio_engine(name)
+    logger.info(f"Inference server {os.getpid()} listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Cross-request micro-batching for short Kokoro chunks.
+
+With several synthesis threads in one process (a threads pool, or the inference server), short
+prompts would otherwise each run their own inference at the same time, competing for the same
+ONNX Runtime threads. The batcher collects requests for a few milliseconds and hands them to one
+dispatcher thread, which renders each batch in one call of `run_batch` on the warm session and
+passes every result back to the thread waiting for it.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        run_batch: Callable[[list[T]], list[R]],
+        window_seconds: float,
+        max_batch: int,
+        idle_seconds: float = 1.0,
+        name: str = "micro-batcher",
+    ):
+        """
+        Args:
+            run_batch: Renders a list of requests, returning one result per request in order.
+            window_seconds: How long the first request of a batch waits for others to join it.
+            max_batch: Most requests in one batch; a full batch is dispatched without waiting.
+            idle_seconds: The dispatcher thread exits after this long without requests (and is
+                started again by the next one), so an evicted model isn't kept alive by it.
+            name: Name of the dispatcher thread.
+        """
+        self._run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max(max_batch, 1)
+        self.idle_seconds = idle_seconds
+        self.name = name
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def submit(self, item: T) -> R:
+        """Renders `item` as part of the next batch, blocking until its result is ready."""
+        future: Future = Future()
+        with self._lock:
+            self._queue.put((item, future))
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, name=self.name, daemon=True).start()
+        return future.result()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                with self._lock:
+                    # submit() enqueues under the lock, so nothing can arrive unseen after this check
+                    if self._queue.empty():
+                        self._running = False
+                        return
+                continue
+            self._dispatch(self._collect(first))
+
+    def _collect(self, first: tuple) -> list[tuple]:
+        batch = [first]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self, batch: list[tuple]):
+        items = [item for item, _ in batch]
+        try:
+            results = self._run_batch(items)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # One bad request shouldn't fail the tasks it happened to be batched with
+            logger.warning(f"Batch of {len(batch)} failed ({e}); rendering its requests one by one")
+            for entry in batch:
+                self._dispatch([entry])
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
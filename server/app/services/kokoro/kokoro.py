@@ -3,14 +3,34 @@ pip install -U kokoro-onnx soundfile
 
 wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/kokoro-v1.0.onnx
 wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/voices-v1.0.bin
+# optional, for KOKORO_QUANTIZED=true on CPU nodes
+wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/kokoro-v1.0.int8.onnx
 python examples/save.py
 """
 
+import logging
+import os
 import time
-from typing import Optional
+from importlib import metadata
+from typing import Literal, Optional
 from kokoro_onnx import Kokoro
+import onnxruntime as ort
 from pydantic import BaseModel
-import soundfile as sf
+import numpy as np
+
+from app.config import settings
+from app.services.kokoro.batcher import MicroBatcher
+from app.services.kokoro.phoneme_cache import PhonemeCache
+from app.services.redis.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
 
 
 class KokoroGenerationConfig(BaseModel):
@@ -19,23 +39,116 @@ class KokoroGenerationConfig(BaseModel):
     speed: Optional[float] = 1
     lang: Optional[str] = "en-us"
 
+class KokoroRuntimeConfig(BaseModel):
+    """Which Kokoro model file to load and how ONNX Runtime should run it."""
+    model_path: str
+    voices_path: str
+    providers: list[str]
+    intra_op_threads: int = 0  # 0 lets ONNX Runtime pick (one per physical core)
+    inter_op_threads: int = 0
+    graph_optimization_level: Literal["disable", "basic", "extended", "all"] = "all"
+    enable_cpu_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+
+    @classmethod
+    def from_settings(cls) -> "KokoroRuntimeConfig":
+        providers = [p.strip() for p in settings.onnx_providers.split(",") if p.strip()]
+        if not providers:
+            # Same fallback kokoro-onnx uses: ONNX_PROVIDER, else whatever the installed runtime offers
+            providers = [os.getenv("ONNX_PROVIDER")] if os.getenv("ONNX_PROVIDER") else ort.get_available_providers()
+        return cls(
+            model_path=settings.kokoro_int8_model_path if settings.kokoro_quantized else settings.kokoro_model_path,
+            voices_path=settings.kokoro_voices_path,
+            providers=providers,
+            intra_op_threads=settings.onnx_intra_op_threads,
+            inter_op_threads=settings.onnx_inter_op_threads,
+            graph_optimization_level=settings.onnx_graph_optimization_level,
+            enable_cpu_mem_arena=settings.onnx_enable_cpu_mem_arena,
+            enable_mem_pattern=settings.onnx_enable_mem_pattern,
+        )
+
+    def session_options(self) -> ort.SessionOptions:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[self.graph_optimization_level]
+        options.enable_cpu_mem_arena = self.enable_cpu_mem_arena
+        options.enable_mem_pattern = self.enable_mem_pattern
+        return options
+
+
 class KokoroService:
-    def __init__(self) -> None:
-        self.kokoro = Kokoro(
-            "app/services/kokoro/kokoro-v1.0.onnx",
-            "app/services/kokoro/voices-v1.0.bin",
+    def __init__(self, runtime: Optional[KokoroRuntimeConfig] = None) -> None:
+        self.runtime = runtime or KokoroRuntimeConfig.from_settings()
+        start_time = time.time()
+        session = ort.InferenceSession(
+            self.runtime.model_path,
+            sess_options=self.runtime.session_options(),
+            providers=self.runtime.providers,
+        )
+        self.kokoro = Kokoro.from_session(session, self.runtime.voices_path)
+        logger.info(
+            f"Loaded Kokoro model {os.path.basename(self.runtime.model_path)} in {time.time() - start_time:.2f}s "
+            f"(providers: {session.get_providers()})"
+        )
+        self.phoneme_cache = self._create_phoneme_cache()
+        self.batcher = self._create_batcher()
+
+    def _create_phoneme_cache(self) -> Optional[PhonemeCache]:
+        if not settings.kokoro_phoneme_cache_size and not settings.kokoro_phoneme_cache_redis:
+            return None
+        return PhonemeCache(
+            self.kokoro.tokenizer.phonemize,
+            max_entries=settings.kokoro_phoneme_cache_size,
+            redis_client=redis_client if settings.kokoro_phoneme_cache_redis else None,
+            # espeak output can change between releases; keep their entries apart
+            namespace=f"kokoro-onnx-{metadata.version('kokoro-onnx')}",
+            ttl_seconds=settings.kokoro_phoneme_cache_ttl_seconds,
+            report_interval=settings.kokoro_phoneme_cache_report_interval_seconds,
         )
-        print(f"Loaded Kokoro model")
 
-    def generate_audio(self, output_path: str, config: KokoroGenerationConfig):        
-        print(f"Generating audio with Kokoro: {config.model_dump(mode='json')}")
+    def _create_batcher(self) -> Optional[MicroBatcher]:
+        if not settings.kokoro_batch_window_ms:
+            return None
+        return MicroBatcher(
+            self.synthesize_batch,
+            window_seconds=settings.kokoro_batch_window_ms / 1000,
+            max_batch=settings.kokoro_batch_max_size,
+            name="kokoro-batcher",
+        )
+
+    def synthesize(self, config: KokoroGenerationConfig) -> tuple[np.ndarray, int]:
+        if self.batcher is not None and len(config.text) <= settings.kokoro_batch_max_chars:
+            return self.batcher.submit(config)
+        logger.debug(f"Generating {len(config.text)} chars with Kokoro (voice={config.voice}, speed={config.speed}, lang={config.lang})")
+        start_time = time.time()
+        if self.phoneme_cache is not None:
+            phonemes = self.phoneme_cache.phonemize(config.text, config.lang)
+            samples, sample_rate = self.kokoro.create(phonemes, voice=config.voice, speed=config.speed, lang=config.lang, is_phonemes=True)
+        else:
+            samples, sample_rate = self.kokoro.create(config.text, voice=config.voice, speed=config.speed, lang=config.lang)
+        logger.debug(f"Generated audio in {time.time() - start_time:.2f} seconds")
+        return samples, sample_rate
+
+    def synthesize_batch(self, configs: list[KokoroGenerationConfig]) -> list[tuple[np.ndarray, int]]:
+        """
+        Renders several requests back to back on this thread: every text is phonemized first
+        (mostly phoneme cache hits), then the session runs them one after another while warm.
+        kokoro-onnx feeds the graph one utterance per run and it returns no per-utterance
+        lengths, so padding requests into one inference isn't possible with this model.
+        """
         start_time = time.time()
-        samples, sample_rate = self.kokoro.create(config.text, voice=config.voice, speed=config.speed, lang=config.lang)
-        sf.write(output_path, samples, sample_rate)
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        print(f"Generated audio in {elapsed_time:.2f} seconds")
+        phonemize = self.phoneme_cache.phonemize if self.phoneme_cache is not None else self.kokoro.tokenizer.phonemize
+        phonemes = [phonemize(config.text, config.lang) for config in configs]
+        results = [
+            self.kokoro.create(p, voice=config.voice, speed=config.speed, lang=config.lang, is_phonemes=True)
+            for p, config in zip(phonemes, configs)
+        ]
+        logger.debug(f"Rendered a batch of {len(configs)} Kokoro requests in {time.time() - start_time:.3f}s")
+        return results
 
     @staticmethod
     def get_voices() -> list[str]:
-        return KokoroService().kokoro.get_voices()
+        # The voices file is a plain .npz of style vectors; no need to load the model for names
+        with np.load(settings.kokoro_voices_path) as voices:
+            return sorted(voices.keys())
@@ -0,0 +1,158 @@
+"""
+Sentence-level cache for Kokoro's grapheme-to-phoneme step.
+
+Kokoro phonemizes the whole input with espeak before every inference, and our texts repeat a
+lot across jobs (intros, outros, product names, recurring sentences). Text is split into
+sentences and each (sentence, lang) is looked up in an in-process LRU, then optionally in Redis,
+so workers share what any of them has phonemized. Only misses reach espeak.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.utils.text_utils import split_sentences
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tts:phonemes"
+
+# (text, lang) -> phonemes
+Phonemizer = Callable[[str, str], str]
+
+
+@dataclass
+class PhonemeCacheStats:
+    memory_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.memory_hits + self.redis_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.memory_hits + self.redis_hits) / self.lookups if self.lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.lookups} sentences, hit rate {self.hit_rate:.1%} "
+            f"(memory {self.memory_hits}, redis {self.redis_hits}, misses {self.misses})"
+        )
+
+
+class PhonemeCache:
+    def __init__(
+        self,
+        phonemize: Phonemizer,
+        max_entries: int = 10000,
+        redis_client=None,
+        namespace: str = "",
+        ttl_seconds: Optional[int] = None,
+        report_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            phonemize: The uncached G2P function.
+            max_entries: Size of the in-process LRU; 0 disables it.
+            redis_client: Shared tier, or None to cache in this process only.
+            namespace: Part of the Redis key, so phonemizer versions that disagree don't mix.
+            ttl_seconds: Expiry of Redis entries.
+            report_interval: Seconds between hit-rate log lines, or None for no logging.
+        """
+        self._phonemize = phonemize
+        self.max_entries = max_entries
+        self.redis_client = redis_client
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.report_interval = report_interval
+        self.stats = PhonemeCacheStats()
+        self._entries: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_report = time.monotonic()
+
+    def phonemize(self, text: str, lang: str) -> str:
+        """Phonemizes `text` sentence by sentence, computing only the sentences not cached yet."""
+        sentences = split_sentences(text)
+        phonemes: list[Optional[str]] = [self._get_local(sentence, lang) for sentence in sentences]
+        memory_hits = sum(p is not None for p in phonemes)
+
+        missing = [i for i, p in enumerate(phonemes) if p is None]
+        redis_hits = 0
+        if missing and self.redis_client is not None:
+            for i, cached in zip(missing, self._get_shared([sentences[i] for i in missing], lang)):
+                if cached is not None:
+                    phonemes[i] = cached
+                    self._put_local(sentences[i], lang, cached)
+                    redis_hits += 1
+            missing = [i for i in missing if phonemes[i] is None]
+
+        computed = {}
+        for i in missing:
+            phonemes[i] = self._phonemize(sentences[i], lang)
+            self._put_local(sentences[i], lang, phonemes[i])
+            computed[sentences[i]] = phonemes[i]
+        if computed and self.redis_client is not None:
+            self._put_shared(computed, lang)
+
+        with self._lock:
+            self.stats.memory_hits += memory_hits
+            self.stats.redis_hits += redis_hits
+            self.stats.misses += len(missing)
+        self._maybe_report()
+        return " ".join(p for p in phonemes if p)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get_local(self, sentence: str, lang: str) -> Optional[str]:
+        if not self.max_entries:
+            return None
+        with self._lock:
+            phonemes = self._entries.get((sentence, lang))
+            if phonemes is not None:
+                self._entries.move_to_end((sentence, lang))
+            return phonemes
+
+    def _put_local(self, sentence: str, lang: str, phonemes: str) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[(sentence, lang)] = phonemes
+            self._entries.move_to_end((sentence, lang))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _key(self, sentence: str, lang: str) -> str:
+        digest = hashlib.sha256(sentence.encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{self.namespace}:{lang}:{digest}"
+
+    def _get_shared(self, sentences: list[str], lang: str) -> list[Optional[str]]:
+        # The shared tier is an optimisation; if Redis is unavailable we just phonemize
+        try:
+            return self.redis_client.mget([self._key(sentence, lang) for sentence in sentences])
+        except Exception as e:
+            logger.warning(f"Phoneme cache lookup in Redis failed: {e}")
+            return [None] * len(sentences)
+
+    def _put_shared(self, computed: dict[str, str], lang: str) -> None:
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for sentence, phonemes in computed.items():
+                pipe.set(self._key(sentence, lang), phonemes, ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to store phonemes in Redis: {e}")
+
+    def _maybe_report(self) -> None:
+        if self.report_interval is None:
+            return
+        now = time.monotonic()
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            logger.info(f"Phoneme cache: {self.stats}, {len(self._entries)} entries in memory")
@@ -0,0 +1,242 @@
+import hashlib
+import io
+import json
+import logging
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+from minio.commonconfig import CopySource
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+
+from app.services.minio.minio_client import minio_client, bucket_name
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PREFIX = "chunks"
+MANIFEST_VERSION = 1
+
+
+class ChunkCheckpointMissing(LookupError):
+    """A chunk the manifest records is gone from the store or can't be decoded."""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render_fingerprint(engine: str, engine_options: Optional[dict]) -> str:
+    """Identifies the settings chunks were rendered with; chunks from other settings are never reused."""
+    canonical = json.dumps({"engine": engine, "engine_options": engine_options or {}}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ChunkCheckpointStore:
+    """
+    Persists per-chunk audio of a multi-chunk job under `chunks/{task_id}/` in MinIO, with a
+    small `manifest.json` describing what has been rendered so far.
+
+    A retried or redelivered task opens the same store (same task ID) and `load` returns the
+    chunks that survived, so only missing chunks are synthesized again. Each chunk object also
+    carries its text hash and fingerprint as metadata, so `save` never rewrites the manifest
+    (which would cost O(n²) bytes of uploads over a long job) and an interrupted job's chunks
+    are still found again. The manifest is written once the job has all its chunks: by `flush`
+    after a serial render, or by the merge step's `record` for chunk tasks run in parallel.
+
+    Entries also keep the chunk text, so a re-render of an edited text can find which chunks of
+    an earlier job it still contains and `copy_from` that job's audio instead of rendering them.
+
+    Manifest layout:
+        {
+            "version": 1,
+            "task_id": "...",
+            "fingerprint": "<engine + options hash>",
+            "chunks": {"0": {"text_sha256": "...", "object": "chunks/<id>/00000.wav",
+                             "samples": 123, "sample_rate": 24000, "text": "..."}, ...}
+        }
+    """
+
+    def __init__(self, task_id: str, fingerprint: str):
+        self.task_id = task_id
+        self.fingerprint = fingerprint
+        self.prefix = f"{CHUNK_PREFIX}/{task_id}"
+        self.manifest = self._load_manifest()
+        # Entries added since the manifest was last written
+        self._unsaved = False
+
+    @property
+    def manifest_object(self) -> str:
+        return f"{self.prefix}/manifest.json"
+
+    def chunk_object(self, index: int) -> str:
+        return f"{self.prefix}/{index:05d}.wav"
+
+    def word_timings_object(self, index: int) -> str:
+        return f"{self.prefix}/{index:05d}.words.json"
+
+    def _empty_manifest(self) -> dict:
+        return {"version": MANIFEST_VERSION, "task_id": self.task_id, "fingerprint": self.fingerprint, "chunks": {}}
+
+    def _load_manifest(self) -> dict:
+        response = None
+        try:
+            response = minio_client.get_object(bucket_name, self.manifest_object)
+            manifest = json.loads(response.read())
+        except S3Error as e:
+            if e.code not in ("NoSuchKey", "NoSuchObject"):
+                logger.warning(f"Could not read chunk manifest {self.manifest_object}: {e}")
+            return self._empty_manifest()
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("fingerprint") != self.fingerprint:
+            logger.info(f"Discarding chunk checkpoints for {self.task_id}: rendered with different settings")
+            return self._empty_manifest()
+        logger.info(f"Found {len(manifest['chunks'])} checkpointed chunks for task {self.task_id}")
+        return manifest
+
+    def _save_manifest(self):
+        self._unsaved = False
+        payload = json.dumps(self.manifest, separators=(",", ":")).encode("utf-8")
+        minio_client.put_object(
+            bucket_name, self.manifest_object, io.BytesIO(payload), len(payload), content_type="application/json"
+        )
+
+    def load(self, index: int, text: str) -> Optional[tuple[np.ndarray, int]]:
+        """Returns the stored samples for chunk `index` if they were rendered from the same text."""
+        entry = self.manifest["chunks"].get(str(index))
+        if entry is None:
+            entry = self._stat_entry(index, text)
+            if not entry or entry["text_sha256"] != text_hash(text):
+                return None
+            stored = self._read_audio(entry["object"])
+            if stored is not None:
+                # Saved by an interrupted attempt; recorded with the others on the next flush
+                samples, sample_rate = stored
+                self.manifest["chunks"][str(index)] = {
+                    **entry, "samples": int(len(samples)), "sample_rate": int(sample_rate), "text": text
+                }
+                self._unsaved = True
+            return stored
+        if entry["text_sha256"] != text_hash(text):
+            return None
+        return self._read_audio(entry["object"])
+
+    def read(self, index: int) -> tuple[np.ndarray, int]:
+        """Returns the samples recorded in the manifest for chunk `index`; raises `ChunkCheckpointMissing` if they are lost."""
+        entry = self.manifest["chunks"].get(str(index))
+        stored = self._read_audio(entry["object"]) if entry else None
+        if stored is None:
+            raise ChunkCheckpointMissing(f"Chunk {index} of task {self.task_id} is missing from its checkpoints")
+        return stored
+
+    def save(self, index: int, text: str, samples: np.ndarray, sample_rate: int) -> dict:
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, sample_rate, format="WAV", subtype="FLOAT")
+        size = buffer.tell()
+        buffer.seek(0)
+        object_name = self.chunk_object(index)
+        minio_client.put_object(
+            bucket_name,
+            object_name,
+            buffer,
+            size,
+            content_type="audio/wav",
+            metadata={"text-sha256": text_hash(text), "fingerprint": self.fingerprint},
+        )
+
+        entry = {
+            "text_sha256": text_hash(text),
+            "object": object_name,
+            "samples": int(len(samples)),
+            "sample_rate": int(sample_rate),
+            "text": text,
+        }
+        self.manifest["chunks"][str(index)] = entry
+        self._unsaved = True
+        return entry
+
+    def flush(self) -> None:
+        """Writes the manifest if chunks were saved (or found without it) since it was last written."""
+        if self._unsaved:
+            self._save_manifest()
+
+    def record(self, entries: dict[int, dict]) -> None:
+        """Writes the manifest for chunks saved elsewhere (e.g. by parallel chunk tasks)."""
+        for index, entry in entries.items():
+            self.manifest["chunks"][str(index)] = entry
+        self._save_manifest()
+
+    def chunk_texts(self) -> list[str]:
+        """Texts of the recorded chunks in order; empty if any of them has no text recorded."""
+        entries = [self.manifest["chunks"][key] for key in sorted(self.manifest["chunks"], key=int)]
+        if not all(entry.get("text") for entry in entries):
+            return []
+        return [entry["text"] for entry in entries]
+
+    def copy_from(self, source: "ChunkCheckpointStore", chunks: list[str]) -> int:
+        """
+        Copies the audio (and word timings, where there are any) of every chunk in `chunks` that
+        `source` rendered from the same text into this store at its new index, server-side, and
+        records them. Returns how many chunks were copied.
+        """
+        by_hash = {entry["text_sha256"]: (int(key), entry) for key, entry in source.manifest["chunks"].items()}
+        copied = {}
+        for index, text in enumerate(chunks):
+            if text_hash(text) not in by_hash:
+                continue
+            source_index, entry = by_hash[text_hash(text)]
+            try:
+                minio_client.copy_object(bucket_name, self.chunk_object(index), CopySource(bucket_name, entry["object"]))
+                timings_object = source.word_timings_object(source_index)
+                if source.has_object(timings_object):
+                    minio_client.copy_object(bucket_name, self.word_timings_object(index), CopySource(bucket_name, timings_object))
+            except S3Error as e:
+                logger.warning(f"Could not reuse chunk {entry['object']}, rendering it again: {e}")
+                continue
+            copied[index] = {**entry, "object": self.chunk_object(index)}
+        if copied:
+            self.record(copied)
+        return len(copied)
+
+    def has_object(self, object_name: str) -> bool:
+        try:
+            minio_client.stat_object(bucket_name, object_name)
+            return True
+        except S3Error:
+            return False
+
+    def _stat_entry(self, index: int, text: str) -> Optional[dict]:
+        object_name = self.chunk_object(index)
+        try:
+            stat = minio_client.stat_object(bucket_name, object_name)
+        except S3Error:
+            return None
+        metadata = stat.metadata or {}
+        if metadata.get("x-amz-meta-fingerprint") != self.fingerprint:
+            return None
+        return {"text_sha256": metadata.get("x-amz-meta-text-sha256"), "object": object_name}
+
+    def _read_audio(self, object_name: str) -> Optional[tuple[np.ndarray, int]]:
+        response = None
+        try:
+            response = minio_client.get_object(bucket_name, object_name)
+            samples, sample_rate = sf.read(io.BytesIO(response.read()), dtype="float32")
+        except (S3Error, sf.SoundFileError) as e:
+            logger.warning(f"Checkpointed chunk {object_name} is unreadable, re-rendering: {e}")
+            return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+        return samples, sample_rate
+
+    def delete(self) -> None:
+        objects = minio_client.list_objects(bucket_name, prefix=f"{self.prefix}/", recursive=True)
+        errors = minio_client.remove_objects(bucket_name, (DeleteObject(obj.object_name) for obj in objects))
+        for error in errors:
+            logger.warning(f"Failed to delete checkpoint object {error.name}: {error}")
+        self.manifest = self._empty_manifest()
@@ -1,5 +1,6 @@
 import os
 import json
+from urllib.parse import urlparse
 from minio import Minio
 
 minio_client = Minio(
@@ -12,6 +13,18 @@ minio_client = Minio(
 minio_public_endpoint = os.environ.get("MINIO_PUBLIC_ENDPOINT", "http://localhost:9000")
 bucket_name = os.environ.get("MINIO_BUCKET_NAME", "audio-storage")
 
+# Presigned URLs are signed against the host that will serve them, so they have to be
+# generated with a client pointed at the public endpoint. Setting the region up front keeps
+# presigning fully offline (no bucket-location round trip).
+_public_endpoint_url = urlparse(minio_public_endpoint)
+minio_presign_client = Minio(
+    _public_endpoint_url.netloc or _public_endpoint_url.path,
+    access_key=os.environ.get("MINIO_ACCESS_KEY", "minioadmin"),
+    secret_key=os.environ.get("MINIO_SECRET_KEY", "minioadmin"),
+    secure=_public_endpoint_url.scheme == "https",
+    region=os.environ.get("MINIO_REGION", "us-east-1"),
+)
+
 print(f"Minio Public Endpoint: {minio_public_endpoint}")
 print(f"Minio Bucket Name: {bucket_name}")
 
@@ -0,0 +1,106 @@
+"""
+Submission texts passed by reference.
+
+A long text sent inline would travel through Redis in the task message (and again in every
+chunk message of a distributed job). Instead the API stores it once under `texts/{task_id}.txt`
+and the task carries a small reference:
+
+    {"object": "texts/<id>.txt", "sha256": "...", "chars": 123456}
+
+Chunks of a distributed job reference their byte range of the same object (with "offset" and
+"length", and the hash of the range), so each chunk task reads only its own slice.
+"""
+import hashlib
+import io
+import logging
+from typing import Optional
+
+from minio.commonconfig import ENABLED, Filter
+from minio.lifecycleconfig import Expiration, LifecycleConfig, Rule
+
+from app.config import settings
+from app.services.minio.minio_client import minio_client, bucket_name
+
+logger = logging.getLogger(__name__)
+
+TEXT_PREFIX = "texts"
+EXPIRY_RULE_ID = "expire-task-texts"
+
+
+class TextIntegrityError(ValueError):
+    """A stored text no longer matches the hash its task was submitted with."""
+
+
+def text_object(task_id: str) -> str:
+    return f"{TEXT_PREFIX}/{task_id}.txt"
+
+
+def store_text(task_id: str, text: str) -> dict:
+    """Uploads the text of task `task_id` and returns the reference its task message carries."""
+    payload = text.encode("utf-8")
+    object_name = text_object(task_id)
+    minio_client.put_object(bucket_name, object_name, io.BytesIO(payload), len(payload), content_type="text/plain; charset=utf-8")
+    return {"object": object_name, "sha256": hashlib.sha256(payload).hexdigest(), "chars": len(text)}
+
+
+def load_text(ref: dict) -> str:
+    """Reads a referenced text (or byte range of one) and checks it against its hash."""
+    response = minio_client.get_object(bucket_name, ref["object"], offset=ref.get("offset", 0), length=ref.get("length", 0))
+    try:
+        payload = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+    if hashlib.sha256(payload).hexdigest() != ref["sha256"]:
+        raise TextIntegrityError(f"Text {ref['object']} does not match the hash it was submitted with")
+    return payload.decode("utf-8")
+
+
+def chunk_refs(ref: dict, text: str, chunks: list[str]) -> Optional[list[dict]]:
+    """
+    References to each of `chunks` as a byte range of the stored `text`, or None if a chunk is
+    not a verbatim slice of it (in order), in which case the chunks have to be sent inline.
+    """
+    refs = []
+    position = offset = 0
+    for chunk in chunks:
+        found = text.find(chunk, position)
+        if found < 0:
+            return None
+        offset += len(text[position:found].encode("utf-8"))
+        payload = chunk.encode("utf-8")
+        refs.append({
+            "object": ref["object"],
+            "sha256": hashlib.sha256(payload).hexdigest(),
+            "chars": len(chunk),
+            "offset": offset,
+            "length": len(payload),
+        })
+        offset += len(payload)
+        position = found + len(chunk)
+    return refs
+
+
+def delete_text(ref: dict) -> None:
+    minio_client.remove_object(bucket_name, ref["object"])
+
+
+def ensure_text_expiry() -> None:
+    """
+    Adds a lifecycle rule expiring stored texts after `task_text_expiry_days`, for the ones no
+    task got to delete (jobs revoked before a worker picked them up). Other rules are kept.
+    """
+    if not settings.task_text_expiry_days:
+        return
+    try:
+        config = minio_client.get_bucket_lifecycle(bucket_name)
+        rules = [rule for rule in (config.rules if config else []) if rule.rule_id != EXPIRY_RULE_ID]
+        rules.append(Rule(
+            ENABLED,
+            rule_filter=Filter(prefix=f"{TEXT_PREFIX}/"),
+            rule_id=EXPIRY_RULE_ID,
+            expiration=Expiration(days=settings.task_text_expiry_days),
+        ))
+        minio_client.set_bucket_lifecycle(bucket_name, LifecycleConfig(rules))
+    except Exception as e:
+        logger.warning(f"Could not set the expiry rule for stored texts: {e}")
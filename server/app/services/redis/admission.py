@@ -0,0 +1,140 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+from app.services.redis.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tts:admission"
+
+# Adds a job to the engine backlog unless that would push it past the limit. The backlog is a
+# hash of task ID -> characters plus a sorted set of expiry times, so jobs whose worker died
+# without reporting back age out instead of inflating the backlog forever. An empty backlog
+# always admits, so a single oversized job is never refused outright.
+# Returns the backlog before the job on success, or -1 - backlog when rejected.
+_ADMIT = redis_client.register_script("""
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[4])
+for _, task_id in ipairs(expired) do
+    redis.call('HDEL', KEYS[1], task_id)
+    redis.call('ZREM', KEYS[2], task_id)
+end
+local backlog = 0
+for _, chars in ipairs(redis.call('HVALS', KEYS[1])) do
+    backlog = backlog + tonumber(chars)
+end
+local chars = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+if limit >= 0 and backlog > 0 and backlog + chars > limit then
+    return -1 - backlog
+end
+redis.call('HSET', KEYS[1], ARGV[1], chars)
+redis.call('ZADD', KEYS[2], ARGV[4] + ARGV[5], ARGV[1])
+redis.call('SET', KEYS[3], ARGV[6], 'EX', ARGV[5])
+return backlog
+""")
+
+# Removes a finished job from its engine backlog
+_RELEASE = redis_client.register_script("""
+local engine = redis.call('GET', KEYS[1])
+if not engine then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HDEL', ARGV[1] .. ':' .. engine .. ':backlog', ARGV[2])
+redis.call('ZREM', ARGV[1] .. ':' .. engine .. ':expiry', ARGV[2])
+return 1
+""")
+
+# Exponentially weighted moving average of an engine's throughput
+_RECORD_THROUGHPUT = redis_client.register_script("""
+local current = tonumber(redis.call('GET', KEYS[1]))
+local sample = tonumber(ARGV[1])
+if current then
+    sample = current + tonumber(ARGV[2]) * (sample - current)
+end
+redis.call('SET', KEYS[1], tostring(sample))
+return tostring(sample)
+""")
+
+
+class AdmissionRejected(Exception):
+    """The engine's backlog is over its limit; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, engine: str, backlog_seconds: float, retry_after: int):
+        super().__init__(f"Backlog for engine '{engine}' is {backlog_seconds:.0f}s of work")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Admission:
+    estimated_start_at: float  # unix timestamps
+    estimated_completion_at: float
+
+
+def _backlog_key(engine: str) -> str:
+    return f"{KEY_PREFIX}:{engine}:backlog"
+
+
+def _expiry_key(engine: str) -> str:
+    return f"{KEY_PREFIX}:{engine}:expiry"
+
+
+def _throughput_key(engine: str) -> str:
+    return f"{KEY_PREFIX}:{engine}:chars_per_second"
+
+
+def _job_key(task_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{task_id}"
+
+
+def chars_per_second(engine: str) -> float:
+    """Measured per-worker throughput of `engine`, or the configured prior before any job has finished."""
+    measured = redis_client.get(_throughput_key(engine))
+    if measured is not None:
+        return max(float(measured), 1e-3)
+    return settings.admission_default_chars_per_second.get(engine, settings.admission_fallback_chars_per_second)
+
+
+def _backlog_limit_seconds(engine: str) -> Optional[float]:
+    return settings.admission_max_backlog_seconds.get(engine, settings.admission_default_max_backlog_seconds)
+
+
+def admit(engine: str, task_id: str, chars: int) -> Admission:
+    """
+    Adds a job to `engine`'s backlog and estimates when it will start and finish, or raises
+    `AdmissionRejected` when the queued work already exceeds the engine's backlog limit.
+    """
+    rate = chars_per_second(engine) * settings.admission_worker_slots
+    limit_seconds = _backlog_limit_seconds(engine)
+    limit_chars = math.floor(limit_seconds * rate) if limit_seconds is not None else -1
+
+    now = time.time()
+    backlog = _ADMIT(
+        keys=[_backlog_key(engine), _expiry_key(engine), _job_key(task_id)],
+        args=[task_id, chars, limit_chars, now, settings.idempotency_inflight_ttl_seconds, engine],
+    )
+    if backlog < 0:
+        backlog_seconds = (-1 - backlog) / rate
+        # Until enough queued work drains for this job to fit (or the queue empties entirely)
+        wait = min(backlog_seconds + chars / rate - limit_seconds, backlog_seconds)
+        retry_after = max(math.ceil(wait), 1)
+        raise AdmissionRejected(engine, backlog_seconds, retry_after)
+
+    start = now + backlog / rate
+    return Admission(estimated_start_at=start, estimated_completion_at=start + chars / chars_per_second(engine))
+
+
+def release_admission(task_id: str) -> None:
+    """Called once a task has finished (or was never enqueued); safe to call more than once."""
+    _RELEASE(keys=[_job_key(task_id)], args=[KEY_PREFIX, task_id])
+
+
+def record_throughput(engine: str, chars: int, seconds: float) -> None:
+    """Folds one synthesis measurement into the engine's throughput average."""
+    if chars <= 0 or seconds <= 0:
+        return
+    _RECORD_THROUGHPUT(keys=[_throughput_key(engine)], args=[chars / seconds, settings.admission_throughput_smoothing])
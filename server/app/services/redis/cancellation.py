@@ -0,0 +1,21 @@
+from app.config import settings
+from app.services.redis.redis_client import redis_client
+
+KEY_PREFIX = "tts:cancel"
+
+
+def _cancel_key(task_id: str) -> str:
+    return f"{KEY_PREFIX}:{task_id}"
+
+
+def request_cancellation(task_id: str) -> None:
+    """Flags a task so its worker stops at the next chunk boundary."""
+    redis_client.set(_cancel_key(task_id), 1, ex=settings.cancellation_ttl_seconds)
+
+
+def is_cancellation_requested(task_id: str) -> bool:
+    return bool(redis_client.exists(_cancel_key(task_id)))
+
+
+def clear_cancellation(task_id: str) -> None:
+    redis_client.delete(_cancel_key(task_id))
@@ -0,0 +1,24 @@
+from app.config import settings
+from app.services.redis.redis_client import redis_client
+
+KEY_PREFIX = "tts:deliveries"
+
+
+class DeliveryLimitExceeded(Exception):
+    """A task kept coming back without finishing: each delivery took its worker process down."""
+
+
+def _deliveries_key(task_name: str, task_id: str, retries: int) -> str:
+    # Chord bodies run under their job's task ID, and every retry is a new message
+    return f"{KEY_PREFIX}:{task_name}:{task_id}:{retries}"
+
+
+def record_delivery(task_name: str, task_id: str, retries: int) -> int:
+    """Counts one delivery of a task message and returns how many there have been."""
+    key = _deliveries_key(task_name, task_id, retries)
+    pipe = redis_client.pipeline()
+    pipe.incr(key)
+    # Redeliveries of a lost task come a visibility timeout apart
+    pipe.expire(key, settings.broker_visibility_timeout_seconds * (settings.task_max_deliveries + 1))
+    deliveries, _ = pipe.execute()
+    return deliveries
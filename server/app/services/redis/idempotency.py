@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+from typing import Callable, Optional
+
+from app.config import settings
+from app.services.redis.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tts:submit"
+
+# Keys hold "<task_id>|<payload fingerprint>". Only touch a key while it still points at the
+# task we are finishing, so a newer submission that replaced a stale mapping is never cut short.
+_COMPARE_AND_EXPIRE = redis_client.register_script("""
+local value = redis.call('GET', KEYS[1])
+if value and (value == ARGV[1] or string.sub(value, 1, #ARGV[1] + 1) == ARGV[1] .. '|') then
+    if tonumber(ARGV[2]) > 0 then
+        return redis.call('EXPIRE', KEYS[1], ARGV[2])
+    end
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+class IdempotencyKeyConflict(Exception):
+    """An Idempotency-Key was reused with a different payload than the task it is bound to."""
+
+    def __init__(self, task_id: str):
+        super().__init__(f"Idempotency-Key is bound to task {task_id}, submitted with a different payload")
+        self.task_id = task_id
+
+
+class ClaimContended(Exception):
+    """Concurrent submissions kept replacing a stale claim on a key; the client should retry."""
+
+    def __init__(self, key: str):
+        super().__init__(f"Submission key {key} is being claimed concurrently")
+        self.key = key
+
+
+def payload_fingerprint(payload: dict) -> str:
+    """Stable SHA-256 of a JSON-serializable submission payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def coalescing_keys(fingerprint: str, idempotency_key: Optional[str] = None) -> list[str]:
+    """Redis keys under which a submission (by `payload_fingerprint`) is registered while its task is in flight."""
+    keys = []
+    if idempotency_key:
+        key_hash = hashlib.sha256(idempotency_key.encode("utf-8")).hexdigest()
+        keys.append(f"{KEY_PREFIX}:key:{key_hash}")
+    keys.append(f"{KEY_PREFIX}:payload:{fingerprint}")
+    return keys
+
+
+def _task_keys_set(task_id: str) -> str:
+    return f"{KEY_PREFIX}:task:{task_id}"
+
+
+def _claiming_marker(task_id: str) -> str:
+    return f"{KEY_PREFIX}:claiming:{task_id}"
+
+
+def _enqueued_marker(task_id: str) -> str:
+    return f"{KEY_PREFIX}:enqueued:{task_id}"
+
+
+def claim_task(keys: list[str], task_id: str, fingerprint: str, is_stale: Callable[[str], bool]) -> Optional[str]:
+    """
+    Registers `task_id` under every key unless another live task already holds one of them.
+
+    Args:
+        keys: Keys from `coalescing_keys`, most specific first.
+        task_id: The ID the new task will be sent with.
+        fingerprint: `payload_fingerprint` of the submission.
+        is_stale: Returns True for a task ID that should not absorb new submissions
+            (e.g. it failed or was revoked); its keys are taken over.
+
+    Returns:
+        The ID of the existing task the submission should attach to, or None if `task_id`
+        now owns all keys and the caller should enqueue it (and then call `mark_enqueued`).
+
+    Raises:
+        IdempotencyKeyConflict: The Idempotency-Key is bound to a task with another payload.
+        ClaimContended: A key changed hands on every attempt to claim it.
+    """
+    ttl = settings.idempotency_inflight_ttl_seconds
+    value = f"{task_id}|{fingerprint}"
+    # Until the task is marked enqueued, duplicates may attach to it; if that never happens
+    # (the API died mid-submission), it counts as stale once the grace period is over
+    redis_client.set(_claiming_marker(task_id), 1, ex=settings.idempotency_enqueue_grace_seconds)
+    claimed = []
+    for key in keys:
+        # Two attempts: the holder may expire or go stale between SET and GET
+        for _ in range(2):
+            if redis_client.set(key, value, nx=True, ex=ttl):
+                claimed.append(key)
+                break
+            existing = redis_client.get(key)
+            if existing is None:
+                continue
+            existing_task_id, _, existing_fingerprint = existing.partition("|")
+            if key.startswith(f"{KEY_PREFIX}:key:") and existing_fingerprint and existing_fingerprint != fingerprint:
+                _release_claimed(task_id, claimed)
+                raise IdempotencyKeyConflict(existing_task_id)
+            if is_stale(existing_task_id):
+                logger.info(f"Replacing stale task {existing_task_id} for submission key {key}")
+                _COMPARE_AND_EXPIRE(keys=[key], args=[existing_task_id, 0])
+                continue
+            _release_claimed(task_id, claimed)
+            return existing_task_id
+        else:
+            # Another submission replaced the stale holder first on both attempts; enqueueing
+            # without holding the key would let it and this one run the same job twice
+            _release_claimed(task_id, claimed)
+            raise ClaimContended(key)
+
+    if claimed:
+        pipe = redis_client.pipeline()
+        pipe.sadd(_task_keys_set(task_id), *claimed)
+        pipe.expire(_task_keys_set(task_id), ttl)
+        pipe.execute()
+    return None
+
+
+def _release_claimed(task_id: str, claimed: list[str]) -> None:
+    for owned in claimed:
+        _COMPARE_AND_EXPIRE(keys=[owned], args=[task_id, 0])
+    redis_client.delete(_claiming_marker(task_id))
+
+
+def mark_enqueued(task_id: str) -> None:
+    """Records that `task_id` was handed to the broker, so a PENDING state means it is queued."""
+    pipe = redis_client.pipeline()
+    pipe.set(_enqueued_marker(task_id), 1, ex=settings.idempotency_inflight_ttl_seconds)
+    pipe.delete(_claiming_marker(task_id))
+    pipe.execute()
+
+
+def never_enqueued(task_id: str) -> bool:
+    """
+    True for a claimed task that isn't being enqueued and never was: its submission failed, or
+    the API died before sending it. Duplicates must not attach to it.
+    """
+    return not redis_client.exists(_enqueued_marker(task_id), _claiming_marker(task_id))
+
+
+def abandon_task(task_id: str) -> None:
+    """
+    Called when a claimed task will never run (admission refused it, or it could not be
+    enqueued). Every key is dropped, Idempotency-Keys included, so a retry with the same key
+    submits afresh instead of attaching to a task that doesn't exist.
+    """
+    _release_claimed(task_id, list(redis_client.smembers(_task_keys_set(task_id))))
+    redis_client.delete(_task_keys_set(task_id), _enqueued_marker(task_id))
+
+
+def release_task(task_id: str) -> None:
+    """
+    Called once a task has finished. Payload hashes are dropped so later identical requests
+    synthesize again, while client Idempotency-Keys keep answering for the configured TTL.
+    """
+    keys = redis_client.smembers(_task_keys_set(task_id))
+    for key in keys:
+        ttl = settings.idempotency_key_ttl_seconds if key.startswith(f"{KEY_PREFIX}:key:") else 0
+        _COMPARE_AND_EXPIRE(keys=[key], args=[task_id, ttl])
+    redis_client.delete(_task_keys_set(task_id), _claiming_marker(task_id), _enqueued_marker(task_id))
@@ -0,0 +1,74 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.utils.scheduling import ENQUEUED_AT_HEADER, TIERS, tier_queue
+
+logger = logging.getLogger(__name__)
+
+# Celery's Redis broker keeps each queue as a list that workers BRPOP from the right, so the
+# tail is the oldest message and the next one served. Moves tail messages of KEYS[1] that were
+# queued before the cutoff to the tail of KEYS[2], i.e. to the front of the next tier up, and
+# stops at the first younger message (or one without the header). Returns how many moved.
+_PROMOTE_SCRIPT = """
+local moved = 0
+while moved < tonumber(ARGV[3]) do
+    local raw = redis.call('LINDEX', KEYS[1], -1)
+    if not raw then
+        break
+    end
+    local ok, message = pcall(cjson.decode, raw)
+    local headers = ok and type(message) == 'table' and message['headers']
+    local enqueued_at = type(headers) == 'table' and tonumber(headers[ARGV[1]])
+    if not enqueued_at or enqueued_at > tonumber(ARGV[2]) then
+        break
+    end
+    redis.call('RPUSH', KEYS[2], redis.call('RPOP', KEYS[1]))
+    moved = moved + 1
+end
+return moved
+"""
+
+broker_client = redis.Redis.from_url(str(settings.celery_broker_url))
+_PROMOTE = broker_client.register_script(_PROMOTE_SCRIPT)
+
+
+def promote_aged_jobs(now: Optional[float] = None) -> int:
+    """
+    Moves jobs that have waited longer than `scheduling_aging_seconds` one tier up, to the
+    front of that tier. Workers drain tiers strictly in order, so without this a steady stream
+    of short jobs could hold long ones back indefinitely. Higher tiers are swept first, so a
+    job climbs at most one tier per sweep.
+    """
+    cutoff = (now or time.time()) - settings.scheduling_aging_seconds
+    moved = 0
+    for higher, lower in zip(TIERS, TIERS[1:]):
+        moved += _PROMOTE(
+            keys=[tier_queue(lower), tier_queue(higher)],
+            args=[ENQUEUED_AT_HEADER, cutoff, settings.scheduling_aging_batch],
+        )
+    return moved
+
+
+def _sweep_forever():
+    while True:
+        time.sleep(settings.scheduling_aging_interval_seconds)
+        try:
+            moved = promote_aged_jobs()
+        except RedisError as e:
+            logger.warning(f"Queue aging sweep failed: {e}")
+            continue
+        if moved:
+            logger.info(f"Promoted {moved} long-waiting jobs to a higher tier")
+
+
+def start_aging_sweeper() -> None:
+    """Runs the sweep in a daemon thread; one per worker host is plenty, more are harmless."""
+    if settings.scheduling_aging_seconds is None:
+        return
+    threading.Thread(target=_sweep_forever, name="queue-aging", daemon=True).start()
@@ -0,0 +1,99 @@
+# caption_pipeline.py
+"""
+Captions chunks of a long-form job while the next chunks are still being synthesized.
+
+The synthesis loop hands each finished chunk to `CaptionPipeline.submit`; a single consumer
+thread transcribes chunks in order from a bounded queue. The bound keeps memory flat when
+captioning is slower than synthesis: `submit` blocks until the consumer catches up, so at most
+`max_pending` chunks of audio wait in the queue.
+"""
+import contextvars
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from app.services.subtitles.caption_renderer import concatenate_word_timings
+
+logger = logging.getLogger(__name__)
+
+# (index, samples, sample_rate) -> word timings for that chunk
+ChunkTranscriber = Callable[[int, np.ndarray, int], dict]
+
+_DONE = object()
+
+
+class CaptionPipeline:
+    def __init__(self, transcribe: ChunkTranscriber, max_pending: int = 2):
+        self._transcribe = transcribe
+        self._queue: queue.Queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._timings: dict[int, dict] = {}
+        self._lengths: list[int] = []
+        self.sample_rate: Optional[int] = None
+        self.first_chunk: Optional[np.ndarray] = None
+        self._error: Optional[BaseException] = None
+        self._aborted = False
+        # In the task's context, so the models it loads are leased to the task (see ResidentModels)
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,), name="caption-pipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, index: int, samples: np.ndarray, sample_rate: int) -> None:
+        """
+        Queues a rendered chunk, blocking while `max_pending` chunks are already waiting. Chunks
+        are transcribed in submission order; `finish` expects indices 0, 1, 2, ...
+        """
+        if not self._lengths:
+            self.first_chunk = samples
+        self._lengths.append(len(samples))
+        self.sample_rate = sample_rate
+        self._queue.put((index, samples, sample_rate))
+
+    @property
+    def submitted(self) -> int:
+        return len(self._lengths)
+
+    def wait(self) -> dict[int, dict]:
+        """Waits for the queued chunks and returns their word timings by index; raises the first error, if any."""
+        self._queue.put(_DONE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._timings
+
+    def finish(self, leading_trim_seconds: float = 0.0) -> dict:
+        """
+        Waits for chunks 0..n-1 and joins their word timings, offsetting each chunk by the length
+        of the chunks before it, less any leading silence post-processing trimmed off.
+        """
+        self.wait()
+        starts = np.concatenate([[0], np.cumsum(self._lengths[:-1])]) / self.sample_rate - leading_trim_seconds
+        return concatenate_word_timings([self._timings[i] for i in range(len(self._lengths))], starts.tolist())
+
+    def abort(self) -> None:
+        """Drops queued chunks and stops the consumer after the chunk it is working on."""
+        if not self._thread.is_alive():
+            return
+        self._aborted = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(_DONE)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if self._aborted or self._error is not None:
+                continue  # keep draining so submit() never blocks on a dead consumer
+            index, samples, sample_rate = item
+            try:
+                self._timings[index] = self._transcribe(index, samples, sample_rate)
+            except BaseException as e:
+                logger.error(f"Captioning chunk {index} failed: {e}", exc_info=True)
+                self._error = e
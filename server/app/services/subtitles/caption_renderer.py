@@ -0,0 +1,256 @@
+# caption_renderer.py
+"""
+Renders captions from word timings. Nothing here imports Whisper or torch, so the API can
+re-render captions with new settings without loading a model or touching the audio.
+
+Word timings are stored per task in a compact form, one array per field:
+    {"version": 1, "words": [" Hello", " world."], "start": [0.0, 0.42], "end": [0.38, 0.9]}
+Words keep Whisper's leading spaces.
+"""
+import json
+import os
+from typing import Iterator, Literal, Optional
+
+WORD_TIMINGS_VERSION = 1
+
+CaptionFormat = Literal["ass", "srt", "vtt"]
+
+CAPTION_MEDIA_TYPES = {
+    "ass": "text/x-ssa",
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+}
+
+
+def word_timings_from_whisper(result: dict) -> dict:
+    """Extracts the compact word timings from a Whisper result transcribed with word_timestamps."""
+    words, starts, ends = [], [], []
+    for segment in result["segments"]:
+        for word in segment.get("words", []):
+            words.append(word["word"])
+            starts.append(round(float(word["start"]), 3))
+            ends.append(round(float(word["end"]), 3))
+    return {"version": WORD_TIMINGS_VERSION, "words": words, "start": starts, "end": ends}
+
+
+def concatenate_word_timings(timings: list[dict], offsets: list[float]) -> dict:
+    """Joins per-chunk word timings into one, shifting each by its chunk's offset in seconds."""
+    words, starts, ends = [], [], []
+    for chunk, offset in zip(timings, offsets):
+        words.extend(chunk["words"])
+        starts.extend(round(max(t + offset, 0.0), 3) for t in chunk["start"])
+        ends.extend(round(max(t + offset, 0.0), 3) for t in chunk["end"])
+    return {"version": WORD_TIMINGS_VERSION, "words": words, "start": starts, "end": ends}
+
+
+def word_timings_path(subtitle_path) -> str:
+    """Where `SubtitleGenerator.generate_subtitles` writes the word timings for a subtitle file."""
+    return os.path.splitext(str(subtitle_path))[0] + ".words.json"
+
+
+def dumps_word_timings(timings: dict) -> str:
+    return json.dumps(timings, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads_word_timings(data) -> dict:
+    timings = json.loads(data)
+    if timings.get("version") != WORD_TIMINGS_VERSION:
+        raise ValueError(f"Unsupported word timings version: {timings.get('version')}")
+    return timings
+
+
+class SubtitleBlock:
+    def __init__(self, max_line_count, max_line_length):
+        self.max_line_count = max_line_count
+        self.max_line_length = max_line_length
+        self.block_start = None
+        self.block_end = None
+        self.lines = [[] for _ in range(max_line_count)]
+        self.current_line = 0
+        self.delay = 0.0  # delay in seconds
+        self.words = []  # Store word-level details (for animations)
+
+    def add_word(self, word_timed):
+        word = word_timed["word"]
+        word_start = word_timed["start"]
+        word_end = word_timed["end"]
+
+        if self.block_start is None:
+            self.block_start = word_start
+        self.block_end = word_end  # Update end time
+
+        # Check for line length and manage hyphenation
+        current_line_length = sum(len(w["word"]) for w in self.lines[self.current_line])
+        if current_line_length + len(word) > self.max_line_length and word[0] != "-":
+            if self.current_line + 1 < self.max_line_count:
+                self.current_line += 1
+            else:
+                return False  # Block is full
+
+        # Add word to the current line
+        self.lines[self.current_line].append(
+            {"word": word, "start": word_start, "end": word_end}
+        )
+        self.words.append(
+            {
+                "word": word,
+                "start": word_start,
+                "end": word_end,
+                "line": self.current_line,
+            }
+        )
+        return True
+
+    def is_complete_before(self, word_timed) -> bool:
+        """Indicate if the upcoming word won't fit and a new block should be started"""
+        word = word_timed["word"]
+        current_line_length = sum(len(w["word"]) for w in self.lines[self.current_line])
+        if current_line_length + len(word) > self.max_line_length and word[0] != "-":
+            if self.current_line + 1 >= self.max_line_count:
+                return True
+        return False
+
+    def plain_lines(self) -> list[str]:
+        return ["".join(w["word"] for w in line).strip() for line in self.lines if line]
+
+    def do_yield(self, formatter, caption_settings: dict):
+        delayed_start = self.block_start + self.delay
+        delayed_end = self.block_end + self.delay
+
+        primary_colour = caption_settings.get("primary_colour", "&H00FFFFFF")
+        secondary_colour = caption_settings.get("secondary_colour", "&H00FF0000")
+
+        default_color = f"\\1c&{primary_colour[4:]}"
+        effect_color = f"\\1c&{secondary_colour[4:]}"
+
+        blocktext = ""
+        for line_num, line in enumerate(self.lines):
+            animated_line = ""
+            for word_data in line:
+                word = word_data["word"]
+                word_start = max(word_data["start"] + self.delay - delayed_start, 0.001)
+                word_end = max(
+                    word_data["end"] + self.delay - delayed_start, word_start
+                )
+
+                word_start = int(word_start * 1000)  # Convert to ms
+                word_end = int(word_end * 1000)  # Convert to ms
+
+                effect_str = "{"
+                effect_str += default_color
+                effect_str += f"\\t({word_start},{word_start},{effect_color})"
+                effect_str += f"\\t({word_end},{word_end},{default_color})"
+                effect_str += "}"
+
+                animated_line += f"{effect_str}{word} "
+
+            blocktext += animated_line.strip() + r"\N"  # Use \N for new line
+
+        blocktext = blocktext.rstrip(r"\N")  # Remove trailing \N
+        yield formatter(delayed_start), formatter(delayed_end), blocktext
+
+
+def iterate_blocks(timings: dict, max_line_count: int, max_line_length: int) -> Iterator[SubtitleBlock]:
+    """Groups words into caption blocks of at most `max_line_count` lines of `max_line_length` chars."""
+    block = SubtitleBlock(max_line_count, max_line_length)
+    for word, start, end in zip(timings["words"], timings["start"], timings["end"]):
+        word_timed = {"word": word, "start": start, "end": end}
+        if block.is_complete_before(word_timed):
+            yield block
+            block = SubtitleBlock(max_line_count, max_line_length)
+        block.add_word(word_timed)
+    if block.block_start is not None:
+        yield block
+
+
+def format_ass_timestamp(seconds):
+    """Converts time in seconds to ASS timestamp format (H:MM:SS.CS)."""
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    cs = int((seconds % 1) * 100)  # Convert fractional part to centiseconds
+    return f"{h}:{m:02}:{s:02}.{cs:02}"
+
+
+def _format_timestamp(seconds: float, decimal_marker: str) -> str:
+    milliseconds = int(round(seconds * 1000))
+    h, milliseconds = divmod(milliseconds, 3_600_000)
+    m, milliseconds = divmod(milliseconds, 60_000)
+    s, milliseconds = divmod(milliseconds, 1000)
+    return f"{h:02}:{m:02}:{s:02}{decimal_marker}{milliseconds:03}"
+
+
+def render_ass(timings: dict, caption_settings: dict) -> str:
+    """
+    Renders an .ass script with per-word karaoke colour changes, using the font and style
+    from caption_settings.
+    """
+    # Extract and format settings from caption_settings
+    font_name = caption_settings.get("font_name", "Arial")
+    font_size = caption_settings.get("font_size", 50)
+    primary_colour = caption_settings.get("primary_colour", "&H00FFFFFF")
+    secondary_colour = caption_settings.get("secondary_colour", "&H00000000")
+    outline_colour = caption_settings.get("outline_colour", "&H00000000")
+    back_colour = caption_settings.get("back_colour", "&H00000000")
+    bold = caption_settings.get("bold", 0)
+    italic = caption_settings.get("italic", 0)
+    underline = caption_settings.get("underline", 0)
+    strikeout = caption_settings.get("strikeout", 0)
+    border_style = caption_settings.get("border_style", 1)
+    outline = caption_settings.get("outline", 1)
+    shadow = caption_settings.get("shadow", 0)
+    alignment = caption_settings.get("alignment", 5)
+    playres_x = caption_settings.get("playres_x", 1080)
+    playres_y = caption_settings.get("playres_y", 1920)
+
+    parts = [
+        "[Script Info]\n",
+        "Title: Generated Subtitles with Animation\n",
+        "ScriptType: v4.00+\n",
+        f"PlayResX: {playres_x}\n",
+        f"PlayResY: {playres_y}\n",
+        "Timer: 100.0000\n\n",
+        "[V4+ Styles]\n",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n",
+        f"Style: Default,{font_name},{font_size},{primary_colour},{secondary_colour},{outline_colour},{back_colour},{bold},{italic},{underline},{strikeout},100,100,0,0,{border_style},{outline},{shadow},{alignment},0,0,0,1\n\n",
+        "[Events]\n",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n",
+    ]
+    for block in _blocks(timings, caption_settings):
+        for start, end, text in block.do_yield(format_ass_timestamp, caption_settings):
+            parts.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
+    return "".join(parts)
+
+
+def render_srt(timings: dict, caption_settings: dict) -> str:
+    parts = []
+    for index, block in enumerate(_blocks(timings, caption_settings), start=1):
+        start = _format_timestamp(block.block_start, ",")
+        end = _format_timestamp(block.block_end, ",")
+        parts.append(f"{index}\n{start} --> {end}\n" + "\n".join(block.plain_lines()) + "\n\n")
+    return "".join(parts)
+
+
+def render_vtt(timings: dict, caption_settings: dict) -> str:
+    parts = ["WEBVTT\n\n"]
+    for block in _blocks(timings, caption_settings):
+        start = _format_timestamp(block.block_start, ".")
+        end = _format_timestamp(block.block_end, ".")
+        parts.append(f"{start} --> {end}\n" + "\n".join(block.plain_lines()) + "\n\n")
+    return "".join(parts)
+
+
+RENDERERS = {"ass": render_ass, "srt": render_srt, "vtt": render_vtt}
+
+
+def render_captions(timings: dict, caption_settings: Optional[dict], caption_format: CaptionFormat = "ass") -> str:
+    """Renders word timings as an ASS, SRT or WebVTT document."""
+    return RENDERERS[caption_format](timings, caption_settings or {})
+
+
+def _blocks(timings: dict, caption_settings: dict) -> Iterator[SubtitleBlock]:
+    return iterate_blocks(
+        timings,
+        caption_settings.get("max_line_count") or 1,
+        caption_settings.get("max_line_length") or 20,
+    )
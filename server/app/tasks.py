@@ -1,36 +1,65 @@
 # app/tasks.py
 from typing import Dict, Optional
-from celery import Task, states
+from celery import Task, chord, group, states
 from celery.result import AsyncResult
 from celery.exceptions import Ignore
+from celery.worker import state as worker_state
 from pathlib import Path
+from minio.error import S3Error
+from redis.exceptions import RedisError
+import numpy as np
+import io
+import json
+import time
 import logging
-import gc
-import os
 
 
-from app.audio_module.pyttsx_module import PyttsxModule
-from app.audio_module.kokoro_module import KokoroAudio
-from app.audio_module.chatterbox_module import ChatterboxModule
+from app.audio_module.audio_module import ChunkSynthesisError, SynthesisCancelled, save_audio
+from app.audio_module.engine_registry import engine_default_subtype, get_audio_engine, get_subtitle_generator, is_supported_engine
 from app.celery_worker import celery_app
 from app.config import settings
 from app.services.minio.minio_client import minio_client, minio_public_endpoint, bucket_name
-from app.services.subtitles.subtitle_generator import SubtitleGenerator
+from app.services.minio.chunk_store import ChunkCheckpointStore, render_fingerprint, text_hash
+from app.services.minio.text_store import chunk_refs, delete_text, load_text
+from app.services.redis.idempotency import release_task
+from app.services.redis.admission import record_throughput, release_admission
+from app.services.redis.cancellation import clear_cancellation, is_cancellation_requested
+from app.services.redis.deliveries import DeliveryLimitExceeded, record_delivery
+from app.services.subtitles.caption_pipeline import CaptionPipeline
+from app.services.subtitles.caption_renderer import (
+    concatenate_word_timings,
+    dumps_word_timings,
+    loads_word_timings,
+    render_captions,
+    word_timings_path,
+)
 from app.schemas import CaptionSettings
+from app.utils.audio_processing import level_chunks, resample, silence_bounds, to_mono_float32
+from app.utils.scheduling import ENQUEUED_AT_HEADER, enqueue_headers
+from app.utils.timeline import TaskTimeline, export_trace, span
 from app.utils.webhook import send_webhook_task
 
 logger = logging.getLogger(__name__)
 
+# Script segments come from several engines, so their checkpoints share one fingerprint; each
+# entry is still tied to its segment text
+SCRIPT_FINGERPRINT = render_fingerprint("script", None)
+
 
 @celery_app.task(bind=True, name='app.tasks.generate_audio_task', acks_late=True)
 def generate_audio_task(
-    self: Task, 
-    engine: str, 
-    text: str, 
-    engine_options: Optional[Dict], 
-    output_format: str, 
+    self: Task,
+    engine: str,
+    text: Optional[str],
+    engine_options: Optional[Dict],
+    output_format: str,
     caption_settings: Optional[CaptionSettings],
-    webhook_url: Optional[str] = None
+    webhook_url: Optional[str] = None,
+    post_processing: Optional[Dict] = None,
+    distributed: bool = False,
+    base_task_id: Optional[str] = None,
+    editable: bool = False,
+    text_ref: Optional[Dict] = None
 ):
     task_id = self.request.id
     logger.info(f"[Task {task_id}] Received task - Engine: {engine}, Format: {output_format}")
@@ -44,28 +73,32 @@ def generate_audio_task(
 
     result = {
         "output_url": None,
+        "output_object": None,
         "subtitle_url": None,
+        "subtitle_object": None,
         "engine": engine,
         "format": file_extension
     }
 
-    audio_engine = None
     audio_result = None
+    checkpoint = None
+    chunks = None
+    caption_pipeline = None
+    timeline = _task_timeline(self)
+    # Revisions of an editable job keep their chunks too, so they can be edited again
+    keep_checkpoint = editable or bool(base_task_id)
+    # Set when the job continues in another task (a retry or a chord) that will finish it
+    handed_off = False
+
+    def cancel_check() -> bool:
+        return task_id in worker_state.revoked or is_cancellation_requested(task_id)
 
     try:
+        _check_deliveries(self)
         self.update_state(state=states.STARTED)
         logger.info(f"[Task {task_id}] Generating audio with engine: {engine}")
-                
-        if engine == "pyttsx3":
-            audio_engine = PyttsxModule()
-            audio_engine.generate_audio(text, output_path.as_posix(), engine_options)
-        elif engine == "kokoro":
-            audio_engine = KokoroAudio()
-            audio_result = audio_engine.generate_audio(text, output_path.as_posix(), voice_settings=engine_options)
-        elif engine == "chatterbox":
-            chatterbox_engine = ChatterboxModule()
-            audio_result = chatterbox_engine.generate_audio(text, output_path.as_posix(), voice_settings=engine_options)
-        else:
+
+        if not is_supported_engine(engine):
             logger.error(f"[Task {task_id}] Unsupported engine specified: {engine}")
             self.update_state(
                 state=states.FAILURE,
@@ -73,6 +106,60 @@ def generate_audio_task(
             )
             raise Ignore()
 
+        if cancel_check():
+            raise SynthesisCancelled("Cancelled before synthesis started")
+
+        if text_ref:
+            # Long texts are stored in MinIO by the API rather than sent in the message
+            with timeline.span("text_load"):
+                text = load_text(text_ref)
+
+        with timeline.span("model_acquire"):
+            audio_engine = get_audio_engine(engine)
+
+        if base_task_id and audio_engine.supports_chunking and audio_engine.supports_checkpoints:
+            checkpoint = ChunkCheckpointStore(task_id, render_fingerprint(engine, engine_options))
+            with timeline.span("chunk_reuse"):
+                chunks, result["reused_chunks"] = _reuse_base_chunks(base_task_id, checkpoint, audio_engine, text)
+            result["base_task_id"] = base_task_id
+
+        if audio_engine.supports_chunking and not chunks:
+            # Split once: fan-out, caption pipelining and synthesis all work from these chunks
+            with timeline.span("chunking"):
+                chunks = audio_engine.split_text(text)
+
+        if distributed and audio_engine.supports_chunking and len(chunks) > 1:
+            logger.info(f"[Task {task_id}] Fanning out {len(chunks)} chunks across workers")
+            handed_off = True
+            return _replace_with_chord(self, _fan_out_signature(
+                task_id, engine, chunks, engine_options, output_format, caption_settings, webhook_url, post_processing,
+                tier=_tier_options(self), parent_timeline=timeline.as_dict(), keep_checkpoint=keep_checkpoint,
+                text_ref=text_ref, chunk_text_refs=chunk_refs(text_ref, text, chunks) if text_ref else None
+            ))
+
+        if checkpoint is None and audio_engine.supports_chunking and audio_engine.supports_checkpoints and len(chunks) > 1:
+            # Only multi-chunk jobs have anything to resume; the rest skip the manifest read
+            checkpoint = ChunkCheckpointStore(task_id, render_fingerprint(engine, engine_options))
+
+        if caption_settings and settings.pipelined_captions and audio_engine.supports_chunking and len(chunks) > 1:
+            # Caption each chunk while the next one is synthesized
+            caption_pipeline = CaptionPipeline(
+                lambda index, samples, sample_rate: _chunk_word_timings(checkpoint, index, samples, sample_rate, timeline),
+                max_pending=settings.caption_pipeline_max_pending,
+            )
+        audio_result = audio_engine.generate_audio(
+            text,
+            output_path.as_posix(),
+            engine_options,
+            post_processing=post_processing,
+            cancel_check=cancel_check,
+            checkpoint=checkpoint,
+            chunk_callback=caption_pipeline.submit if caption_pipeline else None,
+            timeline=timeline,
+            chunks=chunks,
+        )
+        _record_throughput(engine, timeline)
+
         if not output_path.is_file():
             logger.error(f"[Task {task_id}] Output file not found after generation: {output_path}")
             self.update_state(
@@ -81,22 +168,25 @@ def generate_audio_task(
             )
             raise Ignore()
 
-        minio_client.fput_object(bucket_name, output_filename, output_path.as_posix())
-        output_url = f"{minio_public_endpoint}/{bucket_name}/{output_filename}"
-
-        result["output_url"] = output_url
+        with timeline.span("upload"):
+            result["output_url"], result["output_object"] = _upload_audio(output_path, file_extension)
         result["audio_duration"] = audio_result.length
 
         # TODO: Add caption generation logic here
         if caption_settings:
-            subtitle_generator = None
             try:
-                subtitle_generator = SubtitleGenerator()
-                subtitle_path = output_path.with_suffix('.ass')
-                subtitle_generator.generate_subtitles(output_path.as_posix(), subtitle_path, caption_settings)
-                minio_client.fput_object(bucket_name, subtitle_path.name, subtitle_path.as_posix())
-                subtitle_url = f"{minio_public_endpoint}/{bucket_name}/{subtitle_path.name}"
-                result["subtitle_url"] = str(subtitle_url)
+                caption_start = time.time()
+                if caption_pipeline and caption_pipeline.submitted:
+                    chunk_rate = caption_pipeline.sample_rate
+                    first_chunk = level_chunks([caption_pipeline.first_chunk], chunk_rate, post_processing)[0]
+                    timings = caption_pipeline.finish(_leading_trim_seconds(first_chunk, chunk_rate, post_processing))
+                # Transcribe the samples we just wrote rather than decoding the file again
+                elif audio_result.samples is not None:
+                    timings = get_subtitle_generator().transcribe_word_timings(audio_result.samples, audio_result.sample_rate)
+                else:
+                    timings = get_subtitle_generator().transcribe_word_timings(output_path.as_posix())
+                _store_captions(output_path.stem, timings, caption_settings, result)
+                timeline.add("captioning", caption_start, time.time())
             except Exception as e:
                 logger.error(f"[Task {task_id}] Subtitle generation failed: {e}", exc_info=True)
                 self.update_state(
@@ -104,13 +194,9 @@ def generate_audio_task(
                     meta={'exc_type': type(e).__name__, 'exc_message': str(e)}
                 )
                 Ignore()
-            finally:
-                if subtitle_generator:
-                    subtitle_generator.unload_model()
-                    del subtitle_generator
-                    gc.collect()
-        
+
         logger.info(f"[Task {task_id}] Task completed successfully. Output: {output_path}")
+        result["timeline"] = timeline.summary(len(text), result["audio_duration"])
         self.update_state(
             state=states.SUCCESS,
             meta=result
@@ -119,6 +205,26 @@ def generate_audio_task(
     except Ignore:
         raise
 
+    except SynthesisCancelled as exc:
+        logger.info(f"[Task {task_id}] {exc}; stopping without unloading models")
+        self.update_state(
+            state=states.REVOKED,
+            meta={'exc_type': 'TaskRevokedError', 'exc_message': str(exc)}
+        )
+        raise Ignore()
+
+    except ChunkSynthesisError as exc:
+        if self.request.retries >= settings.chunk_max_retries:
+            logger.error(f"[Task {task_id}] {exc}; giving up after {self.request.retries} retries", exc_info=True)
+            self.update_state(
+                state=states.FAILURE,
+                meta={'exc_type': type(exc.__cause__).__name__, 'exc_message': str(exc)}
+            )
+            raise
+        logger.warning(f"[Task {task_id}] {exc}; retrying from checkpoint ({self.request.retries + 1}/{settings.chunk_max_retries})")
+        handed_off = True
+        raise self.retry(exc=exc, countdown=settings.chunk_retry_delay_seconds, max_retries=settings.chunk_max_retries)
+
     except Exception as exc:
         logger.error(f"[Task {task_id}] Unhandled exception in generate_audio_task: {exc}", exc_info=True)
         self.update_state(
@@ -131,29 +237,739 @@ def generate_audio_task(
         )
         raise
     finally:
-        logger.info(f"[Task {task_id}] Cleaning up resources and sending webhook")
-        logger.info(f"Worker CMD: {Path.cwd()}")
-        # Delete local file after successful upload to MinIO
-        if output_path:
-            try:
-                output_path.unlink()
-                logger.info(f"[Task {task_id}] Deleted local file {output_path}")
-            except Exception as e:
-                logger.error(f"[Task {task_id}] Failed to delete local file {output_path}: {e}", exc_info=True)
-
-        if audio_engine:
-            del audio_engine
-            gc.collect()
-
-        if webhook_url:
-            current_task_state = AsyncResult(task_id)
-            payload = {
-                "task_id": task_id,
-                "task_state": current_task_state.state,
-                "task_info": current_task_state.info,
-                "result": result
-            }
+        if caption_pipeline:
+            caption_pipeline.abort()
+        if handed_off:
+            # Keep checkpoints, submission keys and the webhook for whoever finishes the job
+            output_path.unlink(missing_ok=True)
+        else:
+            _finalize_task(task_id, result, output_path, checkpoint, webhook_url, timeline, keep_checkpoint, text_ref)
+
+    return result
+
+
+@celery_app.task(bind=True, name='app.tasks.synthesize_chunk_task', acks_late=True)
+def synthesize_chunk_task(
+    self: Task,
+    engine: str,
+    text: Optional[str],
+    engine_options: Optional[Dict],
+    parent_task_id: str,
+    index: int,
+    caption_settings: Optional[Dict] = None,
+    text_ref: Optional[Dict] = None,
+    record_text: bool = False
+):
+    """
+    Renders one chunk of a distributed job into the parent task's checkpoint store (and, with
+    captions, its word timings). Returns the chunk's manifest entry for the merge step, with the
+    chunk text only when `record_text` (the checkpoint is kept for revisions), as the merge
+    step's arguments would otherwise hold the whole text again.
+    """
+    logger.info(f"[Task {parent_task_id}] Chunk {index} picked up by {self.request.hostname}")
+    _check_deliveries(self)
+    if is_cancellation_requested(parent_task_id):
+        return {"index": index, "cancelled": True}
+
+    # Queue wait is measured by the merge step, from when the job fanned out
+    timeline = TaskTimeline()
+    if text_ref:
+        with timeline.span("text_load", chunk=index):
+            text = load_text(text_ref)
+    checkpoint = ChunkCheckpointStore(parent_task_id, render_fingerprint(engine, engine_options))
+    with timeline.span("checkpoint_load", chunk=index):
+        stored = checkpoint.load(index, text)
+    if stored is not None:
+        samples, sample_rate = stored
+    else:
+        try:
+            with timeline.span("model_acquire", chunk=index):
+                synthesize = get_audio_engine(engine).chunk_synthesizer(engine_options)
+            with timeline.span("synthesis", chunk=index, chars=len(text)):
+                samples, sample_rate = synthesize(text)
+            _record_throughput(engine, timeline)
+        except Exception as exc:
+            logger.warning(f"[Task {parent_task_id}] Chunk {index} failed: {exc}; retrying")
+            raise self.retry(exc=exc, countdown=settings.chunk_retry_delay_seconds, max_retries=settings.chunk_max_retries)
+        samples = to_mono_float32(samples)
+        with timeline.span("checkpoint_save", chunk=index):
+            checkpoint.save(index, text, samples, sample_rate)
+
+    if caption_settings and not checkpoint.has_object(checkpoint.word_timings_object(index)):
+        with timeline.span("transcription", chunk=index):
+            _transcribe_chunk(checkpoint, index, samples, sample_rate)
+
+    entry = {
+        "index": index,
+        "text_sha256": text_hash(text),
+        "object": checkpoint.chunk_object(index),
+        "samples": int(len(samples)),
+        "sample_rate": int(sample_rate),
+        "chars": len(text),
+        "reused": stored is not None,
+        "timeline": timeline.as_dict(),
+    }
+    if record_text:
+        entry["text"] = text
+    return entry
+
+
+@celery_app.task(bind=True, name='app.tasks.merge_chunks_task', acks_late=True)
+def merge_chunks_task(
+    self: Task,
+    chunk_results: list[Dict],
+    engine: str,
+    engine_options: Optional[Dict],
+    output_format: str,
+    caption_settings: Optional[Dict],
+    webhook_url: Optional[str] = None,
+    post_processing: Optional[Dict] = None,
+    parent_timeline: Optional[Dict] = None,
+    keep_checkpoint: bool = False,
+    text_ref: Optional[Dict] = None
+):
+    """
+    Chord body of a distributed job. Runs under the original task ID (via `Task.replace`),
+    concatenates the chunk audio in order, stitches per-chunk word timings into captions and
+    publishes the result, with a timeline joining the fan-out, the chunks and this step.
+    """
+    task_id = self.request.id
+    file_extension = output_format
+    output_path = settings.output_audio_dir / f"{task_id}.{file_extension}"
+    chunk_results = sorted(chunk_results, key=lambda chunk: chunk["index"])
+
+    result = {
+        "output_url": None,
+        "output_object": None,
+        "subtitle_url": None,
+        "subtitle_object": None,
+        "engine": engine,
+        "format": file_extension,
+        "chunks": len(chunk_results),
+        "distributed": True,
+        # Chunks taken from checkpoints (an earlier attempt, or the base task of a revision)
+        "reused_chunks": sum(1 for chunk in chunk_results if chunk.get("reused")),
+    }
+    checkpoint = ChunkCheckpointStore(task_id, render_fingerprint(engine, engine_options))
+    timeline = _joined_timeline(parent_timeline, [(chunk.get("timeline"), {"chunk": chunk["index"]}) for chunk in chunk_results])
+
+    try:
+        _check_deliveries(self)
+        if is_cancellation_requested(task_id) or any(chunk.get("cancelled") for chunk in chunk_results):
+            raise SynthesisCancelled("Cancelled while chunks were being synthesized")
+
+        checkpoint.record({
+            chunk["index"]: {key: chunk[key] for key in ("text_sha256", "object", "samples", "sample_rate", "text") if key in chunk}
+            for chunk in chunk_results
+        })
+        chunks = []
+        sample_rate = None
+        with timeline.span("checkpoint_load"):
+            for chunk in chunk_results:
+                samples, sample_rate = checkpoint.read(chunk["index"])
+                chunks.append(to_mono_float32(samples))
+
+        with timeline.span("assembly"):
+            chunks = level_chunks(chunks, sample_rate, post_processing)
+            samples = np.concatenate(chunks)
+        with timeline.span("encoding"):
+            audio_result = save_audio(samples, sample_rate, output_path.as_posix(), post_processing, engine_default_subtype(engine))
+
+        with timeline.span("upload"):
+            result["output_url"], result["output_object"] = _upload_audio(output_path, file_extension)
+        result["audio_duration"] = audio_result.length
+
+        if caption_settings:
+            with timeline.span("captioning"):
+                offsets = np.concatenate([[0], np.cumsum([len(chunk) for chunk in chunks[:-1]])]) / sample_rate
+                offsets = offsets - _leading_trim_seconds(samples, sample_rate, post_processing)
+                timings = _merge_chunk_timings(checkpoint, len(chunk_results), offsets.tolist())
+                _store_captions(output_path.stem, timings, caption_settings, result)
+
+        logger.info(f"[Task {task_id}] Merged {len(chunk_results)} distributed chunks")
+        result["timeline"] = timeline.summary(sum(chunk["chars"] for chunk in chunk_results), result["audio_duration"])
+        self.update_state(state=states.SUCCESS, meta=result)
+
+    except SynthesisCancelled as exc:
+        logger.info(f"[Task {task_id}] {exc}")
+        self.update_state(
+            state=states.REVOKED,
+            meta={'exc_type': 'TaskRevokedError', 'exc_message': str(exc)}
+        )
+        raise Ignore()
+
+    except Exception as exc:
+        logger.error(f"[Task {task_id}] Failed to merge distributed chunks: {exc}", exc_info=True)
+        self.update_state(
+            state=states.FAILURE,
+            meta={'exc_type': type(exc).__name__, 'exc_message': str(exc)}
+        )
+        raise
+    finally:
+        _finalize_task(task_id, result, output_path, checkpoint, webhook_url, timeline, keep_checkpoint, text_ref)
+
+    return result
+
+
+@celery_app.task(bind=True, name='app.tasks.generate_script_task', acks_late=True)
+def generate_script_task(
+    self: Task,
+    segments: list[Dict],
+    gap_ms: int,
+    output_format: str,
+    caption_settings: Optional[Dict],
+    webhook_url: Optional[str] = None,
+    post_processing: Optional[Dict] = None
+):
+    """
+    Entry point of a dialogue script. Replaces itself with a chord: one `synthesize_segments_task`
+    per batch of segments sharing an engine and voice, then `merge_script_task`, which assembles
+    the segments in order under this task's ID.
+    """
+    task_id = self.request.id
+    logger.info(f"[Task {task_id}] Received script - {len(segments)} segments")
+    timeline = _task_timeline(self)
+    try:
+        _check_deliveries(self)
+        unsupported = sorted({segment["engine"] for segment in segments if not is_supported_engine(segment["engine"])})
+        if unsupported:
+            raise ValueError(f"Unsupported engine(s): {', '.join(unsupported)}")
+        if is_cancellation_requested(task_id):
+            raise SynthesisCancelled("Cancelled before synthesis started")
+
+        gaps = [
+            (segment["gap_after_ms"] if segment.get("gap_after_ms") is not None else gap_ms) / 1000
+            for segment in segments
+        ]
+        batches = _script_batches(segments, settings.script_batch_max_chars)
+        logger.info(f"[Task {task_id}] Rendering {len(segments)} segments in {len(batches)} voice batches")
+        tier = _tier_options(self)
+        header = group(
+            synthesize_segments_task.s(engine, engine_options, batch, task_id, caption_settings).set(**tier)
+            for engine, engine_options, batch in batches
+        )
+        body = merge_script_task.s(
+            [segment["engine"] for segment in segments], gaps, output_format, caption_settings, webhook_url, post_processing,
+            parent_timeline=timeline.as_dict()
+        ).set(**tier)
+        body.on_error(fail_fanned_out_job_task.s(
+            SCRIPT_FINGERPRINT,
+            {"engine": "script", "format": output_format, "segments": len(segments)},
+            webhook_url,
+            parent_timeline=timeline.as_dict(),
+            chars=sum(len(segment["text"]) for segment in segments),
+        ))
+        return _replace_with_chord(self, chord(header, body))
+
+    except Ignore:
+        raise
+
+    except SynthesisCancelled as exc:
+        logger.info(f"[Task {task_id}] {exc}")
+        self.update_state(state=states.REVOKED, meta={'exc_type': 'TaskRevokedError', 'exc_message': str(exc)})
+        _finalize_task(task_id, {}, None, None, webhook_url)
+        raise Ignore()
+
+    except Exception as exc:
+        logger.error(f"[Task {task_id}] Failed to start script: {exc}", exc_info=True)
+        self.update_state(state=states.FAILURE, meta={'exc_type': type(exc).__name__, 'exc_message': str(exc)})
+        _finalize_task(task_id, {}, None, None, webhook_url)
+        if isinstance(exc, ValueError):
+            raise Ignore()
+        raise
+
+
+@celery_app.task(bind=True, name='app.tasks.synthesize_segments_task', acks_late=True)
+def synthesize_segments_task(
+    self: Task,
+    engine: str,
+    engine_options: Optional[Dict],
+    segments: list[list],
+    parent_task_id: str,
+    caption_settings: Optional[Dict] = None
+):
+    """
+    Renders a batch of script segments that share one engine and voice, so the voice is set up
+    once. Each segment is checkpointed as soon as it is done (a retry resumes from there) and,
+    with captions, transcribed on the caption pipeline while the next one is synthesized.
+    """
+    logger.info(f"[Task {parent_task_id}] {len(segments)} '{engine}' segments picked up by {self.request.hostname}")
+    _check_deliveries(self)
+    timeline = TaskTimeline()
+    checkpoint = ChunkCheckpointStore(parent_task_id, SCRIPT_FINGERPRINT)
+    with timeline.span("model_acquire"):
+        audio_engine = get_audio_engine(engine)
+        synthesize = audio_engine.chunk_synthesizer(engine_options)
+    caption_pipeline = None
+    if caption_settings:
+        caption_pipeline = CaptionPipeline(
+            lambda index, samples, sample_rate: _chunk_word_timings(checkpoint, index, samples, sample_rate, timeline),
+            max_pending=settings.caption_pipeline_max_pending,
+        )
+
+    results = []
+    try:
+        for index, text in segments:
+            if is_cancellation_requested(parent_task_id):
+                return {"segments": [{"index": index, "cancelled": True}]}
+
+            with timeline.span("checkpoint_load", segment=index):
+                stored = checkpoint.load(index, text)
+            if stored is not None:
+                samples, sample_rate = stored
+            else:
+                try:
+                    with timeline.span("synthesis", segment=index, chars=len(text)):
+                        chunks, sample_rate = audio_engine.render_chunks(audio_engine.split_text(text), synthesize)
+                except Exception as exc:
+                    logger.warning(f"[Task {parent_task_id}] Segment {index} failed: {exc}; retrying")
+                    raise self.retry(exc=exc, countdown=settings.chunk_retry_delay_seconds, max_retries=settings.chunk_max_retries)
+                samples = np.concatenate(chunks)
+                with timeline.span("checkpoint_save", segment=index):
+                    checkpoint.save(index, text, samples, sample_rate)
+
+            if caption_pipeline:
+                caption_pipeline.submit(index, samples, sample_rate)
+            results.append({
+                "index": index,
+                "text_sha256": text_hash(text),
+                "object": checkpoint.chunk_object(index),
+                "samples": int(len(samples)),
+                "sample_rate": int(sample_rate),
+                "chars": len(text),
+            })
+
+        if caption_pipeline:
+            caption_pipeline.wait()
+    finally:
+        if caption_pipeline:
+            caption_pipeline.abort()
+    _record_throughput(engine, timeline)
+    return {"segments": results, "timeline": timeline.as_dict()}
+
+
+@celery_app.task(bind=True, name='app.tasks.merge_script_task', acks_late=True)
+def merge_script_task(
+    self: Task,
+    batch_results: list[Dict],
+    engines: list[str],
+    gaps: list[float],
+    output_format: str,
+    caption_settings: Optional[Dict],
+    webhook_url: Optional[str] = None,
+    post_processing: Optional[Dict] = None,
+    parent_timeline: Optional[Dict] = None
+):
+    """
+    Chord body of a script. Brings every segment to one sample rate, joins them in script order
+    with the requested gaps, stitches per-segment word timings into captions and publishes the
+    result under the original task ID.
+    """
+    task_id = self.request.id
+    file_extension = output_format
+    output_path = settings.output_audio_dir / f"{task_id}.{file_extension}"
+    entries = sorted((entry for batch in batch_results for entry in batch["segments"]), key=lambda entry: entry["index"])
+
+    result = {
+        "output_url": None,
+        "output_object": None,
+        "subtitle_url": None,
+        "subtitle_object": None,
+        "engine": "script",
+        "engines": sorted(set(engines)),
+        "format": file_extension,
+        "segments": len(engines),
+    }
+    checkpoint = ChunkCheckpointStore(task_id, SCRIPT_FINGERPRINT)
+    timeline = _joined_timeline(
+        parent_timeline,
+        [(batch.get("timeline"), {"batch": i}) for i, batch in enumerate(batch_results)]
+    )
+
+    try:
+        _check_deliveries(self)
+        if is_cancellation_requested(task_id) or any(entry.get("cancelled") for entry in entries):
+            raise SynthesisCancelled("Cancelled while segments were being synthesized")
+
+        checkpoint.record({
+            entry["index"]: {key: entry[key] for key in ("text_sha256", "object", "samples", "sample_rate")}
+            for entry in entries
+        })
+        sample_rate = (post_processing or {}).get("sample_rate") or max(entry["sample_rate"] for entry in entries)
+        segments = []
+        with timeline.span("checkpoint_load"):
+            for entry in entries:
+                samples, segment_rate = checkpoint.read(entry["index"])
+                segments.append(resample(to_mono_float32(samples), segment_rate, sample_rate))
+
+        with timeline.span("assembly"):
+            segments = level_chunks(segments, sample_rate, post_processing)
+            pieces, offsets, position = [], [], 0
+            for index, samples in enumerate(segments):
+                offsets.append(position / sample_rate)
+                pieces.append(samples)
+                position += len(samples)
+                if index < len(segments) - 1:
+                    gap = np.zeros(int(round(gaps[index] * sample_rate)), dtype=np.float32)
+                    pieces.append(gap)
+                    position += len(gap)
+            samples = np.concatenate(pieces)
+
+        subtype = "FLOAT" if any(engine_default_subtype(engine) == "FLOAT" for engine in set(engines)) else "PCM_16"
+        with timeline.span("encoding"):
+            audio_result = save_audio(samples, sample_rate, output_path.as_posix(), post_processing, subtype)
+
+        with timeline.span("upload"):
+            result["output_url"], result["output_object"] = _upload_audio(output_path, file_extension)
+        result["audio_duration"] = audio_result.length
+        result["segment_offsets"] = [round(offset, 3) for offset in offsets]
+
+        if caption_settings:
+            with timeline.span("captioning"):
+                offsets = np.array(offsets) - _leading_trim_seconds(samples, sample_rate, post_processing)
+                timings = _merge_chunk_timings(checkpoint, len(segments), offsets.tolist())
+                _store_captions(output_path.stem, timings, caption_settings, result)
+
+        logger.info(f"[Task {task_id}] Assembled {len(segments)} script segments")
+        result["timeline"] = timeline.summary(sum(entry["chars"] for entry in entries), result["audio_duration"])
+        self.update_state(state=states.SUCCESS, meta=result)
+
+    except SynthesisCancelled as exc:
+        logger.info(f"[Task {task_id}] {exc}")
+        self.update_state(
+            state=states.REVOKED,
+            meta={'exc_type': 'TaskRevokedError', 'exc_message': str(exc)}
+        )
+        raise Ignore()
+
+    except Exception as exc:
+        logger.error(f"[Task {task_id}] Failed to assemble script: {exc}", exc_info=True)
+        self.update_state(
+            state=states.FAILURE,
+            meta={'exc_type': type(exc).__name__, 'exc_message': str(exc)}
+        )
+        raise
+    finally:
+        _finalize_task(task_id, result, output_path, checkpoint, webhook_url, timeline)
+
+    return result
+
+
+@celery_app.task(name='app.tasks.fail_fanned_out_job_task')
+def fail_fanned_out_job_task(
+    request,
+    exc,
+    traceback,
+    fingerprint: str,
+    result: Dict,
+    webhook_url: Optional[str] = None,
+    parent_timeline: Optional[Dict] = None,
+    chars: Optional[int] = None,
+    keep_checkpoint: bool = False,
+    text_ref: Optional[Dict] = None
+):
+    """
+    Error callback of a fanned-out job's chord (distributed chunks or script batches). When a
+    subtask fails for good (out of retries, or past its delivery limit) the merge step never
+    runs, so this fails the job in its place and finalizes it as the merge step would have:
+    checkpoints and stored text deleted, submission keys released, webhook sent, trace exported.
+    """
+    task_id = request.id
+    if AsyncResult(task_id).state in states.READY_STATES:
+        # The merge step ran and failed itself; it has already finalized the job
+        return
+    logger.error(f"[Task {task_id}] A subtask failed, so the job cannot be merged: {exc}")
+    celery_app.backend.store_result(task_id, {'exc_type': type(exc).__name__, 'exc_message': str(exc)}, states.FAILURE)
+    timeline = _joined_timeline(parent_timeline, [])
+    result = {"output_url": None, "output_object": None, "subtitle_url": None, "subtitle_object": None, **result}
+    result["timeline"] = timeline.summary(chars, None)
+    checkpoint = ChunkCheckpointStore(task_id, fingerprint)
+    _finalize_task(task_id, result, None, checkpoint, webhook_url, timeline, keep_checkpoint, text_ref)
+
+
+def _replace_with_chord(task, fan_out: chord):
+    """
+    `task.replace(fan_out)`. Run eagerly (task_always_eager), Celery applies the chord inline and
+    a failing subtask raises here without the chord's error callback being called, so this calls
+    it the way a worker's result backend would, and ends the task as a replaced one.
+    """
+    try:
+        return task.replace(fan_out)
+    except Ignore:
+        raise
+    except Exception as exc:
+        if not task.request.is_eager:
+            raise
+        task.app.backend.chord_error_from_stack(fan_out.body, exc)
+        raise Ignore()
+
+
+def _script_batches(segments: list[Dict], max_chars: int) -> list[tuple[str, Optional[Dict], list[list]]]:
+    """
+    Groups script segments by (engine, engine options) in order of first appearance, and splits
+    each group into batches of at most `max_chars` characters (always at least one segment).
+    """
+    groups: dict[tuple[str, str], list[list]] = {}
+    for index, segment in enumerate(segments):
+        key = (segment["engine"], json.dumps(segment.get("engine_options"), sort_keys=True))
+        groups.setdefault(key, []).append([index, segment["text"]])
+
+    batches = []
+    for (engine, options_json), members in groups.items():
+        engine_options = json.loads(options_json)
+        batch, chars = [], 0
+        for member in members:
+            if batch and chars + len(member[1]) > max_chars:
+                batches.append((engine, engine_options, batch))
+                batch, chars = [], 0
+            batch.append(member)
+            chars += len(member[1])
+        batches.append((engine, engine_options, batch))
+    return batches
+
+
+def _fan_out_signature(
+    task_id, engine, chunks, engine_options, output_format, caption_settings, webhook_url, post_processing,
+    tier=None, parent_timeline=None, keep_checkpoint=False, text_ref=None, chunk_text_refs=None
+):
+    # With the text stored by reference, each chunk message carries its byte range instead of its text
+    header = group(
+        synthesize_chunk_task.s(
+            engine, None if chunk_text_refs else chunk_text, engine_options, task_id, index, caption_settings,
+            text_ref=chunk_text_refs[index] if chunk_text_refs else None, record_text=keep_checkpoint
+        ).set(**(tier or {}))
+        for index, chunk_text in enumerate(chunks)
+    )
+    body = merge_chunks_task.s(
+        engine, engine_options, output_format, caption_settings, webhook_url, post_processing,
+        parent_timeline=parent_timeline, keep_checkpoint=keep_checkpoint, text_ref=text_ref
+    ).set(**(tier or {}))
+    body.on_error(fail_fanned_out_job_task.s(
+        render_fingerprint(engine, engine_options),
+        {"engine": engine, "format": output_format, "chunks": len(chunks), "distributed": True},
+        webhook_url,
+        parent_timeline=parent_timeline,
+        chars=sum(len(chunk_text) for chunk_text in chunks),
+        keep_checkpoint=keep_checkpoint,
+        text_ref=text_ref,
+    ))
+    return chord(header, body)
+
+
+def _reuse_base_chunks(base_task_id: str, checkpoint: ChunkCheckpointStore, audio_engine, text: str) -> tuple[list[str], int]:
+    """
+    Splits `text` around the chunks an earlier task rendered with the same engine and options,
+    and copies the audio of those still present into `checkpoint`, so only edited chunks are
+    rendered. Returns the chunks and how many were reused.
+    """
+    base = ChunkCheckpointStore(base_task_id, checkpoint.fingerprint)
+    previous = base.chunk_texts()
+    if not previous:
+        logger.info(
+            f"[Task {checkpoint.task_id}] No chunks of task {base_task_id} to reuse "
+            f"(not kept, single-chunk, or rendered with other settings); rendering everything"
+        )
+        return audio_engine.split_text(text), 0
+    chunks = audio_engine.split_text_around(text, previous)
+    reused = checkpoint.copy_from(base, chunks)
+    logger.info(f"[Task {checkpoint.task_id}] Reusing {reused}/{len(chunks)} chunks of task {base_task_id}")
+    return chunks, reused
+
+
+def _check_deliveries(task) -> None:
+    """
+    Fails a task whose earlier deliveries all took their worker down (acks_late tasks go back to
+    the queue when the process dies), instead of letting it crash-loop the pool.
+    """
+    try:
+        deliveries = record_delivery(task.name, task.request.id, task.request.retries)
+    except RedisError as e:
+        logger.warning(f"[Task {task.request.id}] Could not count deliveries: {e}")
+        return
+    if deliveries > settings.task_max_deliveries:
+        raise DeliveryLimitExceeded(
+            f"Delivered {deliveries} times without finishing; its worker process was lost on every attempt"
+        )
+    if deliveries > 1:
+        logger.warning(f"[Task {task.request.id}] Redelivered ({deliveries}/{settings.task_max_deliveries}) after its worker was lost")
+
+
+def _task_timeline(task) -> TaskTimeline:
+    """A timeline for a job's entry task, starting with its wait in the queue when that is known."""
+    return TaskTimeline(enqueued_at=getattr(task.request, ENQUEUED_AT_HEADER, None))
+
+
+def _joined_timeline(parent_timeline: Optional[Dict], subtasks: list[tuple[Optional[Dict], Dict]]) -> TaskTimeline:
+    """
+    Timeline of a job finished by a chord body: the spans its entry task recorded before fanning
+    out, each subtask's spans (given with attributes identifying it) after its wait in the queue,
+    and the wait between the last subtask finishing and this body starting.
+    """
+    timeline = TaskTimeline(spans=(parent_timeline or {}).get("spans"))
+    handed_off_at = (parent_timeline or {}).get("finished_at")
+    finished_at = []
+    for subtask_timeline, attributes in subtasks:
+        if not subtask_timeline:
+            continue
+        if handed_off_at is not None:
+            timeline.add("queue_wait", handed_off_at, subtask_timeline["started_at"], **attributes)
+        timeline.extend(subtask_timeline["spans"])
+        finished_at.append(subtask_timeline["finished_at"])
+    if finished_at:
+        timeline.add("queue_wait", max(finished_at), timeline.started_at)
+    return timeline
+
+
+def _tier_options(task) -> Dict:
+    """
+    Delivery options keeping a job's subtasks in the queue (cost tier) it was taken from, so a
+    fanned-out audiobook doesn't flood the interactive queue, and aging from when the job was
+    first queued. Empty when the task ran eagerly.
+    """
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    if not queue:
+        return {}
+    enqueued_at = getattr(task.request, ENQUEUED_AT_HEADER, None)
+    return {"queue": queue, "headers": {ENQUEUED_AT_HEADER: enqueued_at} if enqueued_at else enqueue_headers()}
+
+
+def _transcribe_chunk(checkpoint: ChunkCheckpointStore, index: int, samples, sample_rate: int):
+    timings = get_subtitle_generator().transcribe_word_timings(samples, sample_rate)
+    _put_text(checkpoint.word_timings_object(index), dumps_word_timings(timings), "application/json")
+
+
+def _chunk_word_timings(checkpoint: ChunkCheckpointStore, index: int, samples, sample_rate: int, timeline: Optional[TaskTimeline] = None) -> dict:
+    """Word timings for one chunk, reusing the ones an earlier attempt at the task stored."""
+    timings = _load_chunk_timings(checkpoint, index)
+    if timings is None:
+        with span(timeline, "transcription", chunk=index):
+            timings = get_subtitle_generator().transcribe_word_timings(samples, sample_rate)
+            _put_text(checkpoint.word_timings_object(index), dumps_word_timings(timings), "application/json")
+    return timings
+
+
+def _load_chunk_timings(checkpoint: ChunkCheckpointStore, index: int) -> Optional[dict]:
+    try:
+        response = minio_client.get_object(bucket_name, checkpoint.word_timings_object(index))
+    except S3Error:
+        return None
+    try:
+        return loads_word_timings(response.read())
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def _merge_chunk_timings(checkpoint: ChunkCheckpointStore, chunk_count: int, offsets: list[float]) -> dict:
+    timings, timing_offsets = [], []
+    for index, offset in zip(range(chunk_count), offsets):
+        chunk_timings = _load_chunk_timings(checkpoint, index)
+        if chunk_timings is None:
+            logger.warning(f"No word timings for chunk {index}; leaving a gap in the captions")
+            continue
+        timings.append(chunk_timings)
+        timing_offsets.append(offset)
+    return concatenate_word_timings(timings, timing_offsets)
+
+
+def _leading_trim_seconds(samples: np.ndarray, sample_rate: int, post_processing: Optional[Dict]) -> float:
+    """How much leading silence post-processing will trim off `samples`, in seconds."""
+    if not (post_processing and post_processing.get("trim_silence")):
+        return 0.0
+    leading, _ = silence_bounds(
+        samples,
+        sample_rate,
+        threshold_db=post_processing.get("silence_threshold_db", -50.0),
+        padding_ms=post_processing.get("silence_padding_ms", 100),
+    )
+    return leading / sample_rate
+
+
+def _upload_audio(output_path: Path, file_extension: str) -> tuple[str, str]:
+    minio_client.fput_object(bucket_name, output_path.name, output_path.as_posix(), content_type=f"audio/{file_extension}")
+    return f"{minio_public_endpoint}/{bucket_name}/{output_path.name}", output_path.name
+
+
+def _store_captions(stem: str, timings: dict, caption_settings: Dict, result: Dict):
+    """Uploads the ASS captions and word timings for a task straight from memory."""
+    subtitle_object = f"{stem}.ass"
+    timings_object = word_timings_path(subtitle_object)
+    _put_text(subtitle_object, render_captions(timings, caption_settings, "ass"), "text/x-ssa")
+    _put_text(timings_object, dumps_word_timings(timings), "application/json")
+    result["subtitle_url"] = f"{minio_public_endpoint}/{bucket_name}/{subtitle_object}"
+    result["subtitle_object"] = subtitle_object
+    result["word_timings_object"] = timings_object
+
+
+def _put_text(object_name: str, text: str, content_type: str):
+    payload = text.encode("utf-8")
+    minio_client.put_object(bucket_name, object_name, io.BytesIO(payload), len(payload), content_type=content_type)
+
+
+def _record_throughput(engine: str, timeline: TaskTimeline):
+    """
+    Feeds admission control the synthesis speed measured on `timeline`: its synthesis spans only,
+    so encoding, checkpoint uploads, captioning backpressure and chunks reused from checkpoints
+    don't count.
+    """
+    chars, seconds = timeline.stage_coverage("synthesis")
+    try:
+        record_throughput(engine, chars, seconds)
+    except Exception as e:
+        logger.warning(f"Failed to record throughput for engine '{engine}': {e}")
+
+
+def _finalize_task(
+    task_id: str,
+    result: Dict,
+    output_path: Optional[Path],
+    checkpoint: Optional[ChunkCheckpointStore],
+    webhook_url: Optional[str],
+    timeline: Optional[TaskTimeline] = None,
+    keep_checkpoint: bool = False,
+    text_ref: Optional[Dict] = None
+):
+    logger.info(f"[Task {task_id}] Cleaning up resources and sending webhook")
+    logger.info(f"Worker CMD: {Path.cwd()}")
+    # Delete local file after successful upload to MinIO
+    if output_path:
+        try:
+            output_path.unlink(missing_ok=True)
+            logger.info(f"[Task {task_id}] Deleted local file {output_path}")
+        except Exception as e:
+            logger.error(f"[Task {task_id}] Failed to delete local file {output_path}: {e}", exc_info=True)
+
+    if checkpoint and not (keep_checkpoint or settings.keep_chunk_checkpoints):
+        try:
+            checkpoint.delete()
+        except Exception as e:
+            logger.warning(f"[Task {task_id}] Failed to delete chunk checkpoints: {e}")
+
+    if text_ref:
+        try:
+            delete_text(text_ref)
+        except Exception as e:
+            logger.warning(f"[Task {task_id}] Failed to delete stored text {text_ref['object']}: {e}")
+
+    try:
+        release_task(task_id)
+        release_admission(task_id)
+        clear_cancellation(task_id)
+    except Exception as e:
+        logger.warning(f"[Task {task_id}] Failed to release submission keys: {e}")
+
+    if webhook_url:
+        current_task_state = AsyncResult(task_id)
+        payload = {
+            "task_id": task_id,
+            "task_state": current_task_state.state,
+            "task_info": current_task_state.info,
+            "result": result
+        }
+        with span(timeline, "webhook"):
             send_webhook_task(webhook_url, payload, task_id)
-            pass
-    
-    return result
\ No newline at end of file
+
+    # The result was published before the webhook went out; only the exported trace includes it
+    if timeline is not None and "timeline" in result:
+        summary = timeline.summary(result["timeline"]["chars"], result["timeline"]["audio_seconds"])
+        export_trace(task_id, summary, {"tts.engine": result.get("engine"), "tts.format": result.get("format")})
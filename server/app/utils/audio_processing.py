@@ -0,0 +1,212 @@
+import logging
+import math
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# soundfile subtypes for each supported output bit depth (32 = IEEE float)
+BIT_DEPTH_SUBTYPES = {16: "PCM_16", 24: "PCM_24", 32: "FLOAT"}
+
+_EPSILON = 1e-10
+
+
+def db_to_gain(db: float) -> float:
+    return float(10 ** (db / 20))
+
+
+def to_mono_float32(samples) -> np.ndarray:
+    """Coerces engine output (list, float64, int16, (n, channels)) into a 1-D float32 array."""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        samples = samples.astype(np.float32) / 32768.0
+    elif samples.dtype == np.int32:
+        samples = samples.astype(np.float32) / 2147483648.0
+    samples = samples.astype(np.float32, copy=False)
+    if samples.ndim > 1:
+        # (channels, n) from torch or (n, channels) from soundfile
+        channel_axis = 0 if samples.shape[0] < samples.shape[-1] else -1
+        samples = samples.mean(axis=channel_axis)
+    return samples
+
+
+def normalize_peak(samples: np.ndarray, target_db: float = -1.0) -> np.ndarray:
+    """Scales the signal so its absolute peak sits at `target_db` dBFS."""
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    if peak < _EPSILON:
+        return samples
+    return samples * np.float32(db_to_gain(target_db) / peak)
+
+
+def gated_rms_db(samples: np.ndarray, sample_rate: int, block_ms: int = 400, gate_db: float = -70.0) -> float:
+    """
+    Loudness estimate in dBFS: RMS over 400 ms blocks, ignoring blocks below an absolute gate
+    so pauses don't drag the measurement down. This is the BS.1770 gating scheme without the
+    K-weighting filter, which is close enough for levelling speech from the same engine.
+    """
+    block = max(int(sample_rate * block_ms / 1000), 1)
+    usable = (samples.size // block) * block
+    if usable == 0:
+        energy = np.mean(np.square(samples, dtype=np.float64)) if samples.size else 0.0
+        return float(10 * np.log10(energy + _EPSILON))
+    block_energy = np.mean(np.square(samples[:usable].reshape(-1, block), dtype=np.float64), axis=1)
+    gated = block_energy[block_energy > 10 ** (gate_db / 10)]
+    if gated.size == 0:
+        return gate_db
+    return float(10 * np.log10(np.mean(gated) + _EPSILON))
+
+
+def normalize_loudness(samples: np.ndarray, sample_rate: int, target_db: float = -20.0, peak_ceiling_db: float = -1.0) -> np.ndarray:
+    """Applies a single gain so gated RMS loudness hits `target_db`, never pushing peaks past the ceiling."""
+    if not samples.size:
+        return samples
+    current_db = gated_rms_db(samples, sample_rate)
+    gain = db_to_gain(target_db - current_db)
+    peak = float(np.max(np.abs(samples)))
+    if peak * gain > db_to_gain(peak_ceiling_db):
+        gain = db_to_gain(peak_ceiling_db) / max(peak, _EPSILON)
+    return samples * np.float32(gain)
+
+
+def silence_bounds(samples: np.ndarray, sample_rate: int, threshold_db: float = -50.0, padding_ms: int = 100, frame_ms: int = 10) -> tuple[int, int]:
+    """Sample range [start, end) left after trimming leading and trailing silence."""
+    frame = max(int(sample_rate * frame_ms / 1000), 1)
+    n_frames = -(-samples.size // frame)
+    if n_frames == 0:
+        return 0, 0
+    padded = np.zeros(n_frames * frame, dtype=samples.dtype)
+    padded[:samples.size] = samples
+    frame_peaks = np.max(np.abs(padded.reshape(n_frames, frame)), axis=1)
+    voiced = np.flatnonzero(frame_peaks > db_to_gain(threshold_db))
+    if voiced.size == 0:
+        return 0, 0
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(voiced[0] * frame - padding, 0)
+    end = min((voiced[-1] + 1) * frame + padding, samples.size)
+    return int(start), int(end)
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int, threshold_db: float = -50.0, padding_ms: int = 100, frame_ms: int = 10) -> np.ndarray:
+    """Removes leading and trailing frames whose peak stays below `threshold_db`, keeping `padding_ms` around speech."""
+    start, end = silence_bounds(samples, sample_rate, threshold_db, padding_ms, frame_ms)
+    return samples[start:end]
+
+
+def resample(samples: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Band-limited resampling in the frequency domain. Truncating (or zero-padding) the spectrum
+    doubles as the anti-aliasing filter when downsampling.
+    """
+    if sample_rate == target_rate or not samples.size:
+        return samples
+    target_length = int(round(samples.size * target_rate / sample_rate))
+
+    # Zero-pad to a length that maps to a whole number of output samples and factors into
+    # small primes; arbitrary lengths (e.g. after trimming) fall back to a much slower FFT.
+    ratio_gcd = math.gcd(sample_rate, target_rate)
+    input_step, output_step = sample_rate // ratio_gcd, target_rate // ratio_gcd
+    blocks = _next_fast_len(-(-samples.size // input_step))
+    padded_length, padded_target = blocks * input_step, blocks * output_step
+
+    spectrum = np.fft.rfft(samples, n=padded_length)
+    target_bins = padded_target // 2 + 1
+    if target_bins < spectrum.size:
+        spectrum = spectrum[:target_bins]
+    resampled = np.fft.irfft(spectrum, n=padded_target)[:target_length]
+    return (resampled * (padded_target / padded_length)).astype(np.float32)
+
+
+def _next_fast_len(n: int) -> int:
+    """Smallest 5-smooth integer >= n."""
+    best = 2 ** math.ceil(math.log2(max(n, 1)))
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            candidate = power35 * 2 ** max(math.ceil(math.log2(n / power35)), 0)
+            best = min(best, candidate)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def quantize(samples: np.ndarray, bit_depth: int, dither: bool = False) -> np.ndarray:
+    """
+    Converts float samples to the integer container soundfile expects for `bit_depth`:
+    int16 for 16-bit, left-justified int32 for 24-bit. Optional TPDF dither at 1 LSB.
+    """
+    if bit_depth == 32:
+        return np.clip(samples, -1.0, 1.0).astype(np.float32)
+    if bit_depth not in (16, 24):
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+
+    scale = float(2 ** (bit_depth - 1) - 1)
+    scaled = samples.astype(np.float64) * scale
+    if dither:
+        rng = np.random.default_rng()
+        scaled += rng.random(samples.size) - rng.random(samples.size)
+    quantized = np.clip(np.rint(scaled), -scale - 1, scale)
+    if bit_depth == 16:
+        return quantized.astype(np.int16)
+    return quantized.astype(np.int32) << 8
+
+
+def level_chunks(chunks: list[np.ndarray], sample_rate: int, settings: Optional[dict]) -> list[np.ndarray]:
+    """Brings every chunk to the same loudness before concatenation, so multi-chunk output has no level jumps."""
+    if not settings or settings.get("normalize") != "loudness":
+        return chunks
+    target_db = settings.get("target_loudness_db", -20.0)
+    peak_db = settings.get("target_peak_db", -1.0)
+    return [normalize_loudness(chunk, sample_rate, target_db, peak_db) for chunk in chunks]
+
+
+def process_audio(samples, sample_rate: int, settings: Optional[dict]) -> tuple[np.ndarray, int, Optional[str]]:
+    """
+    Runs the post-processing chain configured by an `AudioPostProcessing` dict:
+    trim -> resample -> normalize -> quantize.
+
+    Args:
+        samples: Engine output; anything `to_mono_float32` accepts.
+        sample_rate: The engine's sample rate.
+        settings: The post-processing options, or None to pass audio through untouched.
+
+    Returns:
+        A tuple of (samples ready for soundfile, output sample rate, soundfile subtype or None
+        to keep the caller's default).
+    """
+    samples = to_mono_float32(samples)
+    if not settings:
+        return samples, sample_rate, None
+
+    if settings.get("trim_silence"):
+        samples = trim_silence(
+            samples,
+            sample_rate,
+            threshold_db=settings.get("silence_threshold_db", -50.0),
+            padding_ms=settings.get("silence_padding_ms", 100),
+        )
+
+    target_rate = settings.get("sample_rate")
+    if target_rate and target_rate != sample_rate:
+        samples = resample(samples, sample_rate, target_rate)
+        sample_rate = target_rate
+
+    normalize = settings.get("normalize")
+    if normalize == "peak":
+        samples = normalize_peak(samples, settings.get("target_peak_db", -1.0))
+    elif normalize == "loudness":
+        samples = normalize_loudness(
+            samples,
+            sample_rate,
+            target_db=settings.get("target_loudness_db", -20.0),
+            peak_ceiling_db=settings.get("target_peak_db", -1.0),
+        )
+
+    subtype = None
+    bit_depth = settings.get("bit_depth")
+    if bit_depth:
+        samples = quantize(samples, bit_depth, dither=settings.get("dither", False))
+        subtype = BIT_DEPTH_SUBTYPES[bit_depth]
+
+    return samples, sample_rate, subtype
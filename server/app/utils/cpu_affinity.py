@@ -0,0 +1,161 @@
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Thread pools sized from the environment when a library initializes them
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+@dataclass
+class CpuSlot:
+    """One worker process's share of the host: whole physical cores, and the threads to run on them."""
+    index: int
+    cores: list[tuple[int, ...]]
+    threads: int
+
+    @property
+    def cpus(self) -> list[int]:
+        return sorted(cpu for core in self.cores for cpu in core)
+
+    def __str__(self) -> str:
+        return f"slot {self.index}: CPUs {format_cpus(self.cpus)} ({len(self.cores)} cores, {self.threads} threads)"
+
+
+def _read_cpu_list(path: str) -> Optional[list[int]]:
+    try:
+        with open(path) as f:
+            return parse_cpus(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def parse_cpus(cpu_list: str) -> list[int]:
+    """Parses a kernel CPU list ("0-3,8,10-11")."""
+    cpus = []
+    for part in filter(None, cpu_list.split(",")):
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpus(cpus: Iterable[int]) -> str:
+    """The inverse of `parse_cpus`."""
+    ranges: list[list[int]] = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def available_cpus() -> list[int]:
+    """CPUs this process may run on (its affinity, which respects cgroup cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cpus: Iterable[int]) -> list[tuple[int, ...]]:
+    """
+    Groups logical CPUs into physical cores (hyperthread siblings together) in core order, so a
+    partition never splits a core between two processes. Where sysfs has no topology, every
+    CPU counts as its own core.
+    """
+    cpus = set(cpus)
+    cores: dict[tuple[int, ...], None] = {}
+    for cpu in sorted(cpus):
+        siblings = _read_cpu_list(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") or [cpu]
+        cores[tuple(sibling for sibling in siblings if sibling in cpus)] = None
+    return list(cores)
+
+
+def partition_cores(cores: list[tuple[int, ...]], slots: int, threads: int = 0) -> list[CpuSlot]:
+    """
+    Splits `cores` into `slots` contiguous groups as evenly as possible (earlier slots get the
+    spare cores). With more slots than cores, slots share cores round-robin. Each slot runs
+    `threads` threads, or one per physical core it owns when 0.
+    """
+    if slots <= len(cores):
+        size, spare = divmod(len(cores), slots)
+        groups, start = [], 0
+        for index in range(slots):
+            end = start + size + (1 if index < spare else 0)
+            groups.append(cores[start:end])
+            start = end
+    else:
+        groups = [[cores[index % len(cores)]] for index in range(slots)]
+    return [CpuSlot(index, group, threads or len(group)) for index, group in enumerate(groups)]
+
+
+def worker_cpu_layout(cpus: Optional[list[int]] = None) -> Optional[list[CpuSlot]]:
+    """The host's partition into `worker_cpu_slots` slots, or None when partitioning is off."""
+    if not settings.worker_cpu_slots:
+        return None
+    return partition_cores(physical_cores(cpus or available_cpus()), settings.worker_cpu_slots, settings.worker_cpu_threads)
+
+
+def apply_cpu_slot(slot: CpuSlot) -> None:
+    """
+    Pins this process to `slot` and sizes every thread pool to match: OpenMP/MKL/OpenBLAS through
+    the environment (read when they initialize), torch directly when it is already loaded, and
+    the ONNX Runtime and Chatterbox settings the models are loaded with, unless set explicitly.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, slot.cpus)
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(slot.threads)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(slot.threads)
+    if not settings.onnx_intra_op_threads:
+        settings.onnx_intra_op_threads = slot.threads
+    if not settings.onnx_inter_op_threads:
+        settings.onnx_inter_op_threads = 1
+    if not settings.chatterbox_cpu_threads:
+        settings.chatterbox_cpu_threads = slot.threads
+
+
+def pin_pool_process(pool_index: int) -> Optional[CpuSlot]:
+    """
+    Gives the pool process with index `pool_index` (stable across process replacements) its slot,
+    `worker_cpu_slot_offset` slots into the host layout so workers sharing a host don't overlap.
+    """
+    layout = worker_cpu_layout()
+    if layout is None:
+        return None
+    position = settings.worker_cpu_slot_offset + pool_index
+    if position >= len(layout):
+        logger.warning(
+            f"Pool process {pool_index} maps to slot {position} of {len(layout)}; sharing slot "
+            f"{position % len(layout)}. Raise WORKER_CPU_SLOTS to cover every worker's concurrency"
+        )
+    slot = layout[position % len(layout)]
+    apply_cpu_slot(slot)
+    logger.info(f"Pool process {pool_index} (pid {os.getpid()}) pinned to {slot}")
+    return slot
+
+
+def log_cpu_layout(concurrency: Optional[int] = None) -> None:
+    """Logs the host topology and the slots this worker's pool processes will take."""
+    layout = worker_cpu_layout()
+    if layout is None:
+        return
+    cpus = available_cpus()
+    cores = physical_cores(cpus)
+    first = settings.worker_cpu_slot_offset
+    last = first + (concurrency or 1) - 1
+    logger.info(
+        f"CPU partitioning: {len(cpus)} CPUs ({format_cpus(cpus)}) in {len(cores)} physical cores, "
+        f"{len(layout)} slots; this worker's processes take slots {first}-{last}"
+    )
+    for slot in layout:
+        logger.info(f"  {slot}")
+    if len(layout) > len(cores):
+        logger.warning(f"{len(layout)} slots on {len(cores)} physical cores; slots will share cores")
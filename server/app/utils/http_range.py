@@ -0,0 +1,65 @@
+from typing import Optional
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a single-range HTTP `Range` header into an inclusive (start, end) byte range.
+
+    Args:
+        range_header: The raw header value, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-500".
+        size: The total size of the resource in bytes.
+
+    Returns:
+        The inclusive (start, end) tuple, or None if the header is absent, invalid (e.g. a last
+        byte before the first) or uses a form we don't serve partially (other units, multiple
+        ranges). Callers should then send the whole resource, as RFC 9110 requires for invalid
+        ranges and allows for the rest.
+
+    Raises:
+        ValueError: If the range is valid but cannot be satisfied for this size (it starts past
+            the end, or asks for an empty suffix).
+    """
+    if not range_header:
+        return None
+
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    start_str, sep, end_str = ranges.strip().partition("-")
+    if not sep:
+        return None
+
+    if not (start_str or end_str).isdigit() or (end_str and not end_str.isdigit()):
+        return None
+
+    if start_str == "":
+        # Suffix range: the last N bytes
+        suffix_length = int(end_str)
+        if suffix_length == 0:
+            raise ValueError(f"Unsatisfiable range: {range_header}")
+        start = max(size - suffix_length, 0)
+        end = size - 1
+    else:
+        start = int(start_str)
+        if end_str and int(end_str) < start:
+            return None
+        end = min(int(end_str), size - 1) if end_str else size - 1
+
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+
+    return start, end
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an `If-None-Match` header against the resource ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    normalized = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == normalized
+        for candidate in if_none_match.split(",")
+    )
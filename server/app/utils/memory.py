@@ -0,0 +1,223 @@
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Names of the models the current task (or inference request) has fetched, while it holds leases
+_held: ContextVar[Optional[set[str]]] = ContextVar("resident_model_leases", default=None)
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, read from /proc (None where that isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def accelerator_memory_bytes() -> Optional[int]:
+    """Memory held by PyTorch's CUDA allocator, or None when torch isn't loaded or there is no GPU."""
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available():
+        return None
+    return int(torch.cuda.memory_reserved())
+
+
+def release_freed_memory() -> None:
+    """Collects garbage and hands freed memory back to the OS (glibc arenas, CUDA cache)."""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    libc_name = ctypes.util.find_library("c")
+    if libc_name:
+        try:
+            ctypes.CDLL(libc_name).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+class ResidentModels:
+    """
+    Models kept in memory by this worker process, in least-recently-used order.
+
+    `get` loads a model on first use and marks it as most recently used; the memory watchdog
+    evicts from the other end when the process goes over its budget. Inside `leases()` (a task
+    or inference request), every model fetched stays leased until the block exits, and leased
+    models are never evicted: dropping the registry's reference to a model a task still holds
+    frees nothing, and the task's next `get` would load a second copy.
+    """
+
+    def __init__(self):
+        self._models: OrderedDict[str, Any] = OrderedDict()
+        self._leases: defaultdict[str, int] = defaultdict(int)
+        self._lock = threading.RLock()
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._models:
+                logger.info(f"Loading '{name}' into worker process {os.getpid()}")
+                self._models[name] = loader()
+                start_watchdog()
+            self._models.move_to_end(name)
+            held = _held.get()
+            if held is not None and name not in held:
+                held.add(name)
+                self._leases[name] += 1
+            return self._models[name]
+
+    @contextmanager
+    def leases(self) -> Iterator[None]:
+        """
+        Leases every model fetched with `get` in this block (and in threads started from it with
+        a copy of its context) until the block exits.
+        """
+        held: set[str] = set()
+        token = _held.set(held)
+        try:
+            yield
+        finally:
+            _held.reset(token)
+            with self._lock:
+                for name in held:
+                    self._leases[name] -= 1
+                    if self._leases[name] <= 0:
+                        del self._leases[name]
+
+    def names(self) -> list[str]:
+        """Resident model names, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def leased(self) -> list[str]:
+        with self._lock:
+            return [name for name in self._models if name in self._leases]
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            model = self._models.pop(name, None)
+        if model is None:
+            return False
+        logger.info(f"Evicted '{name}' from worker process {os.getpid()}")
+        del model
+        release_freed_memory()
+        return True
+
+    def evict_lru(self) -> Optional[str]:
+        """Evicts the least recently used model no task holds a lease on; None if there is none."""
+        with self._lock:
+            name = next((name for name in self._models if name not in self._leases), None)
+            if name is None:
+                return None
+        self.evict(name)
+        return name
+
+
+resident_models = ResidentModels()
+
+
+def _over_budget() -> tuple[bool, Optional[int], Optional[int]]:
+    rss = process_rss_bytes()
+    accelerator = accelerator_memory_bytes()
+    over = bool(
+        (settings.worker_memory_budget_mb and rss is not None and rss > settings.worker_memory_budget_mb * _MB)
+        or (settings.worker_accelerator_memory_budget_mb and accelerator is not None
+            and accelerator > settings.worker_accelerator_memory_budget_mb * _MB)
+    )
+    return over, rss, accelerator
+
+
+def _format_usage(rss: Optional[int], accelerator: Optional[int]) -> str:
+    usage = f"rss={rss / _MB:.0f} MB" if rss is not None else "rss=unknown"
+    if accelerator is not None:
+        usage += f", accelerator={accelerator / _MB:.0f} MB"
+    return usage
+
+
+def _went_down(before: tuple[Optional[int], Optional[int]], after: tuple[Optional[int], Optional[int]]) -> bool:
+    return any(b is not None and a is not None and a < b for b, a in zip(before, after))
+
+
+def enforce_memory_budget() -> bool:
+    """
+    Evicts idle resident models, least recently used first, until the process is back under its
+    budget. Returns False if it is still over budget with nothing left to evict; Celery's
+    `worker_max_memory_per_child` then replaces the process after its current task.
+
+    Stops early (also returning False) when an eviction didn't bring memory down, e.g. because
+    the allocator kept the pages: evicting more models would then only cost reloads. The next
+    check (watchdog tick or task end) evicts at most one more.
+    """
+    over, rss, accelerator = _over_budget()
+    while over:
+        evicted = resident_models.evict_lru()
+        if evicted is None:
+            logger.warning(
+                f"Worker process {os.getpid()} is over its memory budget ({_format_usage(rss, accelerator)}) "
+                f"with no idle models left to evict (in use: {resident_models.leased()})"
+            )
+            return False
+        before = (rss, accelerator)
+        over, rss, accelerator = _over_budget()
+        logger.info(f"After evicting '{evicted}': {_format_usage(rss, accelerator)}")
+        if over and not _went_down(before, (rss, accelerator)):
+            logger.warning(
+                f"Evicting '{evicted}' freed no memory in worker process {os.getpid()}; "
+                f"not evicting further models until the next check"
+            )
+            return False
+    return True
+
+
+class MemoryWatchdog(threading.Thread):
+    """Samples this process's memory in the background, logs it, and enforces the budget."""
+
+    def __init__(self, interval: float, report_interval: float):
+        super().__init__(name="memory-watchdog", daemon=True)
+        self.interval = interval
+        self.report_interval = report_interval
+
+    def run(self):
+        last_report = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now - last_report >= self.report_interval:
+                    _, rss, accelerator = _over_budget()
+                    logger.info(
+                        f"Worker process {os.getpid()} memory: {_format_usage(rss, accelerator)}, "
+                        f"resident models: {resident_models.names()}"
+                    )
+                    last_report = now
+                enforce_memory_budget()
+            except Exception as e:
+                logger.error(f"Memory watchdog check failed: {e}", exc_info=True)
+            time.sleep(self.interval)
+
+
+_watchdog_pid: Optional[int] = None
+
+
+def start_watchdog() -> None:
+    """Starts the watchdog for the current process once (forked children start their own)."""
+    global _watchdog_pid
+    if _watchdog_pid == os.getpid() or settings.memory_watchdog_interval_seconds <= 0:
+        return
+    _watchdog_pid = os.getpid()
+    MemoryWatchdog(settings.memory_watchdog_interval_seconds, settings.memory_report_interval_seconds).start()
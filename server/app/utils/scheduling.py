@@ -0,0 +1,55 @@
+import time
+from typing import Optional
+
+from kombu import Exchange, Queue
+
+from app.config import settings
+from app.services.redis.admission import Admission
+
+# Highest priority first; workers drain them in this order (see queue_aging for the starvation guard)
+TIERS = ("interactive", "standard", "bulk")
+# Where tasks went before jobs were tiered; still consumed so nothing queued there is stranded
+LEGACY_QUEUE = "celery"
+# Message header recording when a job was queued, read by the aging sweeper
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+
+def tier_queue(tier: str) -> str:
+    return f"{settings.scheduling_queue_prefix}.{tier}"
+
+
+def task_queues() -> list[Queue]:
+    # Each queue gets its own exchange and routing key, as Celery does for queues it creates on
+    # demand; unbound Queue(name) entries would all share the default queue's routing key
+    return [Queue(name, Exchange(name), routing_key=name) for name in [tier_queue(tier) for tier in TIERS] + [LEGACY_QUEUE]]
+
+
+def enqueue_headers() -> dict:
+    return {ENQUEUED_AT_HEADER: time.time()}
+
+
+def estimated_cost_seconds(engine: str, chars: int, captioned: bool, admission: Optional[Admission] = None) -> float:
+    """
+    Worker time a job is expected to take. Synthesis comes from the admission estimate (the
+    engine's measured throughput) when there is one, else from the configured prior.
+    """
+    if admission is not None:
+        synthesis = admission.estimated_completion_at - admission.estimated_start_at
+    else:
+        rate = settings.admission_default_chars_per_second.get(engine, settings.admission_fallback_chars_per_second)
+        synthesis = chars / rate
+    captioning = chars * settings.scheduling_caption_seconds_per_char if captioned else 0.0
+    return synthesis + captioning
+
+
+def cost_tier(seconds: float) -> str:
+    if seconds <= settings.scheduling_interactive_max_seconds:
+        return "interactive"
+    if seconds <= settings.scheduling_standard_max_seconds:
+        return "standard"
+    return "bulk"
+
+
+def queue_for_job(engine: str, chars: int, captioned: bool, admission: Optional[Admission] = None) -> str:
+    """The queue a new job goes to, by its estimated cost."""
+    return tier_queue(cost_tier(estimated_cost_seconds(engine, chars, captioned, admission)))
@@ -82,6 +82,45 @@ def split_text_into_chunks(text: str, max_chars: int = 2000) -> list[str]:
     return chunks
 
 
+def split_text_around_chunks(text: str, previous_chunks: list[str], max_chars: int = 2000) -> list[str]:
+    """
+    Splits an edited text so that the chunks of an earlier version it still contains verbatim
+    (in order, on word boundaries) come out unchanged, and only the text between them is split
+    afresh with `split_text_into_chunks`. An edit then changes the chunks around it instead of
+    shifting every later cut the greedy splitter makes, so a re-render can reuse the rest.
+    """
+    text = text.strip()
+    chunks = []
+    position = 0
+    for previous in previous_chunks:
+        found = _find_whole_words(text, previous, position)
+        if found == -1:
+            continue
+        chunks.extend(split_text_into_chunks(text[position:found], max_chars))
+        chunks.append(previous)
+        position = found + len(previous)
+    chunks.extend(split_text_into_chunks(text[position:], max_chars))
+    return chunks
+
+
+def _find_whole_words(text: str, fragment: str, start: int) -> int:
+    index = text.find(fragment, start)
+    while index != -1:
+        end = index + len(fragment)
+        if (index == 0 or text[index - 1].isspace()) and (end == len(text) or text[end].isspace()):
+            return index
+        index = text.find(fragment, index + 1)
+    return -1
+
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.?!])\s+")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Splits text at sentence endings (., ?, !) followed by whitespace, dropping empty pieces."""
+    return [sentence for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+
 # --- Example Usage with your text ---
 if __name__ == "__main__":
     post_text = """
@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Optional
+
+import requests
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TaskTimeline:
+    """
+    Where one job spent its time, as named spans (wall-clock start, duration and attributes such
+    as the chunk index). Spans can come from several threads (captioning runs alongside
+    synthesis) and from several tasks: a distributed job's chunks and scripts' voice batches
+    return theirs (`as_dict`) and the task assembling the output merges them in.
+
+    Stage names used by the tasks: queue_wait, text_load, model_acquire, chunk_reuse, chunking,
+    checkpoint_load, synthesis, checkpoint_save, transcription, assembly, encoding, upload,
+    captioning, webhook.
+    """
+
+    def __init__(self, enqueued_at: Optional[float] = None, spans: Optional[list[dict]] = None):
+        self.started_at = time.time()
+        self.spans: list[dict] = list(spans or [])
+        self._lock = threading.Lock()
+        if enqueued_at is not None:
+            self.add("queue_wait", enqueued_at, self.started_at)
+
+    def add(self, name: str, start: float, end: float, **attributes) -> None:
+        span = {"name": name, "start": round(start, 6), "duration": round(max(end - start, 0.0), 6), **attributes}
+        with self._lock:
+            self.spans.append(span)
+
+    def extend(self, spans: list[dict]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.time(), **attributes)
+
+    def stage_coverage(self, name: str) -> tuple[int, float]:
+        """
+        Characters handled by the spans called `name` (their "chars" attributes) and the wall time
+        those spans cover, counting overlapping spans (chunks rendered in parallel) once.
+        """
+        with self._lock:
+            spans = sorted((span for span in self.spans if span["name"] == name), key=lambda span: span["start"])
+        chars = sum(span.get("chars", 0) for span in spans)
+        covered, end = 0.0, None
+        for span in spans:
+            span_end = span["start"] + span["duration"]
+            if end is None or span["start"] >= end:
+                covered += span["duration"]
+            elif span_end > end:
+                covered += span_end - end
+            end = span_end if end is None else max(end, span_end)
+        return chars, covered
+
+    def as_dict(self) -> dict:
+        """Spans recorded so far, for handing to the task that finishes the job."""
+        with self._lock:
+            return {"started_at": self.started_at, "finished_at": time.time(), "spans": list(self.spans)}
+
+    def summary(self, chars: Optional[int], audio_seconds: Optional[float]) -> dict:
+        """
+        The timeline as stored in the task result: time per stage (summed over chunks and
+        workers), wall time from submission to now, worker time (everything but queueing),
+        and the real-time factor of synthesis (seconds of synthesis per second of audio).
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        stages: dict[str, float] = {}
+        for span in spans:
+            stages[span["name"]] = stages.get(span["name"], 0.0) + span["duration"]
+        start = spans[0]["start"] if spans else self.started_at
+        synthesis = stages.get("synthesis", 0.0)
+        return {
+            "chars": chars,
+            "audio_seconds": audio_seconds,
+            "wall_seconds": round(time.time() - start, 3),
+            "worker_seconds": round(sum(seconds for name, seconds in stages.items() if name != "queue_wait"), 3),
+            "real_time_factor": round(synthesis / audio_seconds, 4) if audio_seconds and synthesis else None,
+            "stages": {name: round(seconds, 4) for name, seconds in stages.items()},
+            "spans": spans,
+        }
+
+
+def span(timeline: Optional[TaskTimeline], name: str, **attributes):
+    """`timeline.span(...)`, or a no-op when there is no timeline to record into."""
+    return timeline.span(name, **attributes) if timeline is not None else nullcontext()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _nanos(seconds: float) -> str:
+    return str(int(seconds * 1e9))
+
+
+def export_trace(task_id: str, summary: dict, attributes: dict) -> None:
+    """
+    Sends a finished job's timeline to the OTLP/HTTP (JSON) collector at `trace_export_url`, as
+    one trace per job (its ID is the task UUID): a root span covering submission to completion
+    with one child span per timeline span. Best effort; failures are only logged.
+    """
+    if not settings.trace_export_url:
+        return
+    try:
+        trace_id = uuid.UUID(task_id).hex
+    except ValueError:
+        trace_id = uuid.uuid4().hex
+    root_id = os.urandom(8).hex()
+    spans = summary["spans"]
+    start = spans[0]["start"] if spans else time.time() - summary["wall_seconds"]
+    root = {
+        "traceId": trace_id,
+        "spanId": root_id,
+        "name": "tts.job",
+        "kind": 1,
+        "startTimeUnixNano": _nanos(start),
+        "endTimeUnixNano": _nanos(start + summary["wall_seconds"]),
+        "attributes": _otlp_attributes({
+            "task.id": task_id,
+            **attributes,
+            "tts.chars": summary["chars"],
+            "tts.audio_seconds": summary["audio_seconds"],
+            "tts.worker_seconds": summary["worker_seconds"],
+            "tts.real_time_factor": summary["real_time_factor"],
+        }),
+    }
+    children = [
+        {
+            "traceId": trace_id,
+            "spanId": os.urandom(8).hex(),
+            "parentSpanId": root_id,
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": _nanos(span["start"]),
+            "endTimeUnixNano": _nanos(span["start"] + span["duration"]),
+            "attributes": _otlp_attributes({k: v for k, v in span.items() if k not in ("name", "start", "duration")}),
+        }
+        for span in spans
+    ]
+    payload = {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": settings.trace_service_name})},
+            "scopeSpans": [{"scope": {"name": "app.tasks"}, "spans": [root, *children]}],
+        }]
+    }
+    try:
+        response = requests.post(settings.trace_export_url, json=payload, timeout=settings.trace_export_timeout_seconds)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to export trace for task {task_id}: {e}")
@@ -0,0 +1,77 @@
+"""
+Throughput of the NumPy post-processing stage, reported as multiples of real time.
+
+Run from the server directory:
+    python -m benchmarks.bench_audio_processing --seconds 300 --sample-rate 24000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.audio_processing import (
+    level_chunks,
+    normalize_loudness,
+    normalize_peak,
+    process_audio,
+    quantize,
+    resample,
+    trim_silence,
+)
+
+
+def synthetic_speech(seconds: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Noise-excited harmonic bursts with pauses and silent edges, roughly the envelope of TTS output."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    carrier = np.sin(2 * np.pi * 140 * t) + 0.5 * np.sin(2 * np.pi * 280 * t) + 0.2 * rng.standard_normal(t.size)
+    syllables = (np.sin(2 * np.pi * 4 * t) > 0).astype(np.float32)
+    pauses = (np.sin(2 * np.pi * 0.2 * t) > -0.8).astype(np.float32)
+    signal = (0.3 * carrier * syllables * pauses).astype(np.float32)
+    edge = int(0.5 * sample_rate)
+    signal[:edge] = 0
+    signal[-edge:] = 0
+    return signal
+
+
+def bench(label: str, fn, audio_seconds: float, repeats: int):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms   {audio_seconds / elapsed:10.0f}x real time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=300.0, help="Length of the synthetic input")
+    parser.add_argument("--sample-rate", type=int, default=24000, help="Input sample rate (Kokoro/Chatterbox produce 24 kHz)")
+    parser.add_argument("--target-rate", type=int, default=44100, help="Resampling target")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    sr = args.sample_rate
+    samples = synthetic_speech(args.seconds, sr)
+    chunks = np.array_split(samples, max(int(args.seconds // 30), 1))
+    full_chain = {
+        "normalize": "loudness",
+        "trim_silence": True,
+        "sample_rate": args.target_rate,
+        "bit_depth": 16,
+    }
+
+    print(f"Input: {args.seconds:.0f}s @ {sr} Hz ({samples.size:,} samples)\n")
+    bench("peak normalize", lambda: normalize_peak(samples), args.seconds, args.repeats)
+    bench("loudness normalize", lambda: normalize_loudness(samples, sr), args.seconds, args.repeats)
+    bench("level chunks (loudness)", lambda: level_chunks(chunks, sr, {"normalize": "loudness"}), args.seconds, args.repeats)
+    bench("trim silence", lambda: trim_silence(samples, sr), args.seconds, args.repeats)
+    bench(f"resample -> {args.target_rate}", lambda: resample(samples, sr, args.target_rate), args.seconds, args.repeats)
+    bench("resample -> 16000", lambda: resample(samples, sr, 16000), args.seconds, args.repeats)
+    bench("quantize int16", lambda: quantize(samples, 16), args.seconds, args.repeats)
+    bench("quantize int24 + dither", lambda: quantize(samples, 24, dither=True), args.seconds, args.repeats)
+    bench("full chain", lambda: process_audio(samples, sr, full_chain), args.seconds, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cost of getting synthesized audio into Whisper: the old file round-trip (write WAV, then
+whisper.load_audio spawns ffmpeg to decode and resample it) versus handing the samples over
+and resampling to 16 kHz in NumPy.
+
+With --transcribe, also times a full transcribe_word_timings call both ways, which shows the
+saving against the cost of the model itself.
+
+Run from the server directory (needs openai-whisper and ffmpeg):
+    python -m benchmarks.bench_caption_input --seconds 60 --repeats 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+import whisper
+
+from app.utils.audio_processing import resample, to_mono_float32
+from benchmarks.bench_audio_processing import synthetic_speech
+
+
+def timed(fn, repeats: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the synthetic audio")
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--transcribe", action="store_true", help="Also time full transcription with the Whisper model")
+    args = parser.parse_args()
+
+    sr = args.sample_rate
+    samples = synthetic_speech(args.seconds, sr)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "audio.wav")
+
+        def file_round_trip():
+            sf.write(path, samples, sr, subtype="PCM_16")
+            return whisper.load_audio(path)
+
+        def in_memory():
+            return resample(to_mono_float32(samples), sr, whisper.audio.SAMPLE_RATE)
+
+        from_file, from_memory = file_round_trip(), in_memory()
+        n = min(from_file.size, from_memory.size)
+        error = float(np.sqrt(np.mean((from_file[:n] - from_memory[:n]) ** 2)))
+
+        print(f"Input: {args.seconds:.0f}s @ {sr} Hz -> {whisper.audio.SAMPLE_RATE} Hz")
+        file_time = timed(file_round_trip, args.repeats)
+        memory_time = timed(in_memory, args.repeats)
+        print(f"{'WAV + ffmpeg decode':<24} {file_time * 1000:9.1f} ms")
+        print(f"{'in-memory resample':<24} {memory_time * 1000:9.1f} ms   ({file_time / memory_time:.1f}x faster)")
+        print(f"RMS difference between the two inputs: {error:.5f}")
+
+        if args.transcribe:
+            from app.services.subtitles.subtitle_generator import SubtitleGenerator
+
+            generator = SubtitleGenerator()
+            sf.write(path, samples, sr, subtype="PCM_16")
+            path_time = timed(lambda: generator.transcribe_word_timings(path), 1)
+            samples_time = timed(lambda: generator.transcribe_word_timings(samples, sr), 1)
+            print(f"\n{'transcribe from file':<24} {path_time:9.2f} s")
+            print(f"{'transcribe from samples':<24} {samples_time:9.2f} s   (saved {path_time - samples_time:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
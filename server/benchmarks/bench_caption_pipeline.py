@@ -0,0 +1,113 @@
+"""
+Back-to-back vs pipelined captioning of a long-form job. Renders a long text with the stub engine
+(with a per-character synthesis delay) and captions it either after synthesis, chunk by chunk,
+or through CaptionPipeline while synthesis continues. Prints wall-clock time for both next to
+the synthesis and captioning times on their own, and checks that both paths produce the same
+word timings.
+
+By default captioning is simulated with a fixed cost per second of audio, so no model or
+services are needed. --whisper transcribes with the real Whisper model instead.
+
+Run from the server directory:
+    python -m benchmarks.bench_caption_pipeline --chars 6000 --latency 0.0005 --caption-cost 0.01
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.audio_module.stub_module import StubAudio
+from app.services.subtitles.caption_pipeline import CaptionPipeline
+from app.services.subtitles.caption_renderer import concatenate_word_timings
+
+PARAGRAPH = (
+    "The lighthouse keeper climbed the stairs before dawn. Salt had crusted over the brass rail "
+    "again. Far out, a trawler's lamp blinked twice and went dark. "
+)
+
+
+def simulated_transcriber(cost_per_audio_second: float):
+    def transcribe(index: int, samples: np.ndarray, sample_rate: int) -> dict:
+        seconds = len(samples) / sample_rate
+        time.sleep(seconds * cost_per_audio_second)
+        # One "word" per half second of audio, so offsets are checkable
+        starts = np.arange(0.0, seconds, 0.5)
+        return {
+            "version": 1,
+            "words": [f" w{index}.{i}" for i in range(len(starts))],
+            "start": starts.round(3).tolist(),
+            "end": np.minimum(starts + 0.4, seconds).round(3).tolist(),
+        }
+
+    return transcribe
+
+
+def whisper_transcriber():
+    from app.services.subtitles.subtitle_generator import SubtitleGenerator
+
+    generator = SubtitleGenerator()
+
+    def transcribe(index: int, samples: np.ndarray, sample_rate: int) -> dict:
+        return generator.transcribe_word_timings(samples, sample_rate)
+
+    return transcribe
+
+
+def back_to_back(engine: StubAudio, text: str, path: str, transcribe) -> tuple[dict, float, float]:
+    chunks = []
+    start = time.perf_counter()
+    engine.generate_audio(text, path, None, chunk_callback=lambda index, samples, sample_rate: chunks.append((samples, sample_rate)))
+    synthesized = time.perf_counter()
+    timings = [transcribe(index, samples, sample_rate) for index, (samples, sample_rate) in enumerate(chunks)]
+    sample_rate = chunks[0][1]
+    offsets = np.concatenate([[0], np.cumsum([len(samples) for samples, _ in chunks[:-1]])]) / sample_rate
+    merged = concatenate_word_timings(timings, offsets.tolist())
+    end = time.perf_counter()
+    return merged, synthesized - start, end - synthesized
+
+
+def pipelined(engine: StubAudio, text: str, path: str, transcribe, max_pending: int) -> tuple[dict, float]:
+    start = time.perf_counter()
+    pipeline = CaptionPipeline(transcribe, max_pending=max_pending)
+    try:
+        engine.generate_audio(text, path, None, chunk_callback=pipeline.submit)
+        merged = pipeline.finish()
+    finally:
+        pipeline.abort()
+    return merged, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.0005, help="Synthesis seconds per character")
+    parser.add_argument("--caption-cost", type=float, default=0.01, help="Simulated captioning seconds per audio second")
+    parser.add_argument("--max-pending", type=int, default=2)
+    parser.add_argument("--whisper", action="store_true", help="Transcribe with the Whisper model")
+    args = parser.parse_args()
+
+    engine = StubAudio()
+    engine.latency_per_char = args.latency
+    transcribe = whisper_transcriber() if args.whisper else simulated_transcriber(args.caption_cost)
+    text = (PARAGRAPH * (args.chars // len(PARAGRAPH) + 1))[:args.chars]
+    print(f"Text: {len(text)} chars in {len(engine.split_text(text))} chunks")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "out.wav")
+        serial_timings, synthesis, captioning = back_to_back(engine, text, path, transcribe)
+        pipelined_timings, overlapped = pipelined(engine, text, path, transcribe, args.max_pending)
+
+    if not args.whisper:
+        assert serial_timings == pipelined_timings, "pipelined captions differ from back-to-back captions"
+
+    total = synthesis + captioning
+    print(f"{'synthesis':<22} {synthesis:8.2f} s")
+    print(f"{'captioning':<22} {captioning:8.2f} s")
+    print(f"{'back to back':<22} {total:8.2f} s")
+    print(f"{'pipelined':<22} {overlapped:8.2f} s   (ideal {max(synthesis, captioning):.2f} s, {total / overlapped:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
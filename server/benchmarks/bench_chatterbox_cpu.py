@@ -0,0 +1,80 @@
+"""
+Chatterbox on CPU: load time, first-generation latency, steady-state latency and real-time
+factor for each CPU profile (thread count, fp32 / bf16 autocast / dynamic int8).
+
+Generation samples tokens, so every render is seeded identically; similarity against the fp32
+profile then shows how far reduced precision drifts (int8 usually changes some sampled tokens,
+so expect a lower score there even when it sounds the same).
+
+Run from the server directory:
+    python -m benchmarks.bench_chatterbox_cpu --threads 8 --repeats 2
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import torch
+
+from app.services.chatterbox.chatterbox import ChatterboxGenerationConfig, ChatterboxRuntimeConfig, ChatterboxService
+from benchmarks.metrics import spectral_similarity
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Overflow traffic lands on CPU nodes, so this sentence measures how long a typical chunk takes there.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--precisions", default="fp32,bf16,int8", help="comma-separated CPU precisions to compare")
+    args = parser.parse_args()
+
+    profiles = {"fp32 default threads": ChatterboxRuntimeConfig(device="cpu")}
+    for precision in args.precisions.split(","):
+        profiles[f"{precision} {args.threads} threads"] = ChatterboxRuntimeConfig(
+            device="cpu", cpu_threads=args.threads, cpu_precision=precision
+        )
+
+    configs = [ChatterboxGenerationConfig(text=text) for text in SENTENCES]
+    baseline: list[np.ndarray] = []
+    print(f"{'profile':<24} {'load s':>7} {'first s':>8} {'p50 s':>7} {'RTF':>7} {'similarity':>11}")
+    for label, runtime in profiles.items():
+        start = time.perf_counter()
+        service = ChatterboxService(runtime)
+        load_time = time.perf_counter() - start
+
+        torch.manual_seed(args.seed)
+        start = time.perf_counter()
+        service.synthesize(configs[0])
+        first_time = time.perf_counter() - start
+
+        latencies, outputs = [], []
+        synth_seconds = audio_seconds = 0.0
+        for _ in range(args.repeats):
+            outputs = []
+            for config in configs:
+                torch.manual_seed(args.seed)
+                start = time.perf_counter()
+                samples, sample_rate = service.synthesize(config)
+                elapsed = time.perf_counter() - start
+                latencies.append(elapsed)
+                synth_seconds += elapsed
+                audio_seconds += len(samples) / sample_rate
+                outputs.append(samples)
+
+        if not baseline:
+            baseline = outputs
+        similarity = np.mean([spectral_similarity(a, b) for a, b in zip(baseline, outputs)])
+        print(
+            f"{label:<24} {load_time:7.1f} {first_time:8.2f} {np.median(latencies):7.2f} "
+            f"{synth_seconds / audio_seconds:7.2f} {similarity:11.4f}"
+        )
+        del service
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Worker layout sweep for a CPU host: how many worker processes, each with how many threads, get
+the most audio out of the machine. For every layout (workers x threads, fitting in the physical
+cores) the processes are pinned to disjoint core sets as the worker does with WORKER_CPU_SLOTS,
+load the engine and render chunks for --duration seconds at the same time. Each worker count
+also runs unpinned with the libraries' default thread counts, which is what several workers on
+one host do without partitioning.
+
+Prints throughput (seconds of audio per wall second), chunk latency and the recommended
+WORKER_CPU_SLOTS / WORKER_CPU_THREADS / concurrency settings.
+
+Run from the server directory:
+    python -m benchmarks.bench_cpu_layout --engine kokoro --duration 30
+"""
+import argparse
+import multiprocessing
+import time
+from typing import Optional
+
+from app.utils.cpu_affinity import CpuSlot, apply_cpu_slot, available_cpus, format_cpus, partition_cores, physical_cores
+from benchmarks.metrics import percentiles
+
+TEXT = (
+    "The lighthouse keeper climbed the stairs before dawn, counting the steps as he always did, "
+    "and stopped at the window to watch the trawlers come in."
+)
+
+
+def worker(engine: str, slot: Optional[CpuSlot], duration: float, barrier, results):
+    if slot is not None:
+        # Before the engine is imported, so its thread pools start at the slot's size
+        apply_cpu_slot(slot)
+    from app.audio_module.engine_registry import load_audio_engine
+
+    synthesize = load_audio_engine(engine).chunk_synthesizer({})
+    synthesize(TEXT)  # warm-up
+    barrier.wait()
+
+    latencies, audio_seconds = [], 0.0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        samples, sample_rate = synthesize(TEXT)
+        latencies.append(time.perf_counter() - start)
+        audio_seconds += len(samples) / sample_rate
+    results.put((latencies, audio_seconds))
+
+
+def run(engine: str, slots: list[Optional[CpuSlot]], duration: float) -> tuple[float, list[float]]:
+    # Fresh interpreters, as model libraries size their thread pools once per process
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(len(slots))
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(engine, slot, duration, barrier, results)) for slot in slots]
+    for p in processes:
+        p.start()
+    collected = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return sum(audio for _, audio in collected) / duration, [l for latencies, _ in collected for l in latencies]
+
+
+def layouts(cores: int, workers: Optional[list[int]], threads: Optional[list[int]]) -> list[tuple[int, int]]:
+    powers = [n for n in (1, 2, 4, 8, 16, 32, 64, 128) if n <= cores]
+    return [(w, t) for w in (workers or powers) for t in (threads or powers) if w * t <= cores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", default="kokoro")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds each layout renders for")
+    parser.add_argument("--workers", default="", help="Worker counts to try (default: powers of two up to the core count)")
+    parser.add_argument("--threads", default="", help="Threads per worker to try (default: powers of two)")
+    parser.add_argument("--no-unpinned", action="store_true", help="Skip the unpinned baselines")
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    cores = physical_cores(cpus)
+    print(f"{len(cpus)} CPUs ({format_cpus(cpus)}) in {len(cores)} physical cores, engine={args.engine}")
+    worker_counts = [int(n) for n in args.workers.split(",") if n]
+    thread_counts = [int(n) for n in args.threads.split(",") if n]
+
+    rows = []
+    for workers, threads in layouts(len(cores), worker_counts, thread_counts):
+        slots = partition_cores(cores, workers, threads)
+        rows.append((f"{workers} x {threads} pinned", workers, threads, *run(args.engine, slots, args.duration)))
+    if not args.no_unpinned:
+        for workers in sorted({workers for workers, _ in layouts(len(cores), worker_counts, thread_counts)}):
+            rows.append((f"{workers} x default", workers, None, *run(args.engine, [None] * workers, args.duration)))
+
+    print(f"{'layout':<20} {'audio s/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, _, _, throughput, latencies in rows:
+        stats = percentiles(latencies)
+        print(f"{label:<20} {throughput:>10.2f} {stats['p50'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f}")
+
+    label, workers, threads, throughput, _ = max(rows, key=lambda row: row[3])
+    print(f"\nBest: {label} ({throughput:.2f} s of audio per second)")
+    if threads is not None:
+        print(f"  WORKER_CPU_SLOTS={workers} WORKER_CPU_THREADS={threads}, celery worker --pool prefork --concurrency {workers}")
+    else:
+        print(f"  No partitioning; celery worker --pool prefork --concurrency {workers}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Serial vs distributed (chord) rendering of a long text, run in Celery eager mode with the stub
+engine. Checks that the merged output keeps chunk order and matches the serial render sample for
+sample, then prints wall-clock times for both paths.
+
+Eager mode runs the chunk tasks one after another in this process, so the timings show the
+fan-out overhead rather than the speed-up; run real workers for that. Redis and MinIO must be
+reachable with the usual settings.
+
+Run from the server directory:
+    python -m benchmarks.bench_distributed --chars 20000 --latency 0.0005
+"""
+import argparse
+import io
+import os
+import time
+import uuid
+
+os.environ.setdefault("ENABLE_STUB_ENGINE", "true")
+
+import numpy as np
+import soundfile as sf
+
+from app.audio_module.engine_registry import get_audio_engine
+from app.celery_worker import celery_app
+from app.config import settings
+from app.services.minio.minio_client import minio_client, bucket_name
+from app.tasks import generate_audio_task
+
+SENTENCES = [
+    "The lighthouse keeper climbed the stairs before dawn.",
+    "Salt had crusted over the brass rail again.",
+    "Far out, a trawler's lamp blinked twice and went dark.",
+    "She wrote the time in the log and lit the lamp.",
+    "By noon the fog had rolled back toward the cliffs.",
+]
+
+
+def long_text(chars: int) -> str:
+    parts, length, i = [], 0, 0
+    while length < chars:
+        sentence = f"{SENTENCES[i % len(SENTENCES)]} ({i})"
+        parts.append(sentence)
+        length += len(sentence) + 1
+        i += 1
+    return " ".join(parts)
+
+
+def render(text: str, distributed: bool) -> tuple[np.ndarray, int, dict, float]:
+    task_id = f"bench-{uuid.uuid4()}"
+    start = time.perf_counter()
+    result = generate_audio_task.apply(
+        args=["stub", text, None, "wav", None],
+        kwargs={"distributed": distributed},
+        task_id=task_id,
+    ).get()
+    elapsed = time.perf_counter() - start
+
+    response = minio_client.get_object(bucket_name, result["output_object"])
+    try:
+        samples, sample_rate = sf.read(io.BytesIO(response.read()), dtype="float32")
+    finally:
+        response.close()
+        response.release_conn()
+    minio_client.remove_object(bucket_name, result["output_object"])
+    return samples, sample_rate, result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=20000, help="Length of the synthetic text")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated synthesis seconds per character")
+    args = parser.parse_args()
+
+    settings.stub_engine_seconds_per_char = args.latency
+    celery_app.conf.task_always_eager = True
+    celery_app.conf.task_eager_propagates = True
+
+    text = long_text(args.chars)
+    engine = get_audio_engine("stub")
+    engine.latency_per_char = args.latency
+    chunks = engine.split_text(text)
+    print(f"Text: {len(text):,} chars in {len(chunks)} chunks\n")
+
+    serial, serial_rate, _, serial_time = render(text, distributed=False)
+    merged, merged_rate, result, merged_time = render(text, distributed=True)
+
+    assert result.get("distributed"), "distributed render did not fan out"
+    assert result["chunks"] == len(chunks), f"expected {len(chunks)} chunks, merged {result['chunks']}"
+    assert serial_rate == merged_rate, f"sample rate mismatch: {serial_rate} vs {merged_rate}"
+    assert serial.shape == merged.shape, f"length mismatch: {serial.shape} vs {merged.shape}"
+
+    # Ordering: each chunk must sit at the offset the serial render put it at
+    offset = 0
+    for index, chunk_text in enumerate(chunks):
+        expected, _ = engine.chunk_synthesizer(None)(chunk_text)
+        window = merged[offset:offset + expected.size]
+        assert np.allclose(window, expected, atol=1e-4), f"chunk {index} out of place at sample {offset}"
+        offset += expected.size
+    assert np.allclose(serial, merged, atol=1e-4), "distributed output differs from serial output"
+
+    print(f"{'serial':<14} {serial_time:8.2f} s")
+    print(f"{'distributed':<14} {merged_time:8.2f} s   ({len(chunks)} chunk tasks + merge, eager)")
+    print("\nOrdering and output equivalence: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Shared inference server against in-process models. Starts the server in a subprocess, then
+--workers processes (standing in for Celery prefork children) render --chunks chunks each
+through it, and compares with every worker loading its own copy of the engine.
+
+Prints wall time, chunks per second, per-chunk overhead of the round trip (socket plus shared
+memory) and the resident memory of the server and of each worker. With the stub engine the
+memory numbers only show the client's footprint; use --engine kokoro/chatterbox on a machine
+with the models to see the weights counted once instead of per worker.
+
+Run from the server directory:
+    python -m benchmarks.bench_inference_server --workers 4 --chunks 50
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.metrics import percentiles
+
+TEXT = (
+    "The lighthouse keeper climbed the stairs before dawn, counting the steps as he always did, "
+    "and stopped at the window to watch the trawlers come in."
+)
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def worker(engine: str, chunks: int, remote: bool, results):
+    from app.audio_module.engine_registry import get_audio_engine
+    from app.config import settings
+
+    if not remote:
+        settings.inference_server_socket = None
+
+    audio_engine = get_audio_engine(engine)
+    synthesize = audio_engine.chunk_synthesizer({})
+    latencies = []
+    for i in range(chunks):
+        start = time.perf_counter()
+        samples, _ = synthesize(f"{TEXT} Chunk {i}.")
+        samples.sum()  # touch every page, as the merge would
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies, rss_mb(os.getpid())))
+
+
+def run(engine: str, workers: int, chunks: int, remote: bool) -> tuple[float, list[float], list[float]]:
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(engine, chunks, remote, results)) for _ in range(workers)]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    collected = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for p in processes:
+        p.join()
+    return elapsed, [l for latencies, _ in collected for l in latencies], [rss for _, rss in collected]
+
+
+def wait_for_socket(path: str, server: subprocess.Popen, timeout: float = 600.0):
+    from app.services.inference.client import InferenceClient, InferenceServerError
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Inference server exited during startup")
+        try:
+            InferenceClient(path, timeout=5).call({"op": "ping"})
+            return
+        except InferenceServerError:
+            time.sleep(0.2)
+    raise TimeoutError("Inference server did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", default="stub")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunks", type=int, default=50, help="Chunks per worker")
+    args = parser.parse_args()
+
+    if args.engine == "stub":
+        os.environ["ENABLE_STUB_ENGINE"] = "true"
+    socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    os.environ["INFERENCE_SERVER_SOCKET"] = socket_path
+    os.environ["INFERENCE_SERVER_MODELS"] = args.engine
+    env = {**os.environ, "INFERENCE_SERVER_PRELOAD": args.engine}
+
+    server = subprocess.Popen([sys.executable, "-m", "app.services.inference.server"], env=env, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_socket(socket_path, server)
+        rows = [
+            ("in-process", *run(args.engine, args.workers, args.chunks, remote=False)),
+            ("inference server", *run(args.engine, args.workers, args.chunks, remote=True)),
+        ]
+        server_rss = rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    total = args.workers * args.chunks
+    print(f"{args.workers} workers x {args.chunks} chunks, engine={args.engine}")
+    print(f"{'mode':<18} {'wall s':>8} {'chunks/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'worker RSS MB':>14} {'total RSS MB':>13}")
+    for label, elapsed, latencies, worker_rss in rows:
+        stats = percentiles(latencies)
+        total_rss = sum(worker_rss) + (server_rss if label == "inference server" else 0)
+        print(
+            f"{label:<18} {elapsed:>8.2f} {total / elapsed:>9.1f} {stats['p50'] * 1000:>8.2f} {stats['p99'] * 1000:>8.2f} "
+            f"{max(worker_rss):>14.0f} {total_rss:>13.0f}"
+        )
+    print(f"Server RSS: {server_rss:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
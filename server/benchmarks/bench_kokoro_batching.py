@@ -0,0 +1,93 @@
+"""
+Kokoro micro-batching against unbatched concurrent requests. --clients threads (standing in for
+a threads-pool worker or the inference server) each render --requests short prompts, first each
+calling the session directly, then through the micro-batcher at every --windows setting.
+
+Prints throughput and latency percentiles per mode, plus the mean batch size the batcher formed.
+
+Run from the server directory (model files from app/services/kokoro/kokoro.py):
+    python -m benchmarks.bench_kokoro_batching --clients 8 --requests 20 --windows 2,5,10
+"""
+import argparse
+import threading
+import time
+from typing import Optional
+
+from app.services.kokoro.batcher import MicroBatcher
+from app.services.kokoro.kokoro import KokoroGenerationConfig, KokoroService
+from benchmarks.metrics import percentiles
+
+PROMPTS = [
+    "Your order has shipped.",
+    "Press one to hear this menu again.",
+    "The meeting starts in five minutes.",
+    "Turn left at the next intersection.",
+    "Thanks for calling, how can I help?",
+    "Your verification code is four, two, seven, nine.",
+]
+
+
+def run(service: KokoroService, batcher: Optional[MicroBatcher], clients: int, requests: int) -> tuple[float, list[float], list[int]]:
+    batch_sizes = []
+    if batcher is not None:
+        run_batch = batcher._run_batch
+
+        def counted(configs):
+            batch_sizes.append(len(configs))
+            return run_batch(configs)
+
+        batcher._run_batch = counted
+    service.batcher = batcher
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset: int):
+        for i in range(requests):
+            config = KokoroGenerationConfig(text=PROMPTS[(offset + i) % len(PROMPTS)])
+            start = time.perf_counter()
+            service.synthesize(config)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, batch_sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--windows", default="2,5,10", help="Batching windows to try, in milliseconds")
+    parser.add_argument("--max-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    service = KokoroService()
+    # Warm-up: first inference allocates the session's buffers; phoneme cache sees every prompt
+    for prompt in PROMPTS:
+        service.synthesize(KokoroGenerationConfig(text=prompt))
+
+    modes = [("unbatched", None)] + [
+        (f"window {ms} ms", MicroBatcher(service.synthesize_batch, window_seconds=float(ms) / 1000, max_batch=args.max_batch))
+        for ms in args.windows.split(",")
+    ]
+    total = args.clients * args.requests
+    print(f"{args.clients} clients x {args.requests} requests, max batch {args.max_batch}")
+    print(f"{'mode':<16} {'wall s':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for label, batcher in modes:
+        elapsed, latencies, batch_sizes = run(service, batcher, args.clients, args.requests)
+        stats = percentiles(latencies)
+        mean_batch = f"{sum(batch_sizes) / len(batch_sizes):.1f}" if batch_sizes else "-"
+        print(
+            f"{label:<16} {elapsed:>8.2f} {total / elapsed:>8.1f} {stats['p50'] * 1000:>8.1f} "
+            f"{stats['p99'] * 1000:>8.1f} {mean_batch:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
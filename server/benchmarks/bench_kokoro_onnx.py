@@ -0,0 +1,90 @@
+"""
+Kokoro latency, real-time factor and output similarity across ONNX Runtime configurations on CPU.
+
+Each configuration loads its own session and renders the same sentences. Similarity is the
+correlation of log-magnitude spectrograms against the first (baseline) configuration, so 1.0
+means identical audio; the int8 model typically lands a little below that.
+
+Run from the server directory (model files from app/services/kokoro/kokoro.py):
+    python -m benchmarks.bench_kokoro_onnx --threads 4 --repeats 3
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.services.kokoro.kokoro import KokoroGenerationConfig, KokoroRuntimeConfig, KokoroService
+from app.config import settings
+from benchmarks.metrics import spectral_similarity
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Kokoro renders this paragraph to measure how quickly the model runs on a plain CPU node, "
+    "with a few clauses, some punctuation, and enough words to reach a realistic chunk length.",
+    "Numbers like 1,024 and dates like March 3rd exercise the phonemizer too.",
+]
+
+
+def configurations(threads: int) -> dict[str, KokoroRuntimeConfig]:
+    cpu = ["CPUExecutionProvider"]
+    base = dict(model_path=settings.kokoro_model_path, voices_path=settings.kokoro_voices_path, providers=cpu)
+    configs = {
+        "fp32 default": KokoroRuntimeConfig(**base),
+        f"fp32 intra={threads}": KokoroRuntimeConfig(**base, intra_op_threads=threads, inter_op_threads=1),
+        f"fp32 intra={threads} no-arena": KokoroRuntimeConfig(
+            **base, intra_op_threads=threads, inter_op_threads=1, enable_cpu_mem_arena=False, enable_mem_pattern=False
+        ),
+        "fp32 opt=basic": KokoroRuntimeConfig(**base, intra_op_threads=threads, graph_optimization_level="basic"),
+    }
+    if os.path.isfile(settings.kokoro_int8_model_path):
+        int8 = {**base, "model_path": settings.kokoro_int8_model_path}
+        configs["int8 default"] = KokoroRuntimeConfig(**int8)
+        configs[f"int8 intra={threads}"] = KokoroRuntimeConfig(**int8, intra_op_threads=threads, inter_op_threads=1)
+    else:
+        print(f"Skipping int8 configurations: {settings.kokoro_int8_model_path} not found\n")
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="intra-op threads for the tuned configurations")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--voice", default="am_michael")
+    args = parser.parse_args()
+
+    baseline: list[np.ndarray] = []
+    print(f"{'configuration':<30} {'load s':>7} {'p50 ms':>8} {'RTF':>7} {'similarity':>11}")
+    for label, runtime in configurations(args.threads).items():
+        start = time.perf_counter()
+        service = KokoroService(runtime)
+        load_time = time.perf_counter() - start
+
+        configs = [KokoroGenerationConfig(text=text, voice=args.voice) for text in SENTENCES]
+        service.synthesize(configs[0])  # warm-up: first run pays for allocation and kernel selection
+
+        latencies, outputs = [], []
+        synth_seconds = audio_seconds = 0.0
+        for _ in range(args.repeats):
+            outputs = []
+            for config in configs:
+                start = time.perf_counter()
+                samples, sample_rate = service.synthesize(config)
+                elapsed = time.perf_counter() - start
+                latencies.append(elapsed)
+                synth_seconds += elapsed
+                audio_seconds += len(samples) / sample_rate
+                outputs.append(np.asarray(samples, dtype=np.float32))
+
+        if not baseline:
+            baseline = outputs
+        similarity = np.mean([spectral_similarity(a, b) for a, b in zip(baseline, outputs)])
+        print(
+            f"{label:<30} {load_time:7.2f} {np.median(latencies) * 1000:8.0f} "
+            f"{synth_seconds / audio_seconds:7.3f} {similarity:11.4f}"
+        )
+        del service
+
+
+if __name__ == "__main__":
+    main()
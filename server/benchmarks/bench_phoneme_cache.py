@@ -0,0 +1,112 @@
+"""
+Kokoro G2P with and without the sentence-level phoneme cache, on a synthetic corpus shaped like
+our traffic: every job opens and closes with one of a few intros/outros, mentions product names
+from a small catalogue, repeats stock sentences, and adds some sentences of its own.
+
+Prints the total phonemization time uncached and cached, the cache hit rate, and how many jobs
+came out with exactly the phonemes of whole-text phonemization (sentence-level phonemization
+can differ in spacing at sentence joins).
+
+Uses kokoro-onnx's tokenizer (espeak-ng via phonemizer), so no model files are needed. Without
+kokoro-onnx, --simulated-ms charges a fixed cost per character instead. --redis adds the shared
+tier through the configured Redis, starting from a cold cache in a second "worker".
+
+Run from the server directory:
+    python -m benchmarks.bench_phoneme_cache --jobs 300
+"""
+import argparse
+import random
+import time
+
+from app.services.kokoro.phoneme_cache import PhonemeCache
+
+INTROS = [
+    "Welcome back to the channel.",
+    "Hey everyone, thanks for tuning in.",
+    "Here is today's story.",
+]
+OUTROS = [
+    "If you enjoyed this, hit subscribe.",
+    "Thanks for listening, see you tomorrow.",
+    "Leave a comment and tell us what you think.",
+]
+PRODUCTS = ["the Aurora X2 headphones", "Lumen smart bulbs", "the Northwind backpack", "Kestrel running shoes"]
+STOCK = [
+    "This episode is sponsored by {product}.",
+    "Use the link in the description to get ten percent off {product}.",
+    "I've been using {product} for a month now.",
+    "The wind howled around the old house.",
+    "Nobody in the village talked about the lighthouse.",
+    "She locked the door behind her and listened.",
+]
+WORDS = "river lamp stone quiet winter letter garden shadow engine harbor morning candle".split()
+
+
+def corpus(jobs: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(jobs):
+        sentences = [rng.choice(INTROS)]
+        for _ in range(rng.randint(8, 24)):
+            if rng.random() < 0.5:
+                sentences.append(rng.choice(STOCK).format(product=rng.choice(PRODUCTS)))
+            else:
+                words = rng.sample(WORDS, rng.randint(5, 9))
+                sentences.append(" ".join(words).capitalize() + f" at {rng.randint(1, 12)} o'clock.")
+        sentences.append(rng.choice(OUTROS))
+        texts.append(" ".join(sentences))
+    return texts
+
+
+def load_phonemizer(simulated_ms: float):
+    if simulated_ms:
+        def phonemize(text: str, lang: str) -> str:
+            time.sleep(len(text) * simulated_ms / 1000)
+            return text.lower()
+        return phonemize
+
+    from kokoro_onnx.tokenizer import Tokenizer
+    return Tokenizer().phonemize
+
+
+def run(texts: list[str], phonemize) -> tuple[list[str], float]:
+    start = time.perf_counter()
+    out = [phonemize(text, "en-us") for text in texts]
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--simulated-ms", type=float, default=0.0, help="Fake G2P cost per character, instead of espeak")
+    parser.add_argument("--redis", action="store_true", help="Also measure the shared Redis tier")
+    args = parser.parse_args()
+
+    phonemize = load_phonemizer(args.simulated_ms)
+    texts = corpus(args.jobs)
+    print(f"Corpus: {len(texts)} jobs, {sum(map(len, texts))} chars")
+
+    baseline, uncached_time = run(texts, phonemize)
+    cache = PhonemeCache(phonemize, max_entries=args.cache_size)
+    cached, cached_time = run(texts, cache.phonemize)
+    identical = sum(a == b for a, b in zip(baseline, cached))
+
+    print(f"{'uncached':<22} {uncached_time:8.2f} s")
+    print(f"{'cached (cold start)':<22} {cached_time:8.2f} s   ({uncached_time / cached_time:.1f}x faster)")
+    print(f"Cache: {cache.stats}")
+    print(f"Jobs identical to whole-text phonemization: {identical}/{len(texts)}")
+
+    if args.redis:
+        from app.services.redis.redis_client import redis_client
+
+        namespace = f"bench-{time.time_ns()}"
+        first = PhonemeCache(phonemize, max_entries=args.cache_size, redis_client=redis_client, namespace=namespace, ttl_seconds=600)
+        run(texts, first.phonemize)
+        second = PhonemeCache(phonemize, max_entries=args.cache_size, redis_client=redis_client, namespace=namespace, ttl_seconds=600)
+        _, shared_time = run(texts, second.phonemize)
+        print(f"{'second worker (redis)':<22} {shared_time:8.2f} s   ({second.stats})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Broker cost of submitting long texts: inline in the task message (as before), inline with the
+message compressed, and stored in MinIO with the message carrying only a reference. For each
+text size, --submissions jobs are published to a scratch queue no worker consumes, the way the
+API publishes them (store_text included in the submit time), followed by the chunk messages a
+distributed job fans out into.
+
+Prints per job: the submit latency, the bytes the job message and its chunk messages occupy in
+Redis (MEMORY USAGE of the queue), and how many bytes were uploaded to MinIO. The default text
+is random words from the distributed benchmark's sentences; pass --file for a real manuscript,
+as compression ratios depend on the text.
+
+Redis and MinIO must be reachable with the usual settings.
+
+Run from the server directory:
+    python -m benchmarks.bench_task_payloads --sizes 10000,100000,1000000 --submissions 20
+"""
+import argparse
+import random
+import time
+import uuid
+from typing import Optional
+
+import redis
+
+from app.celery_worker import celery_app
+from app.config import settings
+from app.services.minio.text_store import chunk_refs, delete_text, store_text
+from app.utils.text_utils import split_text_into_chunks
+from benchmarks.bench_distributed import SENTENCES
+from benchmarks.metrics import percentiles
+
+QUEUE = "bench.task_payloads"
+MODES = [
+    ("inline", None, False),
+    ("inline + gzip", "gzip", False),
+    ("reference + gzip", "gzip", True),
+]
+
+
+def prose(chars: int, seed: int = 0) -> str:
+    words = " ".join(SENTENCES).split()
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < chars:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(6, 18))).capitalize() + "."
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:chars]
+
+
+def queue_bytes(client: redis.Redis) -> int:
+    # Priority steps live in sibling keys of the queue
+    return sum(client.memory_usage(key) or 0 for key in client.scan_iter(f"{QUEUE}*"))
+
+
+def clear_queue(client: redis.Redis):
+    for key in client.scan_iter(f"{QUEUE}*"):
+        client.delete(key)
+
+
+def submit(text: str, compression: Optional[str], by_reference: bool) -> tuple[float, Optional[dict]]:
+    """Publishes one generate_audio_task message as the API does; returns the submit time and text reference."""
+    task_id = str(uuid.uuid4())
+    start = time.perf_counter()
+    args = ["stub", text, None, "wav", None, None]
+    kwargs = {"post_processing": None, "distributed": True, "base_task_id": None, "editable": False}
+    text_ref = None
+    if by_reference:
+        text_ref = store_text(task_id, text)
+        args[1] = None
+        kwargs["text_ref"] = text_ref
+    celery_app.send_task("app.tasks.generate_audio_task", args=args, kwargs=kwargs, task_id=task_id, queue=QUEUE, compression=compression)
+    return time.perf_counter() - start, text_ref
+
+
+def fan_out(text: str, text_ref: Optional[dict], compression: Optional[str], chunk_chars: int):
+    """Publishes the chunk messages a distributed job sends for `text`."""
+    chunks = split_text_into_chunks(text, chunk_chars)
+    refs = chunk_refs(text_ref, text, chunks) if text_ref else None
+    for index, chunk in enumerate(chunks):
+        celery_app.send_task(
+            "app.tasks.synthesize_chunk_task",
+            args=["stub", None if refs else chunk, None, "bench", index, None],
+            kwargs={"text_ref": refs[index] if refs else None, "record_text": False},
+            queue=QUEUE,
+            compression=compression,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Text lengths in characters")
+    parser.add_argument("--submissions", type=int, default=20, help="Jobs published per size and mode")
+    parser.add_argument("--chunk-chars", type=int, default=1000, help="Chunk size of the distributed fan-out (Kokoro's by default)")
+    parser.add_argument("--file", help="Take the text from this UTF-8 file (cut or repeated to each size)")
+    args = parser.parse_args()
+
+    # Each publish names its compression; None then really means uncompressed
+    celery_app.conf.task_compression = None
+    client = redis.Redis.from_url(str(settings.celery_broker_url))
+    source = open(args.file, encoding="utf-8").read() if args.file else None
+
+    print(f"{'chars':>9} {'mode':<18} {'submit p50 ms':>14} {'p95 ms':>8} {'job msg KiB':>12} {'chunk msgs KiB':>15} {'MinIO KiB':>10}")
+    for size in (int(n) for n in args.sizes.split(",")):
+        text = (source * (size // len(source) + 1))[:size] if source else prose(size)
+        for label, compression, by_reference in MODES:
+            clear_queue(client)
+            latencies, refs = [], []
+            for _ in range(args.submissions):
+                latency, text_ref = submit(text, compression, by_reference)
+                latencies.append(latency)
+                refs.append(text_ref)
+            job_bytes = queue_bytes(client) / args.submissions
+
+            clear_queue(client)
+            fan_out(text, refs[0], compression, args.chunk_chars)
+            chunk_bytes = queue_bytes(client)
+            clear_queue(client)
+
+            for text_ref in filter(None, refs):
+                delete_text(text_ref)
+            stats = percentiles(latencies)
+            uploaded = len(text.encode("utf-8")) if by_reference else 0
+            print(
+                f"{size:>9,} {label:<18} {stats['p50'] * 1000:>14.2f} {stats['p95'] * 1000:>8.2f} "
+                f"{job_bytes / 1024:>12.1f} {chunk_bytes / 1024:>15.1f} {uploaded / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
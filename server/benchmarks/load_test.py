@@ -0,0 +1,262 @@
+"""
+Open-loop load generator for the API. Submissions arrive as a Poisson process at --submit-rate
+and every accepted task is polled on /tasks/{id} until it finishes. Extra /tasks reads (clients
+refreshing dashboards) and /voices calls run alongside at their own rates. The report covers
+per-endpoint latency percentiles, error and 429 rates, queue wait (submission until the task is
+first seen STARTED, so it is only as precise as --poll-interval) and end-to-end latency, overall
+and per text length in --chars (to see whether short jobs wait behind long ones).
+
+Point it at a server whose API and workers run with ENABLE_STUB_ENGINE=true, e.g. the stack in
+docker-compose.loadtest.yml at the repository root:
+    docker compose -f docker-compose.loadtest.yml up --build --scale worker=2
+
+Run from the server directory:
+    python -m benchmarks.load_test --base-url http://localhost:8000 --duration 60 --submit-rate 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from benchmarks.metrics import percentiles
+
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+SENTENCES = [
+    "The lighthouse keeper climbed the stairs before dawn.",
+    "Salt had crusted over the brass rail again.",
+    "Far out, a trawler's lamp blinked twice and went dark.",
+    "She wrote the time in the log and lit the lamp.",
+    "By noon the fog had rolled back toward the cliffs.",
+]
+
+
+@dataclass
+class RequestSample:
+    endpoint: str
+    latency: float
+    status: Optional[int]  # None when the request itself failed
+    error: Optional[str] = None
+
+
+@dataclass
+class TaskTrace:
+    task_id: str
+    submitted_at: float
+    chars: int
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    state: str = "PENDING"
+
+
+@dataclass
+class LoadTest:
+    client: httpx.AsyncClient
+    args: argparse.Namespace
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    samples: list[RequestSample] = field(default_factory=list)
+    tasks: dict[str, TaskTrace] = field(default_factory=dict)
+    pending: set = field(default_factory=set)
+    submitted: int = 0
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.samples.append(RequestSample(endpoint, time.perf_counter() - start, None, type(e).__name__))
+            return None
+        self.samples.append(RequestSample(endpoint, time.perf_counter() - start, response.status_code))
+        return response
+
+    def payload(self, index: int, chars: int) -> dict:
+        text, i = [], 0
+        while sum(len(s) + 1 for s in text) < chars:
+            text.append(SENTENCES[i % len(SENTENCES)])
+            i += 1
+        # Unique per submission so idempotent coalescing doesn't fold requests together
+        text.append(f"Load test {self.run_id} request {index}.")
+        return {
+            "engine": self.args.engine,
+            "text": " ".join(text),
+            "distributed": random.random() < self.args.distributed_share,
+        }
+
+    async def submit(self, index: int):
+        chars = random.choice(self.args.chars)
+        submitted_at = time.perf_counter()
+        response = await self.request("submit", "POST", "/generate/audio", json=self.payload(index, chars))
+        if response is None or response.status_code != 202:
+            return
+        trace = TaskTrace(response.json()["task_id"], submitted_at, chars)
+        self.tasks[trace.task_id] = trace
+        await self.track(trace)
+
+    async def track(self, trace: TaskTrace):
+        deadline = trace.submitted_at + self.args.task_timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.args.poll_interval)
+            response = await self.request("status", "GET", f"/tasks/{trace.task_id}")
+            if response is None or response.status_code != 200:
+                continue
+            trace.state = response.json()["status"]
+            now = time.perf_counter()
+            if trace.started_at is None and trace.state != "PENDING":
+                trace.started_at = now
+            if trace.state in TERMINAL_STATES:
+                trace.finished_at = now
+                return
+
+    async def random_status(self):
+        if self.tasks:
+            task_id = random.choice(list(self.tasks))
+            await self.request("status", "GET", f"/tasks/{task_id}")
+
+    async def voices(self):
+        await self.request("voices", "GET", "/voices", params={"engine": self.args.engine})
+
+    def spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def arrivals(self, rate: float, make, until: float):
+        """Starts make() at Poisson-distributed times with mean `rate` per second."""
+        if rate <= 0:
+            return
+        while True:
+            await asyncio.sleep(random.expovariate(rate))
+            if time.perf_counter() >= until:
+                return
+            self.spawn(make())
+
+    async def run(self):
+        until = time.perf_counter() + self.args.duration
+
+        def next_submission():
+            self.submitted += 1
+            return self.submit(self.submitted)
+
+        await asyncio.gather(
+            self.arrivals(self.args.submit_rate, next_submission, until),
+            self.arrivals(self.args.status_rate, self.random_status, until),
+            self.arrivals(self.args.voices_rate, self.voices, until),
+        )
+        if self.pending:
+            # Let tracked tasks finish; anything still running at the timeout counts as timed out
+            await asyncio.wait(set(self.pending), timeout=self.args.drain_timeout)
+            for task in set(self.pending):
+                task.cancel()
+
+    def report(self) -> dict:
+        by_endpoint = defaultdict(list)
+        for sample in self.samples:
+            by_endpoint[sample.endpoint].append(sample)
+
+        endpoints = {}
+        for endpoint, samples in sorted(by_endpoint.items()):
+            failed = [s for s in samples if s.status is None or (s.status >= 400 and s.status != 429)]
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": len(failed),
+                "error_rate": len(failed) / len(samples),
+                "rejected_429": sum(s.status == 429 for s in samples),
+                "error_kinds": dict(Counter(s.error or str(s.status) for s in failed)),
+                **{k: v * 1000 for k, v in percentiles([s.latency for s in samples]).items()},
+            }
+
+        traces = list(self.tasks.values())
+        states = defaultdict(int)
+        for trace in traces:
+            states[trace.state if trace.finished_at is not None else "TIMED_OUT"] += 1
+        finished = [t for t in traces if t.finished_at is not None]
+        by_length = {}
+        for chars in sorted(set(t.chars for t in traces)):
+            sized = [t for t in traces if t.chars == chars]
+            by_length[chars] = {
+                "accepted": len(sized),
+                "queue_wait_seconds": percentiles([t.started_at - t.submitted_at for t in sized if t.started_at is not None]),
+                "end_to_end_seconds": percentiles([t.finished_at - t.submitted_at for t in sized if t.finished_at is not None and t.state == "SUCCESS"]),
+            }
+        return {
+            "duration_seconds": self.args.duration,
+            "submissions": self.submitted,
+            "accepted": len(traces),
+            "task_states": dict(states),
+            "endpoints": endpoints,
+            "queue_wait_seconds": percentiles([t.started_at - t.submitted_at for t in traces if t.started_at is not None]),
+            "end_to_end_seconds": percentiles([t.finished_at - t.submitted_at for t in finished if t.state == "SUCCESS"]),
+            "completed_per_second": sum(t.state == "SUCCESS" for t in finished) / self.args.duration,
+            "by_length": by_length,
+        }
+
+
+def print_report(report: dict):
+    print(f"Submissions: {report['submissions']} ({report['accepted']} accepted), task states: {report['task_states']}")
+    print(f"Completed: {report['completed_per_second']:.2f} tasks/s")
+    print(f"\n{'endpoint':<10} {'requests':>9} {'errors':>7} {'429':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['rejected_429']:>6} "
+            f"{stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}"
+            + (f"   {stats['error_kinds']}" if stats["error_kinds"] else "")
+        )
+    print(f"\n{'':<14} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for label, key in (("queue wait", "queue_wait_seconds"), ("end to end", "end_to_end_seconds")):
+        stats = report[key]
+        print(f"{label:<14} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f}")
+    if len(report["by_length"]) > 1:
+        print(f"\n{'chars':>8} {'tasks':>6} {'wait p50':>9} {'wait p95':>9} {'e2e p50':>8} {'e2e p95':>8} {'e2e p99':>8}")
+        for chars, stats in report["by_length"].items():
+            wait, e2e = stats["queue_wait_seconds"], stats["end_to_end_seconds"]
+            print(
+                f"{chars:>8} {stats['accepted']:>6} {wait['p50']:>9.2f} {wait['p95']:>9.2f} "
+                f"{e2e['p50']:>8.2f} {e2e['p95']:>8.2f} {e2e['p99']:>8.2f}"
+            )
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.request_timeout) as client:
+        test = LoadTest(client, args)
+        await test.run()
+    return test.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load; tracking continues for --drain-timeout")
+    parser.add_argument("--submit-rate", type=float, default=5.0, help="Submissions per second")
+    parser.add_argument("--status-rate", type=float, default=10.0, help="Extra /tasks/{id} reads per second, on top of tracking polls")
+    parser.add_argument("--voices-rate", type=float, default=1.0, help="/voices calls per second")
+    parser.add_argument("--engine", default="stub")
+    parser.add_argument("--chars", type=lambda s: [int(c) for c in s.split(",")], default=[300, 1500, 6000], help="Comma-separated text lengths to pick from")
+    parser.add_argument("--distributed-share", type=float, default=0.0, help="Fraction of submissions with distributed=true")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--task-timeout", type=float, default=300.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, help="Seed arrivals and text lengths, for before/after comparisons")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Shared measurements for the benchmark scripts."""
+import numpy as np
+
+
+def spectral_similarity(a: np.ndarray, b: np.ndarray, frame: int = 1024, hop: int = 256) -> float:
+    """
+    Correlation of log-magnitude spectrograms over the overlapping frames: 1.0 for identical
+    audio, near 0 for unrelated signals. Tolerates small length differences between renders.
+    """
+    def log_spectrogram(x: np.ndarray) -> np.ndarray:
+        if x.size < frame:
+            x = np.pad(x, (0, frame - x.size))
+        frames = np.lib.stride_tricks.sliding_window_view(x, frame)[::hop] * np.hanning(frame)
+        return np.log1p(np.abs(np.fft.rfft(frames, axis=1)))
+
+    sa, sb = log_spectrogram(a), log_spectrogram(b)
+    n = min(len(sa), len(sb))
+    return float(np.corrcoef(sa[:n].ravel(), sb[:n].ravel())[0, 1])
+
+
+def percentiles(values, qs=(50, 95, 99)) -> dict[str, float]:
+    """{"p50": ..., "p95": ..., "p99": ...} of `values`, or NaNs when there are none."""
+    if len(values) == 0:
+        return {f"p{q}": float("nan") for q in qs}
+    return {f"p{q}": float(v) for q, v in zip(qs, np.percentile(values, qs))}
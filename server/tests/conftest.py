@@ -0,0 +1,113 @@
+"""
+Fixtures for running tasks in-process without Redis or MinIO: Redis clients are fakeredis
+instances sharing one server, MinIO is an in-memory object store, and Celery runs tasks
+eagerly with an in-memory result backend. The stub engine stands in for real models.
+"""
+import io
+import os
+import types
+
+import fakeredis
+import pytest
+import redis
+from minio.error import S3Error
+
+os.environ.setdefault("ENABLE_STUB_ENGINE", "true")
+
+# Before any app module creates its client
+_redis_server = fakeredis.FakeServer()
+redis.Redis.from_url = classmethod(
+    lambda cls, url, **kwargs: fakeredis.FakeRedis(server=_redis_server, decode_responses=kwargs.get("decode_responses", False))
+)
+
+
+class _Response:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def read(self) -> bytes:
+        return self.data
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinio:
+    """The subset of the MinIO client the tasks use, keeping objects in a dict."""
+
+    def __init__(self):
+        self.objects: dict[str, tuple[bytes, dict]] = {}
+
+    def _missing(self, name: str) -> S3Error:
+        return S3Error("NoSuchKey", "Object does not exist", name, "request", "host", None)
+
+    def put_object(self, bucket, name, data, length, content_type=None, metadata=None):
+        self.objects[name] = (data.read(), {f"x-amz-meta-{key}": value for key, value in (metadata or {}).items()})
+
+    def fput_object(self, bucket, name, path, content_type=None):
+        with open(path, "rb") as f:
+            self.objects[name] = (f.read(), {})
+
+    def get_object(self, bucket, name, offset=0, length=0):
+        if name not in self.objects:
+            raise self._missing(name)
+        data = self.objects[name][0]
+        return _Response(data[offset:offset + length] if length else data[offset:])
+
+    def stat_object(self, bucket, name):
+        if name not in self.objects:
+            raise self._missing(name)
+        return types.SimpleNamespace(metadata=self.objects[name][1])
+
+    def copy_object(self, bucket, name, source):
+        if source.object_name not in self.objects:
+            raise self._missing(source.object_name)
+        self.objects[name] = self.objects[source.object_name]
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        return [types.SimpleNamespace(object_name=name) for name in list(self.objects) if name.startswith(prefix)]
+
+    def remove_object(self, bucket, name):
+        self.objects.pop(name, None)
+
+    def remove_objects(self, bucket, objects):
+        for obj in objects:
+            self.objects.pop(obj._name, None)
+        return []
+
+    def read(self, name: str) -> io.BytesIO:
+        return io.BytesIO(self.objects[name][0])
+
+
+@pytest.fixture
+def minio(monkeypatch):
+    import app.main
+    import app.services.minio.chunk_store
+    import app.services.minio.minio_client
+    import app.services.minio.text_store
+    import app.tasks
+
+    fake = FakeMinio()
+    for module in (app.services.minio.minio_client, app.services.minio.chunk_store, app.services.minio.text_store, app.tasks, app.main):
+        monkeypatch.setattr(module, "minio_client", fake)
+    return fake
+
+
+@pytest.fixture
+def eager_celery(monkeypatch, tmp_path):
+    from app.celery_worker import celery_app
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "output_audio_dir", tmp_path)
+    celery_app.conf.update(task_always_eager=True, task_eager_propagates=True, result_backend="cache+memory://")
+    yield celery_app
+    celery_app.conf.update(task_always_eager=False, task_eager_propagates=False)
+
+
+@pytest.fixture(autouse=True)
+def _flush_redis():
+    yield
+    fakeredis.FakeRedis(server=_redis_server).flushall()
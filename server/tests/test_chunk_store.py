@@ -0,0 +1,75 @@
+"""Chunk checkpoints of serial renders: one manifest write per job, and resumed jobs stay revisable."""
+import uuid
+
+import pytest
+
+from app.audio_module.engine_registry import get_audio_engine
+from app.services.minio.chunk_store import ChunkCheckpointStore, render_fingerprint
+from tests.test_distributed import long_text
+
+
+@pytest.fixture
+def manifest_writes(minio, monkeypatch):
+    writes = []
+    put_object = minio.put_object
+
+    def counting_put_object(bucket, name, data, length, **kwargs):
+        if name.endswith("manifest.json"):
+            writes.append(name)
+        return put_object(bucket, name, data, length, **kwargs)
+
+    monkeypatch.setattr(minio, "put_object", counting_put_object)
+    return writes
+
+
+def render(engine, chunks: list[str], task_id: str, tmp_path):
+    checkpoint = ChunkCheckpointStore(task_id, render_fingerprint("stub", None))
+    engine.generate_audio(" ".join(chunks), (tmp_path / f"{task_id}.wav").as_posix(), None, checkpoint=checkpoint, chunks=chunks)
+
+
+def test_serial_render_writes_the_manifest_once(manifest_writes, tmp_path):
+    engine = get_audio_engine("stub")
+    chunks = engine.split_text(long_text())
+    task_id = str(uuid.uuid4())
+
+    render(engine, chunks, task_id, tmp_path)
+
+    assert len(manifest_writes) == 1
+    assert ChunkCheckpointStore(task_id, render_fingerprint("stub", None)).chunk_texts() == chunks
+
+
+def test_resumed_render_records_chunks_of_the_interrupted_attempt(minio, manifest_writes, tmp_path):
+    engine = get_audio_engine("stub")
+    chunks = engine.split_text(long_text())
+    task_id = str(uuid.uuid4())
+
+    # An attempt that died after two chunks, before writing any manifest
+    interrupted = ChunkCheckpointStore(task_id, render_fingerprint("stub", None))
+    synthesize = engine.chunk_synthesizer({})
+    for index in range(2):
+        interrupted.save(index, chunks[index], *synthesize(chunks[index]))
+    assert manifest_writes == []
+
+    render(engine, chunks, task_id, tmp_path)
+
+    assert len(manifest_writes) == 1
+    assert ChunkCheckpointStore(task_id, render_fingerprint("stub", None)).chunk_texts() == chunks
+
+
+def test_engines_without_checkpoints_get_no_store(minio, eager_celery, manifest_writes, monkeypatch):
+    from app.tasks import generate_audio_task
+
+    monkeypatch.setattr(get_audio_engine("stub"), "supports_checkpoints", False)
+    stores = []
+    monkeypatch.setattr("app.tasks.ChunkCheckpointStore", lambda *args: stores.append(args))
+    text = long_text()
+
+    base_task_id = str(uuid.uuid4())
+    generate_audio_task.apply(args=["stub", text, None, "wav", None], kwargs={"editable": True}, task_id=base_task_id).get()
+    revision = generate_audio_task.apply(
+        args=["stub", text + " One more line.", None, "wav", None], kwargs={"base_task_id": base_task_id}
+    ).get()
+
+    assert stores == []
+    assert "reused_chunks" not in revision
+    assert not any(name.startswith("chunks/") for name in minio.objects)
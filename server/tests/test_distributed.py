@@ -0,0 +1,143 @@
+"""Distributed rendering (chunk fan-out + merge) against rendering the same text in one task."""
+import uuid
+
+import numpy as np
+import pytest
+import soundfile as sf
+from celery.result import AsyncResult
+
+from app.audio_module.engine_registry import get_audio_engine
+from app.config import settings
+from app.services.minio.text_store import store_text
+from app.tasks import generate_audio_task, generate_script_task, merge_chunks_task, synthesize_chunk_task
+
+SENTENCES = [
+    "The lighthouse keeper climbed the stairs before dawn.",
+    "Waves broke against the rocks below, loud and patient.",
+    "A single trawler rounded the headland with its lamps still lit.",
+    "He wrote the time in the log and put the kettle on.",
+]
+
+
+def long_text(sentences: int = 40) -> str:
+    return " ".join(f"{SENTENCES[i % len(SENTENCES)]} ({i})" for i in range(sentences))
+
+
+def render(minio, text: str, distributed: bool) -> tuple[np.ndarray, dict]:
+    result = generate_audio_task.apply(
+        args=["stub", text, None, "wav", None],
+        kwargs={"distributed": distributed},
+        task_id=str(uuid.uuid4()),
+    ).get()
+    samples, _ = sf.read(minio.read(result["output_object"]), dtype="float32")
+    return samples, result
+
+
+def test_distributed_output_matches_serial(minio, eager_celery):
+    text = long_text()
+    chunks = get_audio_engine("stub").split_text(text)
+    assert len(chunks) > 4
+
+    serial, serial_result = render(minio, text, distributed=False)
+    distributed, result = render(minio, text, distributed=True)
+
+    assert "distributed" not in serial_result
+    assert result["distributed"] is True
+    assert result["chunks"] == len(chunks)
+    assert distributed.shape == serial.shape
+    np.testing.assert_allclose(distributed, serial, atol=1e-4)
+    # Checkpoints of both jobs are cleaned up; only the two outputs are left
+    assert sorted(minio.objects) == sorted([serial_result["output_object"], result["output_object"]])
+
+
+def test_merge_assembles_chunks_in_text_order(minio, eager_celery):
+    text = long_text()
+    chunks = get_audio_engine("stub").split_text(text)
+    task_id = str(uuid.uuid4())
+
+    chunk_results = [
+        synthesize_chunk_task.apply(args=["stub", chunk, None, task_id, index]).get()
+        for index, chunk in enumerate(chunks)
+    ]
+    assert [chunk["index"] for chunk in chunk_results] == list(range(len(chunks)))
+
+    # Chord results can arrive in any order
+    shuffled = chunk_results[::-1]
+    shuffled[0], shuffled[-1] = shuffled[-1], shuffled[0]
+    result = merge_chunks_task.apply(args=[shuffled, "stub", None, "wav", None], task_id=task_id).get()
+    merged, _ = sf.read(minio.read(result["output_object"]), dtype="float32")
+
+    serial, _ = render(minio, text, distributed=False)
+    assert result["chunks"] == len(chunks)
+    np.testing.assert_allclose(merged, serial, atol=1e-4)
+
+
+@pytest.fixture
+def failing_chunk(monkeypatch):
+    """Makes the stub engine fail on any chunk containing "(3)", and records the webhooks sent."""
+    engine = get_audio_engine("stub")
+    synthesizer = engine.chunk_synthesizer
+
+    def chunk_synthesizer(options):
+        synthesize = synthesizer(options)
+
+        def failing(chunk_text):
+            if "(3)" in chunk_text:
+                raise RuntimeError("chunk 3 exploded")
+            return synthesize(chunk_text)
+        return failing
+
+    webhooks = []
+    monkeypatch.setattr(engine, "chunk_synthesizer", chunk_synthesizer)
+    monkeypatch.setattr(settings, "chunk_max_retries", 1)
+    monkeypatch.setattr("app.tasks.send_webhook_task", lambda url, payload, task_id: webhooks.append(payload))
+    return webhooks
+
+
+def test_failed_chunk_fails_and_finalizes_the_job(minio, eager_celery, failing_chunk):
+    from app.celery_worker import celery_app
+
+    text = long_text()
+    task_id = str(uuid.uuid4())
+    text_ref = store_text(task_id, text)
+    generate_audio_task.apply(
+        args=["stub", None, None, "wav", None, "http://hooks.example/done"],
+        kwargs={"distributed": True, "text_ref": text_ref},
+        task_id=task_id,
+    )
+
+    assert AsyncResult(task_id, app=celery_app).state == "FAILURE"
+    assert [hook["task_state"] for hook in failing_chunk] == ["FAILURE"]
+    assert failing_chunk[0]["result"]["distributed"] is True
+    # Chunk checkpoints and the stored text are gone
+    assert minio.objects == {}
+
+
+def test_failed_script_batch_fails_and_finalizes_the_job(minio, eager_celery, failing_chunk):
+    from app.celery_worker import celery_app
+
+    task_id = str(uuid.uuid4())
+    segments = [
+        {"engine": "stub", "text": "Line one (1).", "engine_options": {"voice": "a"}},
+        {"engine": "stub", "text": "Line two (3).", "engine_options": {"voice": "b"}},
+    ]
+    generate_script_task.apply(args=[segments, 300, "wav", None, "http://hooks.example/done"], task_id=task_id)
+
+    assert AsyncResult(task_id, app=celery_app).state == "FAILURE"
+    assert [hook["task_state"] for hook in failing_chunk] == ["FAILURE"]
+    assert minio.objects == {}
+
+
+def test_merge_fails_clearly_when_a_chunk_is_lost(minio, eager_celery):
+    from app.services.minio.chunk_store import ChunkCheckpointMissing
+
+    chunks = get_audio_engine("stub").split_text(long_text())
+    task_id = str(uuid.uuid4())
+    chunk_results = [
+        synthesize_chunk_task.apply(args=["stub", chunk, None, task_id, index]).get()
+        for index, chunk in enumerate(chunks)
+    ]
+    del minio.objects[chunk_results[2]["object"]]
+
+    with pytest.raises(ChunkCheckpointMissing, match="Chunk 2 "):
+        merge_chunks_task.apply(args=[chunk_results, "stub", None, "wav", None], task_id=task_id)
@@ -0,0 +1,25 @@
+import pytest
+
+from app.utils.http_range import parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=950-2000", (950, 999)),
+    # Invalid or not served partially: the whole resource is sent
+    ("bytes=10-5", None),
+    ("bytes=abc-5", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-5", None),
+    (None, None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1200", "bytes=-0"])
+def test_unsatisfiable_ranges_raise(header):
+    with pytest.raises(ValueError):
+        parse_range_header(header, 1000)
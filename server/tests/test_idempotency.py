@@ -0,0 +1,100 @@
+"""Idempotency-Keys of submissions that never became tasks must not keep answering retries."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+
+
+@pytest.fixture
+def client(minio, monkeypatch):
+    import app.main
+    sent = []
+
+    def send_task(name, args=None, kwargs=None, task_id=None, **options):
+        sent.append(task_id)
+
+    monkeypatch.setattr(app.main.celery_app, "send_task", send_task)
+    monkeypatch.setattr(settings, "enable_stub_engine", True)
+    client = TestClient(app.main.app)
+    client.sent = sent
+    return client
+
+
+def idempotency_keys() -> list:
+    from app.services.redis.redis_client import redis_client
+    return list(redis_client.scan_iter("tts:submit:key:*"))
+
+
+def submit(client, text: str, key: str = None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post("/generate/audio", json={"engine": "stub", "text": text}, headers=headers)
+
+
+def test_key_rejected_by_admission_can_be_retried(client, monkeypatch):
+    from app.services.redis.admission import release_admission
+
+    monkeypatch.setattr(settings, "admission_max_backlog_seconds", {"stub": 1.0})
+    monkeypatch.setattr(settings, "admission_default_chars_per_second", {"stub": 50.0})
+    busy = submit(client, "x" * 200)
+    assert busy.status_code == 202
+
+    rejected = submit(client, "Hello there.", key="retry-me")
+    assert rejected.status_code == 429
+    assert idempotency_keys() == []
+
+    release_admission(busy.json()["task_id"])
+    retried = submit(client, "Hello there.", key="retry-me")
+    assert retried.status_code == 202
+    assert not retried.json()["deduplicated"]
+    assert retried.json()["task_id"] in client.sent
+
+
+def test_key_of_failed_enqueue_can_be_retried(client, monkeypatch):
+    import app.main
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker unavailable")
+
+    sent = client.sent
+    monkeypatch.setattr(app.main.celery_app, "send_task", broker_down)
+    assert submit(client, "Hello there.", key="retry-me").status_code == 500
+    assert idempotency_keys() == []
+
+    monkeypatch.setattr(app.main.celery_app, "send_task", lambda *args, task_id=None, **kwargs: sent.append(task_id))
+    retried = submit(client, "Hello there.", key="retry-me")
+    assert retried.status_code == 202
+    assert not retried.json()["deduplicated"]
+    assert sent == [retried.json()["task_id"]]
+
+
+def test_key_of_finished_task_keeps_answering(client, eager_celery):
+    from app.celery_worker import celery_app
+    from app.services.redis.idempotency import release_task
+
+    first = submit(client, "Hello there.", key="done")
+    celery_app.backend.store_result(first.json()["task_id"], {}, "SUCCESS")
+    release_task(first.json()["task_id"])
+
+    again = submit(client, "Hello there.", key="done")
+    assert again.json()["deduplicated"]
+    assert again.json()["task_id"] == first.json()["task_id"]
+    # The payload alone no longer coalesces once the task finished
+    assert not submit(client, "Hello there.").json()["deduplicated"]
+
+
+def test_claim_never_falls_through_without_the_key():
+    from app.services.redis.idempotency import ClaimContended, claim_task, coalescing_keys
+    from app.services.redis.redis_client import redis_client
+
+    keys = coalescing_keys("fingerprint", "contended")
+    redis_client.set(keys[0], "ghost-1|fingerprint")
+    ghosts = iter(range(2, 10))
+
+    def is_stale(task_id):
+        # Each time the stale holder is dropped, another submission claims the key first
+        redis_client.set(keys[0], f"ghost-{next(ghosts)}|fingerprint")
+        return True
+
+    with pytest.raises(ClaimContended):
+        claim_task(keys, "mine", "fingerprint", is_stale)
+    assert not redis_client.exists(keys[1])
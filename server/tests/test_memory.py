@@ -0,0 +1,64 @@
+"""Memory watchdog eviction: models leased by a running task stay, and eviction stops when it frees nothing."""
+import contextvars
+import threading
+
+import pytest
+
+from app.config import settings
+from app.utils import memory
+from app.utils.memory import ResidentModels, enforce_memory_budget
+
+
+@pytest.fixture
+def models(monkeypatch):
+    monkeypatch.setattr(settings, "memory_watchdog_interval_seconds", 0)
+    monkeypatch.setattr(memory, "release_freed_memory", lambda: None)
+    registry = ResidentModels()
+    monkeypatch.setattr(memory, "resident_models", registry)
+    return registry
+
+
+def usage(monkeypatch, samples):
+    """Makes the budget check report each of `samples` (rss in MB, over budget) in turn."""
+    readings = iter(samples)
+    monkeypatch.setattr(memory, "_over_budget", lambda: next(readings))
+
+
+def test_leased_models_are_not_evicted(models, monkeypatch):
+    for name in ("a", "b", "c"):
+        models.get(name, object)
+    with models.leases():
+        models.get("a", object)
+        # Models fetched by threads that copy the task's context are leased too
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(models.get, "b", object))
+        thread.start()
+        thread.join()
+        assert models.leased() == ["a", "b"]
+
+        usage(monkeypatch, [(True, 900, None), (True, 800, None)])
+        assert enforce_memory_budget() is False
+        assert models.names() == ["a", "b"]
+
+    assert models.leased() == []
+    assert models.evict_lru() == "a"
+
+
+def test_eviction_stops_when_memory_does_not_go_down(models, monkeypatch):
+    for name in ("a", "b", "c"):
+        models.get(name, object)
+    usage(monkeypatch, [(True, 900, None), (True, 900, None)])
+    assert enforce_memory_budget() is False
+    assert models.names() == ["b", "c"]
+
+    usage(monkeypatch, [(True, 900, None), (True, 700, None), (False, 500, None)])
+    assert enforce_memory_budget() is True
+    assert models.names() == []
+
+
+def test_tasks_release_their_leases(minio, eager_celery):
+    from app.tasks import generate_audio_task
+    from app.utils.memory import resident_models
+
+    generate_audio_task.apply(args=["stub", "A short sentence.", None, "wav", None]).get()
+    assert "engine:stub" in resident_models.names()
+    assert resident_models.leased() == []
@@ -0,0 +1,30 @@
+"""Throughput measured for admission control covers synthesis only."""
+import uuid
+
+from app.tasks import generate_audio_task
+from app.utils.timeline import TaskTimeline
+from tests.test_distributed import long_text
+
+
+def test_stage_coverage_counts_parallel_spans_once():
+    timeline = TaskTimeline()
+    timeline.add("synthesis", 10.0, 12.0, chars=100)
+    timeline.add("synthesis", 11.0, 13.0, chars=100)
+    timeline.add("synthesis", 20.0, 21.0, chars=50)
+    timeline.add("encoding", 13.0, 19.0)
+
+    assert timeline.stage_coverage("synthesis") == (250, 4.0)
+
+
+def test_throughput_excludes_everything_but_synthesis(minio, eager_celery, monkeypatch):
+    recorded = []
+    monkeypatch.setattr("app.tasks.record_throughput", lambda engine, chars, seconds: recorded.append((engine, chars, seconds)))
+    text = long_text()
+
+    result = generate_audio_task.apply(args=["stub", text, None, "wav", None], task_id=str(uuid.uuid4())).get()
+
+    [(engine, chars, seconds)] = recorded
+    stages = result["timeline"]["stages"]
+    assert engine == "stub" and chars == sum(span["chars"] for span in result["timeline"]["spans"] if span["name"] == "synthesis")
+    assert abs(seconds - stages["synthesis"]) < 1e-3
+    assert seconds < result["timeline"]["worker_seconds"]